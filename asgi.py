@@ -0,0 +1,7 @@
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from tesla_analytics.application import app_factory
+
+application = WSGIMiddleware(app_factory(), workers=int(os.getenv("ASGI_THREADS", 32)))
@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from itertools import count
+
+from flask_jwt_extended import create_access_token
+from flask_sqlalchemy import Pagination
+
+from benchmarks.serialization import MODELS, charge_data, climate_data, drive_data, vehicle_data
+from tesla_analytics import anomalies, purge, workers
+from tesla_analytics.api.params import TIMESTAMP_FORMAT, pagination_headers, url_without_pagination
+from tesla_analytics.application import app_factory
+from tesla_analytics.models import db, User, Vehicle, ChargeState
+
+EMAIL = "hot-paths@example.com"
+VEHICLE_ID = "hot_paths_vehicle"
+POLLER_VEHICLE_ID = "hot_paths_poller"
+START = datetime(2018, 2, 14, 8, 0, 0)
+INTERVAL = timedelta(seconds=15)
+STATES = 20000
+PAGES = [1, 10, 100]
+RANGES = [("hour", timedelta(hours=1)), ("day", timedelta(days=1)), ("week", timedelta(days=7))]
+REPEAT = 5
+THRESHOLD = 0.1
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class StubTeslaService(object):
+    polls = count()
+
+    def __init__(self, token=None):
+        self.poll = next(self.polls)
+        self.timestamp = START + INTERVAL * self.poll
+
+    def wake_up(self, vehicle_id):
+        pass
+
+    def charge_state(self, vehicle_id):
+        return dict(charge_data(self.timestamp), charge_energy_added=0.01 * self.poll)
+
+    def climate(self, vehicle_id):
+        return climate_data(self.timestamp)
+
+    def position(self, vehicle_id):
+        return drive_data(self.timestamp)
+
+    def vehicle_state(self, vehicle_id):
+        return vehicle_data(self.timestamp)
+
+
+def measure(results: dict, name: str, fn, number: int):
+    fn()
+    timings = [elapsed / number for elapsed in timeit.repeat(fn, number=number, repeat=REPEAT)]
+    results[name] = {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "number": number,
+        "repeat": REPEAT,
+    }
+    print("{:<48}{:>14.1f}{:>14.1f}".format(name, results[name]["median"] * 1e6, results[name]["min"] * 1e6))
+
+
+def seed(states: int):
+    teardown()
+    user = User(email=EMAIL, password_hash="")
+    vehicle = Vehicle(tesla_id=VEHICLE_ID, vin="hot-paths", user=user)
+    poller_vehicle = Vehicle(tesla_id=POLLER_VEHICLE_ID, vin="hot-paths-poller", user=user)
+    db.session.add_all([user, vehicle, poller_vehicle])
+    db.session.flush()
+
+    for offset in range(0, states, 5000):
+        db.session.execute(ChargeState.__table__.insert(), [
+            {"vehicle_id": vehicle.id, "timestamp": START + INTERVAL * i, "data": _charge_fields(START + INTERVAL * i)}
+            for i in range(offset, min(offset + 5000, states))
+        ])
+    db.session.commit()
+    db.session.execute("analyze charge_state")
+    return user, vehicle, poller_vehicle
+
+
+def teardown():
+    user = User.query.filter_by(email=EMAIL).first()
+    if user is None:
+        return
+    for vehicle in list(user.vehicles):
+        purge.purge(vehicle)
+    for alert in user.alerts:
+        db.session.delete(alert)
+    db.session.delete(user)
+    db.session.commit()
+
+
+def bench_models(results: dict):
+    for model, generator in MODELS:
+        data = generator(START)
+        instance = model(data, vehicle=None)
+        measure(results, "construct.{}".format(model.__name__), lambda: model(data, vehicle=None), 2000)
+        measure(results, "serialize.{}".format(model.__name__), instance.serialize, 2000)
+
+
+def bench_poller(results: dict, vehicle: Vehicle):
+    original = workers.TeslaService
+    workers.TeslaService = StubTeslaService
+    try:
+        measure(results, "vehicle_poller", lambda: workers.vehicle_poller(vehicle), 20)
+    finally:
+        workers.TeslaService = original
+        anomalies.pipeline.clear()
+
+
+def bench_fetch(results: dict, client, token: str, states: int):
+    headers = {"Authorization": "Bearer {}".format(token)}
+    url = "/api/charge?vehicle_id={}".format(VEHICLE_ID)
+
+    def fetch(query: str):
+        response = client.get(url + query, headers=headers)
+        assert response.status_code == 200, response.status_code
+        return response
+
+    for page in PAGES:
+        if (page - 1) * 50 < states:
+            measure(results, "fetch_data.page_{}".format(page), lambda: fetch("&page={}".format(page)), 20)
+    end = START + INTERVAL * states
+    for name, size in RANGES:
+        query = "&after={}&before={}".format((end - size).strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT))
+        measure(results, "fetch_data.range_{}".format(name), lambda: fetch(query), 20)
+
+
+def bench_pagination(results: dict, app):
+    url = "http://localhost/api/charge?vehicle_id={}&after=2018-02-14T08:00:00.000000Z&page=7&size=50".format(
+        VEHICLE_ID
+    )
+    with app.test_request_context(url):
+        for page in [1, 200, 400]:
+            data = Pagination(None, page, 50, 20000, [])
+            measure(results, "pagination_headers.page_{}".format(page), lambda: pagination_headers(data), 5000)
+        measure(results, "url_without_pagination", lambda: url_without_pagination(url), 5000)
+
+
+def run(output: str = None, states: int = STATES) -> str:
+    app = app_factory()
+    results = {}
+    print("{:<48}{:>14}{:>14}".format("benchmark", "median (us)", "min (us)"))
+    with app.app_context():
+        db.create_all()
+        _, _, poller_vehicle = seed(states)
+        try:
+            token = create_access_token(identity=EMAIL)
+            bench_models(results)
+            bench_poller(results, poller_vehicle)
+            bench_fetch(results, app.test_client(), token, states)
+            bench_pagination(results, app)
+            postgres = db.session.execute("select version()").scalar()
+        finally:
+            db.session.rollback()
+            teardown()
+
+    report = {
+        "commit": _commit(),
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None).isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "postgres": postgres,
+        "states": states,
+        "results": results,
+    }
+    output = output or os.path.join(RESULTS, "{}.json".format(report["commit"] or "latest"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as destination:
+        json.dump(report, destination, indent=2, sort_keys=True)
+    print("Wrote {}".format(output))
+    return output
+
+
+def compare(baseline_path: str, current_path: str, threshold: float = THRESHOLD) -> int:
+    with open(baseline_path) as source:
+        baseline = json.load(source)
+    with open(current_path) as source:
+        current = json.load(source)
+
+    print("{:<48}{:>14}{:>14}{:>10}".format("benchmark", "before (us)", "after (us)", "change"))
+    regressions = 0
+    for name in sorted(set(baseline["results"]) & set(current["results"])):
+        before = baseline["results"][name]["min"]
+        after = current["results"][name]["min"]
+        change = (after - before) / before if before else 0.0
+        regressed = change > threshold
+        regressions += regressed
+        print("{:<48}{:>14.1f}{:>14.1f}{:>+9.1f}%{}".format(
+            name, before * 1e6, after * 1e6, change * 100, "  REGRESSION" if regressed else ""
+        ))
+    for name in sorted(set(baseline["results"]) ^ set(current["results"])):
+        print("{:<48}{:>38}".format(name, "only in " + ("baseline" if name in baseline["results"] else "current")))
+    return 1 if regressions else 0
+
+
+def _charge_fields(timestamp: datetime) -> dict:
+    data = charge_data(timestamp)
+    data.pop("timestamp")
+    return data
+
+
+def _commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ingest and query hot paths")
+    commands = parser.add_subparsers(dest="command")
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--output")
+    run_parser.add_argument("--states", type=int, default=STATES)
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == "compare":
+        return compare(arguments.baseline, arguments.current, arguments.threshold)
+    run(arguments.output, getattr(arguments, "states", STATES))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
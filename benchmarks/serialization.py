@@ -0,0 +1,100 @@
+import timeit
+from datetime import datetime, timedelta
+
+from flask import jsonify
+
+from tesla_analytics import encoding
+from tesla_analytics.application import app
+from tesla_analytics.models import ChargeState, ClimateState, DriveState, VehicleState
+
+PAGE_SIZES = [50, 5000]
+
+
+def charge_data(timestamp: datetime) -> dict:
+    return {
+        "timestamp": int(timestamp.timestamp() * 1000),
+        "charging_state": "Charging",
+        "battery_level": 64,
+        "battery_range": 180.25,
+        "charge_energy_added": 12.3,
+        "charger_power": 11,
+        "charger_voltage": 240,
+        "charge_limit_soc": 90,
+        "time_to_full_charge": 1.25,
+    }
+
+
+def climate_data(timestamp: datetime) -> dict:
+    return {
+        "timestamp": int(timestamp.timestamp() * 1000),
+        "inside_temp": 21.5,
+        "outside_temp": 12.0,
+        "driver_temp_setting": 21.0,
+        "is_climate_on": False,
+        "fan_status": 0,
+    }
+
+
+def drive_data(timestamp: datetime) -> dict:
+    return {
+        "timestamp": int(timestamp.timestamp() * 1000),
+        "gps_as_of": int(timestamp.timestamp()),
+        "latitude": 37.548271,
+        "longitude": -121.988571,
+        "power": 12.0,
+        "shift_state": "D",
+        "speed": 45,
+        "heading": 182,
+    }
+
+
+def vehicle_data(timestamp: datetime) -> dict:
+    return {
+        "timestamp": int(timestamp.timestamp() * 1000),
+        "odometer": 12345.6,
+        "locked": True,
+        "car_version": "2018.4.1",
+        "sentry_mode": False,
+    }
+
+
+MODELS = [
+    (ChargeState, charge_data),
+    (ClimateState, climate_data),
+    (DriveState, drive_data),
+    (VehicleState, vehicle_data),
+]
+
+
+def build(model, generator, count: int):
+    start = datetime(2018, 2, 14, 8, 0, 0, 123000)
+    instances = [model(generator(start + timedelta(seconds=15 * i)), vehicle=None) for i in range(count)]
+    rows = [(instance.data,) + tuple(getattr(instance, name) for name in model.serialized_columns)
+            for instance in instances]
+    return instances, rows
+
+
+def run(number: int = 20):
+    print("{:<14}{:>8}{:>14}{:>14}{:>10}".format("model", "rows", "jsonify (ms)", "fast (ms)", "speedup"))
+    with app.test_request_context():
+        for model, generator in MODELS:
+            for count in PAGE_SIZES:
+                instances, rows = build(model, generator, count)
+                assert encoding.dumps(encoding.serialize_rows(model, rows)) == \
+                    encoding.dumps([instance.serialize() for instance in instances])
+
+                baseline = timeit.timeit(
+                    lambda: jsonify([instance.serialize() for instance in instances]).get_data(),
+                    number=number
+                ) / number
+                fast = timeit.timeit(
+                    lambda: encoding.json_response(encoding.serialize_rows(model, rows)).get_data(),
+                    number=number
+                ) / number
+                print("{:<14}{:>8}{:>14.3f}{:>14.3f}{:>9.1f}x".format(
+                    model.__name__, count, baseline * 1000, fast * 1000, baseline / fast
+                ))
+
+
+if __name__ == "__main__":
+    run()
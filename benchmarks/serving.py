@@ -0,0 +1,175 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib import request as urlrequest
+from urllib.error import HTTPError
+
+import bcrypt
+
+from benchmarks.serialization import charge_data
+from tesla_analytics.application import app
+from tesla_analytics.models import db, User, Vehicle, ChargeState
+
+EMAIL = "benchmark@example.com"
+PASSWORD = "benchmark"
+VEHICLE_ID = "benchmark_vehicle"
+CONCURRENCY = [1, 8, 32]
+REQUESTS = 64
+OPEN_STREAMS = 4
+STREAM_TIMEOUT = 5
+
+SERVERS = [
+    ("gunicorn sync", ["gunicorn", "-w", "1", "-b", "127.0.0.1:{port}", "main"]),
+    ("uvicorn asgi", ["uvicorn", "--host", "127.0.0.1", "--port", "{port}", "--log-level", "warning", "asgi:application"]),
+]
+
+
+def setup(states: int = 5000):
+    with app.app_context():
+        db.create_all()
+        teardown()
+        user = User(email=EMAIL, password_hash=bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8"))
+        vehicle = Vehicle(tesla_id=VEHICLE_ID, vin="benchmark", user=user)
+        db.session.add_all([user, vehicle])
+        start = datetime(2018, 2, 14, 8, 0, 0)
+        db.session.add_all([ChargeState(charge_data(start + timedelta(seconds=15 * i)), vehicle=vehicle)
+                            for i in range(states)])
+        db.session.commit()
+
+
+def teardown():
+    user = User.query.filter_by(email=EMAIL).first()
+    if user is None:
+        return
+    for vehicle in user.vehicles:
+        ChargeState.query.filter_by(vehicle_id=vehicle.id).delete()
+        db.session.delete(vehicle)
+    db.session.delete(user)
+    db.session.commit()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(command, port: int) -> subprocess.Popen:
+    process = subprocess.Popen([part.format(port=port) for part in command], env=os.environ.copy())
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server '{}' did not start".format(" ".join(command)))
+
+
+def call(url: str, body: dict = None, token: str = None, timeout: float = 120):
+    headers = {"Content-Type": "application/json"}
+    if token is not None:
+        headers["Authorization"] = "Bearer {}".format(token)
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    started = time.perf_counter()
+    try:
+        with urlrequest.urlopen(urlrequest.Request(url, data=data, headers=headers), timeout=timeout) as response:
+            response.read()
+    except HTTPError as e:
+        raise RuntimeError("{} returned {}".format(url, e.code))
+    except OSError:
+        return None
+    return time.perf_counter() - started
+
+
+def hold_streams(port: int, token: str, count: int = OPEN_STREAMS):
+    streams = []
+    for _ in range(count):
+        stream = socket.create_connection(("127.0.0.1", port))
+        stream.sendall("GET /api/live?vehicle_id={} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {}\r\n\r\n"
+                       .format(VEHICLE_ID, token).encode("utf-8"))
+        streams.append(stream)
+    time.sleep(1)
+    return streams
+
+
+def load(fn, concurrency: int, requests: int = REQUESTS):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: fn(), range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for latency in results if latency is not None)
+    if not latencies:
+        return 0.0, None, None, requests
+    return (
+        len(latencies) / elapsed,
+        latencies[len(latencies) // 2],
+        latencies[max(int(len(latencies) * 0.95) - 1, 0)],
+        requests - len(latencies)
+    )
+
+
+def milliseconds(value) -> str:
+    return "{:.1f}".format(value * 1000) if value is not None else "-"
+
+
+def access_token(base: str) -> str:
+    with urlrequest.urlopen(urlrequest.Request(
+        base + "/api/login", data=json.dumps({"email": EMAIL, "password": PASSWORD}).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )) as response:
+        return json.loads(response.read().decode("utf-8"))["access_token"]
+
+
+def report(name: str, endpoint: str, concurrency: int, throughput: float, p50, p95, errors: int):
+    print("{:<16}{:<16}{:>8}{:>10.1f}{:>12}{:>12}{:>10}".format(
+        name, endpoint, concurrency, throughput, milliseconds(p50), milliseconds(p95), errors
+    ))
+
+
+def run():
+    setup()
+    print("{:<16}{:<16}{:>8}{:>10}{:>12}{:>12}{:>10}".format(
+        "server", "endpoint", "clients", "req/s", "p50 (ms)", "p95 (ms)", "errors"
+    ))
+    try:
+        for name, command in SERVERS:
+            port = free_port()
+            base = "http://127.0.0.1:{}".format(port)
+            process = start_server(command, port)
+            streams = []
+            try:
+                token = access_token(base)
+                credentials = {"email": EMAIL, "password": PASSWORD}
+                scenarios = [
+                    ("login", lambda: call(base + "/api/login", body=credentials)),
+                    ("charge", lambda: call(base + "/api/charge?vehicle_id={}".format(VEHICLE_ID), token=token)),
+                ]
+                for endpoint, fn in scenarios:
+                    for concurrency in CONCURRENCY:
+                        report(name, endpoint, concurrency, *load(fn, concurrency))
+
+                streams = hold_streams(port, token)
+                report(name, "charge+{}live".format(len(streams)), CONCURRENCY[-1], *load(
+                    lambda: call(base + "/api/charge?vehicle_id={}".format(VEHICLE_ID), token=token,
+                                 timeout=STREAM_TIMEOUT),
+                    CONCURRENCY[-1]
+                ))
+            finally:
+                for stream in streams:
+                    stream.close()
+                process.terminate()
+                process.wait()
+    finally:
+        with app.app_context():
+            teardown()
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -6,4 +6,7 @@ setup(
     packages=['tesla_analytics',],
     license='Copyright 2018 Rachel Brindle',
     long_description="Records analytics from your tesla vehicle",
+    extras_require={
+        'frames': ['pyarrow', 'pandas'],
+    },
 )
@@ -1,13 +1,14 @@
+from datetime import datetime
 from logging import Logger, INFO
-from time import sleep
+from time import sleep, time
 
-import bcrypt
 from flask_script import Manager
 from flask_migrate import Migrate, MigrateCommand
 
-from tesla_analytics import workers
+from tesla_analytics import workers, trips, charging, geo, heatmap, onboarding, passwords, purge, battery, efficiency, \
+    drain, synthetic
 from tesla_analytics.application import app
-from tesla_analytics.models import db, User, Vehicle, ChargeState, ClimateState, DriveState, VehicleState
+from tesla_analytics.models import db, User, Vehicle, DriveState
 from tesla_analytics.tesla_service import TeslaService
 
 LOG = Logger(__name__)
@@ -28,19 +29,13 @@ def monitor():
 
 @manager.command
 def create_user(email, password, tesla_email, tesla_password):
-    user = User(
-        email=email,
-        password_hash=bcrypt.hashpw(password.encode('utf8'), bcrypt.gensalt()).decode("utf-8")
-    )
+    user = User(email=email, password_hash=passwords.hash_password(password))
     _update_users_vehicles(user, tesla_email, tesla_password)
 
 
 @manager.command
 def test_user(email, password):
-    user = User(
-        email=email,
-        password_hash=bcrypt.hashpw(password.encode('utf8'), bcrypt.gensalt()).decode("utf-8")
-    )
+    user = User(email=email, password_hash=passwords.hash_password(password))
     db.session.add(user)
     db.session.commit()
     print("Successfully added user!")
@@ -48,23 +43,146 @@ def test_user(email, password):
 
 @manager.command
 def login(email, tesla_email, tesla_password):
-    user = User.find_by(email=email)
+    user = User.query.filter_by(email=email).first()
     _update_users_vehicles(user, tesla_email, tesla_password)
 
 
+@manager.option("path")
+@manager.option("--threads", dest="threads", type=int, default=onboarding.WORKERS)
+@manager.option("--batch-size", dest="batch_size", type=int, default=onboarding.BATCH_SIZE)
+@manager.option("--reset-passwords", dest="reset_passwords", action="store_true", default=False)
+def onboard(path, threads, batch_size, reset_passwords):
+    succeeded = failed = 0
+    for result in onboarding.onboard(onboarding.read_accounts(path), workers=threads, batch_size=batch_size,
+                                     reset_passwords=reset_passwords):
+        if result.error is None:
+            succeeded += 1
+        elif result.email is None:
+            failed += 1
+            print("Skipped invalid account: {}".format(result.error))
+        else:
+            failed += 1
+            print("Failed to onboard '{}': {}".format(result.email, result.error))
+    print("Onboarded {} accounts, {} failed".format(succeeded, failed))
+
+
+@manager.command
+def purge_vehicle(email, tesla_id, batch_size=10000):
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        print("No user with email '{}'".format(email))
+        return
+    vehicles = [vehicle for vehicle in user.vehicles if vehicle.tesla_id == tesla_id]
+    if not vehicles:
+        print("User '{}' has no vehicle '{}'".format(email, tesla_id))
+    for vehicle in vehicles:
+        _purge_vehicle(vehicle, int(batch_size))
+
+
+@manager.command
+def backfill_trips(chunk_size=10000):
+    for vehicle in Vehicle.query.all():
+        count = trips.rebuild(vehicle, chunk_size=int(chunk_size))
+        print("Rebuilt {} trips for vehicle '{}'".format(count, vehicle.name))
+
+
+@manager.command
+def backfill_charging_sessions(chunk_size=10000):
+    for vehicle in Vehicle.query.all():
+        count = charging.rebuild(vehicle, chunk_size=int(chunk_size))
+        print("Rebuilt {} charging sessions for vehicle '{}'".format(count, vehicle.name))
+
+
+@manager.command
+def backfill_idle_periods(chunk_size=10000):
+    for vehicle in Vehicle.query.all():
+        count = drain.rebuild(vehicle, chunk_size=int(chunk_size))
+        print("Rebuilt {} idle periods for vehicle '{}'".format(count, vehicle.name))
+
+
+@manager.command
+def rebuild_heatmaps(chunk_size=10000):
+    for vehicle in Vehicle.query.all():
+        count = heatmap.rebuild(vehicle, chunk_size=int(chunk_size))
+        print("Rebuilt heatmap from {} drive states for vehicle '{}'".format(count, vehicle.name))
+
+
+@manager.command
+def rebuild_efficiency(chunk_size=10000):
+    for vehicle in Vehicle.query.all():
+        count = efficiency.rebuild(vehicle, chunk_size=int(chunk_size))
+        print("Rebuilt efficiency from {} drive intervals for vehicle '{}'".format(count, vehicle.name))
+
+
+@manager.command
+def update_battery_history(chunk_size=10000):
+    for vehicle in Vehicle.query.all():
+        count = battery.update(vehicle, chunk_size=int(chunk_size))
+        print("Updated {} days of battery history for vehicle '{}'".format(count, vehicle.name))
+
+
+@manager.command
+def rebuild_battery_history(chunk_size=10000):
+    for vehicle in Vehicle.query.all():
+        count = battery.rebuild(vehicle, chunk_size=int(chunk_size))
+        print("Rebuilt {} days of battery history for vehicle '{}'".format(count, vehicle.name))
+
+
+@manager.command
+def backfill_drive_cells(chunk_size=10000):
+    updated = 0
+    while True:
+        rows = db.session.query(DriveState.id, DriveState.latitude, DriveState.longitude).filter(
+            DriveState.cell.is_(None),
+            DriveState.latitude.isnot(None),
+            DriveState.longitude.isnot(None)
+        ).limit(int(chunk_size)).all()
+        if not rows:
+            break
+        cells = geo.cell([row.latitude for row in rows], [row.longitude for row in rows])
+        db.session.bulk_update_mappings(DriveState, [
+            {"id": row.id, "cell": int(cell)} for row, cell in zip(rows, cells)
+        ])
+        db.session.commit()
+        updated += len(rows)
+        print("Indexed {} drive states".format(updated))
+
+
+@manager.command
+def seed(vehicles=1, years=1, seed=0, email="seed@example.com", password="seed", start="2018-01-01",
+         batch_size=50000):
+    started = time()
+    count = synthetic.generate(
+        vehicles=int(vehicles),
+        years=float(years),
+        seed=int(seed),
+        email=email,
+        password=password,
+        start=datetime.strptime(start, "%Y-%m-%d"),
+        batch_size=int(batch_size),
+        progress=lambda vehicle, loaded, until: print(
+            "Loaded {} rows for vehicle '{}' through {}".format(loaded, vehicle.name, until.date())
+        )
+    )
+    elapsed = time() - started
+    print("Loaded {} rows in {:.1f}s ({:.0f} rows/minute)".format(count, elapsed, count / max(elapsed, 1e-6) * 60))
+
+
 def _update_users_vehicles(user, tesla_email, tesla_password):
     tesla_service = TeslaService(email=tesla_email, password=tesla_password)
     user.tesla_access_token = tesla_service.token
 
-    for tesla_vehicle in tesla_service.vehicles():
-        stored_vehicle = user.vehicles.find_by(tesla_id=tesla_vehicle["id"]).first()
+    tesla_vehicles = tesla_service.vehicles()
+    for tesla_vehicle in tesla_vehicles:
+        tesla_id = str(tesla_vehicle["id"])
+        stored_vehicle = next((v for v in user.vehicles if v.tesla_id == tesla_id), None)
         if stored_vehicle:
             stored_vehicle.vin = tesla_vehicle["vin"]
             stored_vehicle.color = tesla_vehicle["color"]
             stored_vehicle.name = tesla_vehicle["display_name"]
         else:
             stored_vehicle = Vehicle(
-                tesla_id=tesla_vehicle["id"],
+                tesla_id=tesla_id,
                 vin=tesla_vehicle["vin"],
                 color=tesla_vehicle["color"],
                 name=tesla_vehicle["display_name"],
@@ -72,21 +190,25 @@ def _update_users_vehicles(user, tesla_email, tesla_password):
             )
         db.session.add(stored_vehicle)
 
-    vehicle_ids = [v["id"] for v in tesla_service.vehicles()]
-
-    for stored_vehicle in user.vehicles:
-        if stored_vehicle.tesla_id not in vehicle_ids:
-            db.session.delete(ChargeState.vehicle_id.equals(stored_vehicle.id))
-            db.session.delete(ClimateState.vehicle_id.equals(stored_vehicle.id))
-            db.session.delete(DriveState.vehicle_id.equals(stored_vehicle.id))
-            db.session.delete(VehicleState.vehicle_id.equals(stored_vehicle.id))
-            db.session.delete(stored_vehicle)
-            print("Deleting vehicle '{}' from user".format(stored_vehicle.name))
+    vehicle_ids = [str(v["id"]) for v in tesla_vehicles]
+    removed_vehicles = [v for v in user.vehicles if v.tesla_id not in vehicle_ids]
 
     db.session.add(user)
     db.session.commit()
     print("Successfully logged in user!")
 
+    for stored_vehicle in removed_vehicles:
+        _purge_vehicle(stored_vehicle)
+
+
+def _purge_vehicle(vehicle, batch_size=10000):
+    name = vehicle.name
+    print("Deleting vehicle '{}' from user".format(name))
+    count = purge.purge(vehicle, batch_size=batch_size, progress=lambda table, deleted: print(
+        "Deleted {} rows from {} for vehicle '{}'".format(deleted, table, name)
+    ))
+    print("Deleted vehicle '{}' and {} rows of history".format(name, count))
+
 
 if __name__ == "__main__":
     manager.run()
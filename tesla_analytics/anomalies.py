@@ -0,0 +1,159 @@
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from logging import Logger
+from typing import Dict, List, Optional, Set
+
+from tesla_analytics.models import db, User, Vehicle, Alert, ChargeState, ClimateState, DriveState
+
+LOG = Logger(__name__)
+
+PARKED_SHIFT_STATES = [None, "P"]
+
+Snapshot = namedtuple("Snapshot", [
+    "timestamp", "battery_level", "charging_state", "charger_power", "charge_energy_added", "shift_state",
+    "inside_temp",
+])
+
+
+def snapshot(timestamp: datetime, charge_state: ChargeState = None, climate_state: ClimateState = None,
+             drive_state: DriveState = None) -> Snapshot:
+    charge = charge_state.data if charge_state is not None else {}
+    climate = climate_state.data if climate_state is not None else {}
+    return Snapshot(
+        timestamp=charge_state.timestamp if charge_state is not None else timestamp,
+        battery_level=charge.get("battery_level"),
+        charging_state=charge.get("charging_state"),
+        charger_power=charge.get("charger_power"),
+        charge_energy_added=charge.get("charge_energy_added"),
+        shift_state=drive_state.shift_state if drive_state is not None else None,
+        inside_temp=climate.get("inside_temp"),
+    )
+
+
+class ParkedDrain(object):
+    kind = "parked_drain"
+    min_drop = 5
+    window = timedelta(hours=1)
+
+    def __init__(self):
+        self.baseline = None
+
+    def observe(self, current: Snapshot) -> Optional[dict]:
+        parked = current.shift_state in PARKED_SHIFT_STATES and current.charging_state == "Disconnected"
+        if not parked or current.battery_level is None:
+            self.baseline = None
+            return None
+        if self.baseline is None or current.battery_level > self.baseline.battery_level or \
+                current.timestamp - self.baseline.timestamp > self.window:
+            self.baseline = current
+            return None
+
+        drop = self.baseline.battery_level - current.battery_level
+        if drop < self.min_drop:
+            return None
+        details = {
+            "from_battery_level": self.baseline.battery_level,
+            "to_battery_level": current.battery_level,
+            "minutes": (current.timestamp - self.baseline.timestamp).total_seconds() / 60,
+        }
+        self.baseline = current
+        return details
+
+
+class ChargingStall(object):
+    kind = "charging_stall"
+    stall_time = timedelta(minutes=15)
+
+    def __init__(self):
+        self.progress = None
+        self.alerted = False
+
+    def observe(self, current: Snapshot) -> Optional[dict]:
+        if current.charging_state != "Charging":
+            self.progress = None
+            self.alerted = False
+            return None
+        if self.progress is None or (current.charge_energy_added or 0) > (self.progress.charge_energy_added or 0):
+            self.progress = current
+            self.alerted = False
+            return None
+        if self.alerted or current.timestamp - self.progress.timestamp < self.stall_time:
+            return None
+
+        self.alerted = True
+        return {
+            "battery_level": current.battery_level,
+            "charge_energy_added": current.charge_energy_added,
+            "charger_power": current.charger_power,
+            "minutes": (current.timestamp - self.progress.timestamp).total_seconds() / 60,
+        }
+
+
+class CabinTemperature(object):
+    kind = "cabin_temperature"
+    low = -20
+    high = 55
+    hysteresis = 5
+
+    def __init__(self):
+        self.alerted = False
+
+    def observe(self, current: Snapshot) -> Optional[dict]:
+        if current.inside_temp is None:
+            return None
+        extreme = current.inside_temp <= self.low or current.inside_temp >= self.high
+        if not extreme:
+            if self.low + self.hysteresis < current.inside_temp < self.high - self.hysteresis:
+                self.alerted = False
+            return None
+        if self.alerted:
+            return None
+
+        self.alerted = True
+        return {"inside_temp": current.inside_temp}
+
+
+DETECTORS = [ParkedDrain, ChargingStall, CabinTemperature]
+
+
+class Pipeline(object):
+    def __init__(self, detectors: List[type]):
+        self.detectors = detectors
+        self.lock = threading.Lock()
+        self.vehicles = {}
+
+    def process(self, vehicle: Vehicle, current: Snapshot) -> List[Alert]:
+        with self.lock:
+            detectors = self.vehicles.get(vehicle.id)
+            if detectors is None:
+                detectors = self.vehicles[vehicle.id] = [detector() for detector in self.detectors]
+            findings = [(detector.kind, detector.observe(current)) for detector in detectors]
+        return [emit(vehicle.user, vehicle, kind, current.timestamp, details)
+                for kind, details in findings if details is not None]
+
+    def retain(self, vehicle_ids: Set[int]):
+        with self.lock:
+            for vehicle_id in [vehicle_id for vehicle_id in self.vehicles if vehicle_id not in vehicle_ids]:
+                del self.vehicles[vehicle_id]
+
+    def clear(self):
+        with self.lock:
+            self.vehicles.clear()
+
+
+pipeline = Pipeline(DETECTORS)
+
+
+def detect(vehicle: Vehicle, timestamp: datetime, charge_state: ChargeState = None,
+           climate_state: ClimateState = None, drive_state: DriveState = None) -> List[Alert]:
+    return pipeline.process(vehicle, snapshot(timestamp, charge_state, climate_state, drive_state))
+
+
+def emit(user: User, vehicle: Optional[Vehicle], kind: str, timestamp: datetime, details: Dict = None) -> Alert:
+    alert = Alert(user=user, vehicle=vehicle, kind=kind, timestamp=timestamp, details=details)
+    db.session.add(alert)
+    LOG.warning("Alert '{}' for user {} vehicle {}: {}".format(
+        kind, user.id, vehicle.tesla_id if vehicle is not None else None, details
+    ))
+    return alert
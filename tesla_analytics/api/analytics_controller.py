@@ -0,0 +1,254 @@
+import numpy as np
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import desc
+from sqlalchemy.orm import joinedload
+
+from tesla_analytics.api.params import ParameterError, requested_user, requested_vehicle, requested_time_range, \
+    requested_area, pagination_headers
+from tesla_analytics import battery, charging, drain, efficiency, heatmap, routes, stats
+from tesla_analytics.models import Alert, Trip, ChargingSession, IdlePeriod, filter_by_time_range
+
+blueprint = Blueprint("AnalyticsController", __name__)
+
+
+@blueprint.route("/trips")
+@jwt_required
+def trips():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = filter_by_time_range(Trip.query.filter_by(vehicle_id=vehicle.id), Trip.start_time, after, before)
+    data = query.order_by(desc(Trip.start_time)).paginate(per_page=50)
+
+    headers = {"Link": ", ".join(
+        pagination_headers(data)
+    )}
+
+    return jsonify([trip.serialize() for trip in data.items]), 200, headers
+
+
+@blueprint.route("/charging_sessions")
+@jwt_required
+def charging_sessions():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = filter_by_time_range(
+        ChargingSession.query.filter_by(vehicle_id=vehicle.id), ChargingSession.start_time, after, before
+    )
+    data = query.order_by(desc(ChargingSession.start_time)).paginate(per_page=50)
+
+    headers = {"Link": ", ".join(
+        pagination_headers(data)
+    )}
+
+    return jsonify([session.serialize() for session in data.items]), 200, headers
+
+
+@blueprint.route("/charging_sessions/summary")
+@jwt_required
+def charging_summary():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    bucket = request.args.get("bucket", "month")
+    if bucket not in stats.BUCKETS:
+        return jsonify({"error": "Invalid bucket '{}', expected one of {}".format(bucket, ", ".join(stats.BUCKETS))}), 400
+
+    return jsonify(charging.summary(vehicle, bucket, after=after, before=before)), 200
+
+
+@blueprint.route("/idle_periods")
+@jwt_required
+def idle_periods():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = filter_by_time_range(
+        IdlePeriod.query.filter_by(vehicle_id=vehicle.id), IdlePeriod.start_time, after, before
+    )
+    data = query.order_by(desc(IdlePeriod.start_time)).paginate(per_page=50)
+
+    headers = {"Link": ", ".join(
+        pagination_headers(data)
+    )}
+
+    return jsonify([period.serialize() for period in data.items]), 200, headers
+
+
+@blueprint.route("/idle_periods/summary")
+@jwt_required
+def idle_summary():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    bucket = request.args.get("bucket", "day")
+    if bucket not in stats.BUCKETS:
+        return jsonify({"error": "Invalid bucket '{}', expected one of {}".format(bucket, ", ".join(stats.BUCKETS))}), 400
+
+    return jsonify(drain.summary(vehicle, bucket, after=after, before=before)), 200
+
+
+@blueprint.route("/alerts")
+@jwt_required
+def alerts():
+    user = requested_user()
+    try:
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = filter_by_time_range(
+        Alert.query.options(joinedload(Alert.vehicle)).filter_by(user_id=user.id), Alert.timestamp, after, before
+    )
+    data = query.order_by(desc(Alert.timestamp), desc(Alert.id)).paginate(per_page=50)
+
+    headers = {"Link": ", ".join(
+        pagination_headers(data)
+    )}
+
+    return jsonify([alert.serialize() for alert in data.items]), 200, headers
+
+
+@blueprint.route("/battery")
+@jwt_required
+def battery_history():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    battery_days = battery.days(
+        vehicle,
+        after=after.date() if after is not None else None,
+        before=before.date() if before is not None else None
+    )
+    return jsonify({
+        "days": [day.serialize() for day in battery_days],
+        "trend": {field: battery.trend(battery_days, field) for field in battery.TREND_FIELDS},
+    }), 200
+
+
+@blueprint.route("/efficiency")
+@jwt_required
+def efficiency_summary():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    group = request.args.get("group", "day")
+    if group not in efficiency.GROUPS:
+        return jsonify({"error": "Group must be one of {}".format(", ".join(efficiency.GROUPS))}), 400
+
+    return jsonify(efficiency.summary(
+        vehicle,
+        group,
+        after=after.date() if after is not None else None,
+        before=before.date() if before is not None else None
+    )), 200
+
+
+@blueprint.route("/route")
+@jwt_required
+def route():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        tolerance = float(request.args.get("tolerance", 5))
+    except ValueError:
+        return jsonify({"error": "Tolerance must be a number of meters"}), 400
+    output_format = request.args.get("format", "geojson")
+    if output_format not in ["geojson", "polyline"]:
+        return jsonify({"error": "Format must be one of geojson, polyline"}), 400
+
+    try:
+        latitudes, longitudes = routes.route(
+            vehicle,
+            after=after,
+            before=before,
+            max_points=current_app.config.get("ROUTE_MAX_POINTS", routes.MAX_POINTS)
+        )
+    except routes.RouteTooLarge as e:
+        return jsonify({"error": str(e)}), 400
+    keep = routes.simplify(latitudes, longitudes, tolerance)
+    latitudes, longitudes = latitudes[keep], longitudes[keep]
+
+    if output_format == "polyline":
+        return jsonify({
+            "polyline": routes.encode_polyline(latitudes, longitudes),
+            "points": len(latitudes),
+            "original_points": len(keep),
+        }), 200
+    return jsonify({
+        "type": "Feature",
+        "geometry": routes.geojson(latitudes, longitudes),
+        "properties": {"points": len(latitudes), "original_points": len(keep)},
+    }), 200
+
+
+@blueprint.route("/heatmap")
+@jwt_required
+def heatmap_cells():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        if any(name in request.args for name in ["south", "west", "north", "east"]):
+            bounds, _ = requested_area()
+        else:
+            bounds = (-90.0, -180.0, 90.0, 180.0)
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        level = int(request.args.get("level", 14))
+    except ValueError:
+        level = None
+    if level not in heatmap.LEVELS:
+        return jsonify({"error": "Level must be one of {}".format(", ".join(str(l) for l in heatmap.LEVELS))}), 400
+    kind = request.args.get("kind", "all")
+    if kind not in heatmap.KINDS:
+        return jsonify({"error": "Kind must be one of {}".format(", ".join(heatmap.KINDS))}), 400
+
+    latitudes, longitudes, counts = heatmap.cells(vehicle, level, kind, *bounds)
+
+    if request.args.get("format") == "binary":
+        cells = np.empty(len(counts), dtype=[("latitude", "<f4"), ("longitude", "<f4"), ("count", "<u4")])
+        cells["latitude"], cells["longitude"], cells["count"] = latitudes, longitudes, counts
+        return Response(cells.tobytes(), mimetype="application/octet-stream", headers={"X-Heatmap-Level": str(level)})
+    return jsonify({
+        "level": level,
+        "latitude": latitudes.tolist(),
+        "longitude": longitudes.tolist(),
+        "count": counts.tolist(),
+    }), 200
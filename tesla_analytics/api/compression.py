@@ -0,0 +1,108 @@
+import zlib
+from collections import namedtuple
+from typing import Iterable, Optional
+
+from flask import Flask, Response, request, current_app
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+DEFAULT_MIMETYPES = ["application/json", "application/octet-stream", "text/plain", "text/csv"]
+
+
+Compressor = namedtuple("Compressor", ["compress", "finish"])
+
+
+def _gzip(level: int) -> Compressor:
+    compressor = zlib.compressobj(min(max(level, 1), 9), zlib.DEFLATED, 31)
+    return Compressor(compressor.compress, compressor.flush)
+
+
+def _brotli(level: int) -> Compressor:
+    compressor = brotli.Compressor(quality=min(max(level, 0), 11))
+    return Compressor(compressor.process, compressor.finish)
+
+
+def _zstd(level: int) -> Compressor:
+    compressor = zstandard.ZstdCompressor(level=min(max(level, 1), 22)).compressobj()
+    return Compressor(compressor.compress, compressor.flush)
+
+
+def available_encodings() -> dict:
+    encodings = {}
+    if brotli is not None:
+        encodings["br"] = _brotli
+    if zstandard is not None:
+        encodings["zstd"] = _zstd
+    encodings["gzip"] = _gzip
+    return encodings
+
+
+def init_app(app: Flask):
+    app.config.setdefault("COMPRESS_LEVEL", 6)
+    app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+    app.config.setdefault("COMPRESS_MIMETYPES", DEFAULT_MIMETYPES)
+    app.after_request(compress_response)
+
+
+def negotiate(accept_encoding: str, encodings: Iterable[str]) -> Optional[str]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.strip().partition(";")
+        quality = 1.0
+        parameters = parameters.strip()
+        if parameters.startswith("q="):
+            try:
+                quality = float(parameters[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    candidates = [
+        (accepted.get(encoding, accepted.get("*", 0.0)), -index, encoding)
+        for index, encoding in enumerate(encodings)
+    ]
+    quality, _, encoding = max(candidates, default=(0.0, 0, None))
+    return encoding if quality > 0 else None
+
+
+def compress_response(response: Response) -> Response:
+    config = current_app.config
+    if response.status_code < 200 or response.status_code in (204, 304) or \
+            "Content-Encoding" in response.headers or \
+            response.direct_passthrough or \
+            response.mimetype not in config["COMPRESS_MIMETYPES"]:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encodings = available_encodings()
+    encoding = negotiate(request.headers.get("Accept-Encoding", ""), encodings)
+    if encoding is None:
+        return response
+
+    compressor = encodings[encoding](config["COMPRESS_LEVEL"])
+    if response.is_streamed:
+        response.response = _stream(response.response, compressor)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+        response.set_data(compressor.compress(data) + compressor.finish())
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def _stream(chunks: Iterable, compressor: Compressor):
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if compressed:
+            yield compressed
+    yield compressor.finish()
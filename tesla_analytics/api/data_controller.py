@@ -1,21 +1,26 @@
-from datetime import datetime
-from typing import List
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+from datetime import timedelta
+from math import cos, radians
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask_sqlalchemy import Pagination
-from sqlalchemy import desc
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from sqlalchemy import and_, desc, extract, func, or_, true, tuple_
+from sqlalchemy.orm import aliased
 
-from tesla_analytics.models import ChargeState, ClimateState, DriveState, VehicleState, User
+from tesla_analytics import encoding, frames, geo, live, sync
+from tesla_analytics.api.params import ParameterError, requested_user, requested_vehicle, requested_vehicles, \
+    requested_time_range, requested_cursors, requested_seconds, requested_area, encode_cursor, pagination_headers
+from tesla_analytics.models import db, ChargeState, ClimateState, DriveState, VehicleState, LatestState, Vehicle, \
+    STATE_MODELS, filter_by_time_range
 
 blueprint = Blueprint("DataController", __name__)
 
+MAX_TOLERANCE = 3600
+
 
 @blueprint.route("/vehicles")
 @jwt_required
 def vehicles():
-    user = User.query.filter_by(email=get_jwt_identity()).first()
+    user = requested_user()
     return jsonify([v.serialize() for v in user.vehicles])
 
 
@@ -43,65 +48,222 @@ def vehicle():
     return _fetch_data(VehicleState)
 
 
+@blueprint.route("/latest")
+@jwt_required
+def latest():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    latest_state = LatestState.query.get(vehicle.id)
+    if latest_state is None:
+        return jsonify({"error": "No data recorded for vehicle"}), 404
+    return jsonify(latest_state.serialize()), 200
+
+
+@blueprint.route("/live")
+@jwt_required
+def live_updates():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not live.listener.start():
+        return jsonify({"error": "Live updates are unavailable"}), 503
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    duration = current_app.config.get("LIVE_MAX_DURATION", live.MAX_DURATION)
+    return Response(stream_with_context(live.stream(vehicle, duration=duration)), mimetype="text/event-stream",
+                    headers=headers)
+
+
+@blueprint.route("/sync")
+@jwt_required
+def sync_changes():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        result = sync.changes(vehicle, request.args.get("token"), current_app.config.get("SYNC_LIMIT", sync.LIMIT))
+    except (ParameterError, sync.InvalidToken) as e:
+        return jsonify({"error": str(e)}), 400
+
+    return encoding.json_response(result, 200)
+
+
+@blueprint.route("/export/<state_type>")
+@jwt_required
+def export(state_type):
+    model = STATE_MODELS.get(state_type)
+    if model is None:
+        return jsonify({"error": "Unknown state type '{}'".format(state_type)}), 404
+
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        schema = frames.arrow_schema(model)
+    except frames.MissingDependency as e:
+        return jsonify({"error": str(e)}), 501
+
+    batches = frames.record_batches(model, vehicle, after=after, before=before)
+    return Response(stream_with_context(frames.ipc_stream(batches, schema)), mimetype=frames.MIMETYPE)
+
+
+@blueprint.route("/combined")
+@jwt_required
+def combined():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+        tolerance = requested_seconds("tolerance", 10, 0, MAX_TOLERANCE)
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    climate_state = _nearest_state(ClimateState, tolerance)
+    drive_state = _nearest_state(DriveState, tolerance)
+    vehicle_state = _nearest_state(VehicleState, tolerance)
+
+    query = db.session.query(ChargeState, climate_state, drive_state, vehicle_state) \
+        .select_from(ChargeState) \
+        .outerjoin(climate_state, true()) \
+        .outerjoin(drive_state, true()) \
+        .outerjoin(vehicle_state, true()) \
+        .filter(ChargeState.vehicle_id == vehicle.id)
+    query = filter_by_time_range(query, ChargeState.timestamp, after, before)
+    data = query.order_by(desc(ChargeState.timestamp)).paginate(per_page=50)
+    serialized = [_serialize_combined(*row) for row in data.items]
+
+    headers = {"Link": ", ".join(
+        pagination_headers(data)
+    )}
+
+    return jsonify(serialized), 200, headers
+
+
+@blueprint.route("/drive/area")
+@jwt_required
+def drive_area():
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+        (south, west, north, east), center = requested_area()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = DriveState.query.filter(
+        DriveState.vehicle_id == vehicle.id,
+        or_(*[DriveState.cell.between(low, high - 1) for low, high in geo.covering(south, west, north, east)]),
+        DriveState.latitude.between(south, north),
+        DriveState.longitude.between(west, east)
+    )
+    if center is not None:
+        latitude, longitude, radius = center
+        query = query.filter(
+            func.power((DriveState.latitude - latitude) * geo.METERS_PER_DEGREE, 2) +
+            func.power((DriveState.longitude - longitude) * geo.METERS_PER_DEGREE * cos(radians(latitude)), 2)
+            <= radius ** 2
+        )
+    if request.args.get("parked") == "true":
+        query = query.filter(or_(DriveState.shift_state.is_(None), DriveState.shift_state == "P"))
+    query = filter_by_time_range(query, DriveState.timestamp, after, before)
+    data = query.order_by(desc(DriveState.timestamp)).paginate(per_page=50)
+
+    headers = {"Link": ", ".join(
+        pagination_headers(data)
+    )}
+
+    return jsonify([state.serialize() for state in data.items]), 200, headers
+
+
+def _serialize_combined(charge_state, climate_state, drive_state, vehicle_state):
+    charge = charge_state.serialize()
+    return {
+        "timestamp": charge["timestamp"],
+        "charge": charge,
+        "climate": climate_state.serialize() if climate_state else None,
+        "drive": drive_state.serialize() if drive_state else None,
+        "vehicle": vehicle_state.serialize() if vehicle_state else None,
+    }
+
+
+def _nearest_state(model, tolerance: timedelta):
+    subquery = model.query.filter(
+        model.vehicle_id == ChargeState.vehicle_id,
+        model.timestamp.between(ChargeState.timestamp - tolerance, ChargeState.timestamp + tolerance)
+    ).order_by(
+        func.abs(extract("epoch", model.timestamp - ChargeState.timestamp))
+    ).limit(1).correlate(ChargeState).subquery().lateral()
+    return aliased(model, subquery)
+
+
 def _fetch_data(model):
-    user = User.query.filter_by(email=get_jwt_identity()).first()
-    vehicle_id = request.args.get("vehicle_id")
-    if not vehicle_id:
-        return jsonify({"error": "Missing required parameter 'vehicle_id'"}), 400
-    if vehicle_id not in [v.tesla_id for v in user.vehicles]:
-        return jsonify({"error": "Vehicle not found"}), 400
-
-    if "after" in request.args and "before" in request.args:
-        after = datetime.strptime(request.args["after"], "%Y-%m-%dT%H:%M:%S.%fZ")
-        before = datetime.strptime(request.args["before"], "%Y-%m-%dT%H:%M:%S.%fZ")
-        if before < after:
-            return jsonify({"error": "Before must be earlier than after"}), 400
-        query = model.query.filter(model.timestamp.between(after, before))
-    elif "after" in request.args:
-        after = datetime.strptime(request.args["after"], "%Y-%m-%dT%H:%M:%S.%fZ")
-        query = model.query.filter(model.timestamp > after)
-    elif "before" in request.args:
-        before = datetime.strptime(request.args["before"], "%Y-%m-%dT%H:%M:%S.%fZ")
-        query = model.query.filter(model.timestamp < before)
-    else:
-        query = model.query
+    user = requested_user()
+    if "vehicle_ids" in request.args:
+        return _fetch_batch(model, user)
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
 
+    query = model.query.with_entities(*encoding.serialized_columns(model)).filter(model.vehicle_id == vehicle.id)
+    query = filter_by_time_range(query, model.timestamp, after, before)
     data = query.order_by(desc(model.timestamp)).paginate(per_page=50)
-    serialized = [model.serialize() for model in data.items]
 
     headers = {"Link": ", ".join(
-        _pagination_headers(data)
+        pagination_headers(data)
     )}
 
-    return jsonify(serialized), 200, headers
+    return encoding.json_response(encoding.serialize_rows(model, data.items), 200, headers)
+
+
+def _fetch_batch(model, user):
+    try:
+        vehicles = requested_vehicles(user)
+        after, before = requested_time_range()
+        cursors = requested_cursors(vehicles)
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    per_vehicle = 50
+    states = model.query.with_entities(model.id, *encoding.serialized_columns(model)) \
+        .filter(model.vehicle_id == Vehicle.id)
+    states = filter_by_time_range(states, model.timestamp, after, before)
+    if cursors:
+        states = states.filter(or_(Vehicle.id.notin_(list(cursors)), *[
+            and_(Vehicle.id == vehicle_id, tuple_(model.timestamp, model.id) < cursor)
+            for vehicle_id, cursor in cursors.items()
+        ]))
+    states = states.order_by(desc(model.timestamp), desc(model.id)).limit(per_vehicle + 1) \
+        .correlate(Vehicle).subquery().lateral()
+
+    rows = db.session.query(Vehicle.tesla_id, *states.c) \
+        .select_from(Vehicle) \
+        .join(states, true()) \
+        .filter(Vehicle.id.in_([vehicle.id for vehicle in vehicles])) \
+        .order_by(Vehicle.id, desc(states.c.timestamp), desc(states.c.id)) \
+        .all()
 
+    grouped = {vehicle.tesla_id: [] for vehicle in vehicles}
+    for row in rows:
+        grouped[row[0]].append(row[1:])
 
-def _pagination_headers(data: Pagination) -> List[str]:
-    url = _url_without_pagination(request.url)
-    items = []
-    if data.has_prev:
-        items.append("<{link}page={prev}>; rel=\"prev\"".format(
-            link=url, prev=data.prev_num
-        ))
-    if data.has_next:
-        items.append("<{link}page={next}>; rel=\"next\"".format(
-            link=url, next=data.next_num
-        ))
-        items.append("<{link}page={last}>; rel=\"last\"".format(
-            link=url, last=data.pages
-        ))
-    if data.has_prev:
-        items.append("<{link}page=1>; rel=\"first\"".format(
-            link=url
-        ))
-    return items
-
-
-def _url_without_pagination(url: str) -> str:
-    parsed_url = urlparse(url)
-    query = parse_qs(parsed_url.query)
-    query.pop('size', None)
-    query.pop('page', None)
-    connector = '&' if query else '?'
-    parsed_url = parsed_url._replace(query=urlencode(query, True))
-    return '{0}{1}'.format(urlunparse(parsed_url), connector)
+    result = {}
+    for tesla_id, vehicle_rows in grouped.items():
+        page = vehicle_rows[:per_vehicle]
+        has_more = len(vehicle_rows) > per_vehicle
+        result[tesla_id] = {
+            "items": encoding.serialize_rows(model, [row[1:] for row in page]),
+            "cursor": encode_cursor(tesla_id, page[-1][2], page[-1][0]) if has_more else None,
+        }
+    return encoding.json_response(result, 200)
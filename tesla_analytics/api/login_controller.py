@@ -1,7 +1,7 @@
-import bcrypt
 from flask import request, jsonify, Blueprint
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_refresh_token_required, get_jwt_identity
 
+from tesla_analytics import passwords
 from tesla_analytics.models import User
 
 blueprint = Blueprint("LoginController", __name__)
@@ -20,14 +20,27 @@ def login():
     if not password:
         return jsonify({"error": "Missing required parameter 'password'"}), 400
 
-    user = User.query.filter_by(email=email).first()
-    if not user:
-        return jsonify({"error": "Wrong email or password"}), 401
-
-    if bcrypt.checkpw(password.encode("utf-8"), bytes(user.password_hash, "utf-8")):
+    limits = passwords.login_limits(email, request.remote_addr)
+    (email_key, _), (address_key, _) = limits
+    try:
+        attempted_at = passwords.throttle.attempt(limits)
+    except passwords.Throttled as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": str(e.retry_after)}
+
+    try:
+        user = User.query.filter_by(email=email).first()
+        verified = user is not None and passwords.verifier.verify(password, user.password_hash)
+    except passwords.Saturated as e:
+        passwords.throttle.forgive(attempted_at, email_key, address_key)
+        return jsonify({"error": str(e)}), 429, {"Retry-After": "1"}
+
+    if verified:
+        passwords.throttle.forgive(attempted_at, address_key)
+        passwords.throttle.reset(email_key)
         access_token = create_access_token(identity=email)
         refresh_token = create_refresh_token(identity=email)
         return jsonify(access_token=access_token, refresh_token=refresh_token), 200
+
     return jsonify({"error": "Wrong email or password"}), 401
 
 
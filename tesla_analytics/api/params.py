@@ -0,0 +1,145 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+from flask import request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy import Pagination
+
+from tesla_analytics import geo
+from tesla_analytics.models import User, Vehicle
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+class ParameterError(Exception):
+    pass
+
+
+def requested_user() -> User:
+    return User.query.filter_by(email=get_jwt_identity()).first()
+
+
+def requested_vehicle(user: User) -> Vehicle:
+    vehicle_id = request.args.get("vehicle_id")
+    if not vehicle_id:
+        raise ParameterError("Missing required parameter 'vehicle_id'")
+    for vehicle in user.vehicles:
+        if vehicle.tesla_id == vehicle_id:
+            return vehicle
+    raise ParameterError("Vehicle not found")
+
+
+def requested_vehicles(user: User) -> List[Vehicle]:
+    vehicle_ids = request.args.get("vehicle_ids")
+    if not vehicle_ids:
+        raise ParameterError("Missing required parameter 'vehicle_ids'")
+    if vehicle_ids == "all":
+        return list(user.vehicles)
+    vehicles = {vehicle.tesla_id: vehicle for vehicle in user.vehicles}
+    requested = []
+    for vehicle_id in vehicle_ids.split(","):
+        if vehicle_id not in vehicles:
+            raise ParameterError("Vehicle '{}' not found".format(vehicle_id))
+        if vehicles[vehicle_id] not in requested:
+            requested.append(vehicles[vehicle_id])
+    return requested
+
+
+def requested_time_range() -> Tuple[Optional[datetime], Optional[datetime]]:
+    after = parse_timestamp(request.args["after"]) if "after" in request.args else None
+    before = parse_timestamp(request.args["before"]) if "before" in request.args else None
+    if after is not None and before is not None and before < after:
+        raise ParameterError("Before must be earlier than after")
+    return after, before
+
+
+def requested_cursors(vehicles: List[Vehicle]) -> Dict[int, Tuple[datetime, int]]:
+    vehicle_ids = {vehicle.tesla_id: vehicle.id for vehicle in vehicles}
+    cursors = {}
+    for value in request.args.getlist("cursor"):
+        tesla_id, _, position = value.partition(":")
+        timestamp, _, row_id = position.rpartition("_")
+        try:
+            cursor = datetime.strptime(timestamp, TIMESTAMP_FORMAT), int(row_id)
+        except ValueError:
+            raise ParameterError("Invalid cursor '{}'".format(value))
+        if tesla_id not in vehicle_ids:
+            raise ParameterError("Cursor '{}' is not for a requested vehicle".format(value))
+        cursors[vehicle_ids[tesla_id]] = cursor
+    return cursors
+
+
+def encode_cursor(tesla_id: str, timestamp: datetime, row_id: int) -> str:
+    return "{}:{}_{}".format(tesla_id, timestamp.strftime(TIMESTAMP_FORMAT), row_id)
+
+
+def requested_seconds(name: str, default: int, minimum: int, maximum: int) -> timedelta:
+    try:
+        seconds = int(request.args.get(name, default))
+    except ValueError:
+        raise ParameterError("'{}' must be a number of seconds".format(name))
+    if not minimum <= seconds <= maximum:
+        raise ParameterError("'{}' must be between {} and {} seconds".format(name, minimum, maximum))
+    return timedelta(seconds=seconds)
+
+
+def requested_area():
+    try:
+        if all(name in request.args for name in ["latitude", "longitude", "radius"]):
+            center = tuple(float(request.args[name]) for name in ["latitude", "longitude", "radius"])
+            if not all(math.isfinite(value) for value in center):
+                raise ParameterError("Area parameters must be finite numbers")
+            if center[2] <= 0:
+                raise ParameterError("Radius must be positive")
+            return geo.bounding_box(*center), center
+        if all(name in request.args for name in ["south", "west", "north", "east"]):
+            bounds = tuple(float(request.args[name]) for name in ["south", "west", "north", "east"])
+            if not all(math.isfinite(value) for value in bounds):
+                raise ParameterError("Area parameters must be finite numbers")
+            if bounds[0] > bounds[2] or bounds[1] > bounds[3]:
+                raise ParameterError("South and west must be less than north and east")
+            return bounds, None
+    except ValueError:
+        raise ParameterError("Area parameters must be numbers")
+    raise ParameterError("Missing required parameters 'south', 'west', 'north', 'east' or "
+                         "'latitude', 'longitude', 'radius'")
+
+
+def parse_timestamp(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+    except ValueError:
+        raise ParameterError("Invalid timestamp '{}'".format(value))
+
+
+def pagination_headers(data: Pagination) -> List[str]:
+    url = url_without_pagination(request.url)
+    items = []
+    if data.has_prev:
+        items.append("<{link}page={prev}>; rel=\"prev\"".format(
+            link=url, prev=data.prev_num
+        ))
+    if data.has_next:
+        items.append("<{link}page={next}>; rel=\"next\"".format(
+            link=url, next=data.next_num
+        ))
+        items.append("<{link}page={last}>; rel=\"last\"".format(
+            link=url, last=data.pages
+        ))
+    if data.has_prev:
+        items.append("<{link}page=1>; rel=\"first\"".format(
+            link=url
+        ))
+    return items
+
+
+def url_without_pagination(url: str) -> str:
+    parsed_url = urlparse(url)
+    query = parse_qs(parsed_url.query)
+    query.pop('size', None)
+    query.pop('page', None)
+    connector = '&' if query else '?'
+    parsed_url = parsed_url._replace(query=urlencode(query, True))
+    return '{0}{1}'.format(urlunparse(parsed_url), connector)
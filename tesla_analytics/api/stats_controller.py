@@ -0,0 +1,82 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+
+from tesla_analytics import resampling, stats
+from tesla_analytics.api.params import ParameterError, requested_user, requested_vehicle, requested_time_range, \
+    requested_seconds
+from tesla_analytics.models import STATE_MODELS
+
+blueprint = Blueprint("StatsController", __name__)
+
+
+@blueprint.route("/stats/<state_type>")
+@jwt_required
+def bucketed_stats(state_type):
+    model = STATE_MODELS.get(state_type)
+    if model is None:
+        return jsonify({"error": "Unknown state type '{}'".format(state_type)}), 404
+
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if "fields" not in request.args:
+        return jsonify({"error": "Missing required parameter 'fields'"}), 400
+
+    try:
+        fields = stats.parse_fields(request.args["fields"])
+        result = stats.bucketed(
+            model,
+            vehicle,
+            request.args.get("bucket", "hour"),
+            fields,
+            after=after,
+            before=before
+        )
+    except stats.InvalidAggregation as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(result), 200
+
+
+@blueprint.route("/resample/<state_type>")
+@jwt_required
+def resampled(state_type):
+    model = STATE_MODELS.get(state_type)
+    if model is None:
+        return jsonify({"error": "Unknown state type '{}'".format(state_type)}), 404
+
+    user = requested_user()
+    try:
+        vehicle = requested_vehicle(user)
+        after, before = requested_time_range()
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if "fields" not in request.args:
+        return jsonify({"error": "Missing required parameter 'fields'"}), 400
+
+    try:
+        interval = requested_seconds("interval", 60, 1, resampling.MAX_INTERVAL)
+        max_gap = requested_seconds("max_gap", 600, 0, resampling.MAX_INTERVAL)
+    except ParameterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        result = resampling.resample(
+            model,
+            vehicle,
+            [field.strip() for field in request.args["fields"].split(",")],
+            interval,
+            fill=request.args.get("fill", "previous"),
+            max_gap=max_gap,
+            after=after,
+            before=before
+        )
+    except (resampling.InvalidResample, stats.InvalidAggregation) as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(result), 200
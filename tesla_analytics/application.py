@@ -1,18 +1,41 @@
 import os
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DB_URL")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+}
 app.config['JWT_SECRET_KEY'] = os.getenv("JWT_SECRET", "test")
+app.config['COMPRESS_LEVEL'] = int(os.getenv("COMPRESS_LEVEL", 6))
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv("COMPRESS_MIN_SIZE", 500))
+app.config['LOGIN_WORKERS'] = int(os.getenv("LOGIN_WORKERS", 2))
+app.config['LOGIN_MAX_PENDING'] = int(os.getenv("LOGIN_MAX_PENDING", 8))
+app.config['SYNC_LIMIT'] = int(os.getenv("SYNC_LIMIT", 500))
+app.config['TRUSTED_PROXIES'] = int(os.getenv("TRUSTED_PROXIES", 0))
+app.config['ROUTE_MAX_POINTS'] = int(os.getenv("ROUTE_MAX_POINTS", 200000))
+app.config['LIVE_MAX_DURATION'] = int(os.getenv("LIVE_MAX_DURATION", 300))
 
 
 def app_factory():
-    from tesla_analytics.api import data_controller, login_controller
-    from tesla_analytics.api import jwt
+    from tesla_analytics.api import data_controller, login_controller, stats_controller, analytics_controller
+    from tesla_analytics.api import compression, jwt
 
     app.register_blueprint(data_controller.blueprint, url_prefix="/api")
     app.register_blueprint(login_controller.blueprint, url_prefix="/api")
+    app.register_blueprint(stats_controller.blueprint, url_prefix="/api")
+    app.register_blueprint(analytics_controller.blueprint, url_prefix="/api")
     jwt.init_app(app)
+    compression.init_app(app)
+    trust_proxies(app)
     return app
+
+
+def trust_proxies(flask_app: Flask):
+    proxies = flask_app.config.get("TRUSTED_PROXIES", 0)
+    if proxies and not isinstance(flask_app.wsgi_app, ProxyFix):
+        flask_app.wsgi_app = ProxyFix(flask_app.wsgi_app, x_for=proxies)
@@ -0,0 +1,149 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from tesla_analytics import history
+from tesla_analytics.charging import CHARGING_STATE, MAX_GAP
+from tesla_analytics.models import db, Vehicle, ChargeState, BatteryDay
+
+MIN_BATTERY_LEVEL = 20
+MIN_LEVEL_GAIN = 10
+TREND_FIELDS = ["estimated_range", "estimated_ideal_range", "estimated_capacity"]
+
+
+class DayTotals(object):
+    def __init__(self):
+        self.ranges = []
+        self.ideal_ranges = []
+        self.energy_added = 0.0
+        self.level_gained = 0.0
+
+    def row(self, vehicle: Vehicle, day: date) -> dict:
+        ranges = np.concatenate(self.ranges) if self.ranges else np.empty(0)
+        ideal_ranges = np.concatenate(self.ideal_ranges) if self.ideal_ranges else np.empty(0)
+        return {
+            "vehicle_id": vehicle.id,
+            "day": day,
+            "samples": len(ranges),
+            "estimated_range": _median(ranges),
+            "estimated_ideal_range": _median(ideal_ranges),
+            "estimated_capacity": float(self.energy_added / self.level_gained * 100)
+            if self.level_gained >= MIN_LEVEL_GAIN else None,
+        }
+
+
+def update(vehicle: Vehicle, chunk_size: int = history.CHUNK_SIZE, today: date = None) -> int:
+    today = today or datetime.now().date()
+    last_day = db.session.query(func.max(BatteryDay.day)).filter(BatteryDay.vehicle_id == vehicle.id).scalar()
+    start = datetime.combine(last_day + timedelta(days=1), time()) if last_day is not None else None
+    end = datetime.combine(today, time())
+    if start is not None and start >= end:
+        return 0
+
+    previous = None
+    if start is not None:
+        previous = db.session.query(ChargeState.timestamp, ChargeState.data, ChargeState.id).filter(
+            ChargeState.vehicle_id == vehicle.id,
+            ChargeState.timestamp < start
+        ).order_by(ChargeState.timestamp.desc(), ChargeState.id.desc()).first()
+
+    pending = {}
+    count = 0
+    for rows in history.chunks(ChargeState, vehicle, ChargeState.data, chunk_size=chunk_size,
+                               after=start, before=end, inclusive="after"):
+        _accumulate(pending, rows, previous)
+        previous = rows[-1]
+        last_day = rows[-1][0].date()
+        count += _store(vehicle, {day: totals for day, totals in pending.items() if day < last_day})
+        pending = {day: totals for day, totals in pending.items() if day >= last_day}
+    count += _store(vehicle, pending)
+    db.session.commit()
+    return count
+
+
+def rebuild(vehicle: Vehicle, chunk_size: int = history.CHUNK_SIZE, today: date = None) -> int:
+    BatteryDay.query.filter_by(vehicle_id=vehicle.id).delete()
+    return update(vehicle, chunk_size=chunk_size, today=today)
+
+
+def _accumulate(pending: Dict[date, DayTotals], rows: Sequence, previous=None):
+    timestamps = [row[0] for row in rows]
+    data = [row[1] for row in rows]
+    levels = np.array([item.get("battery_level") for item in data], dtype=float)
+    ranges = np.array([item.get("battery_range") for item in data], dtype=float)
+    ideal_ranges = np.array([item.get("ideal_battery_range") for item in data], dtype=float)
+    energies = np.array([item.get("charge_energy_added") for item in data], dtype=float)
+    charging = np.array([item.get("charging_state") == CHARGING_STATE for item in data], dtype=bool)
+
+    previous_data = previous[1] if previous is not None else {}
+    seconds = history.seconds(timestamps)
+    elapsed = seconds - history.shifted(seconds, history.seconds_of(previous[0]) if previous is not None else np.nan)
+    level_gains = levels - history.shifted(levels, history.float_or_nan(previous_data.get("battery_level")))
+    energy_gains = energies - history.shifted(energies, history.float_or_nan(previous_data.get("charge_energy_added")))
+    paired = charging & history.shifted(charging, previous_data.get("charging_state") == CHARGING_STATE) & \
+        (elapsed <= MAX_GAP.total_seconds()) & (level_gains >= 0) & (energy_gains >= 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        reliable = levels >= MIN_BATTERY_LEVEL
+        full_ranges = np.where(reliable, ranges / levels * 100, np.nan)
+        full_ideal_ranges = np.where(reliable, ideal_ranges / levels * 100, np.nan)
+
+    days = np.array(timestamps, dtype="datetime64[D]")
+    unique_days, labels = np.unique(days, return_inverse=True)
+    for label, day in enumerate(unique_days.tolist()):
+        in_day = labels == label
+        totals = pending.setdefault(day, DayTotals())
+        day_ranges = full_ranges[in_day]
+        day_ideal_ranges = full_ideal_ranges[in_day]
+        totals.ranges.append(day_ranges[~np.isnan(day_ranges)])
+        totals.ideal_ranges.append(day_ideal_ranges[~np.isnan(day_ideal_ranges)])
+        day_pairs = paired[in_day]
+        totals.energy_added += float(energy_gains[in_day][day_pairs].sum())
+        totals.level_gained += float(level_gains[in_day][day_pairs].sum())
+
+
+def _store(vehicle: Vehicle, totals: Dict[date, DayTotals]) -> int:
+    rows = [day_totals.row(vehicle, day) for day, day_totals in sorted(totals.items())]
+    rows = [row for row in rows if row["samples"] > 0 or row["estimated_capacity"] is not None]
+    if not rows:
+        return 0
+    statement = insert(BatteryDay.__table__).values(rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[BatteryDay.vehicle_id, BatteryDay.day],
+        set_={name: statement.excluded[name] for name in ["samples", *TREND_FIELDS]}
+    ))
+    return len(rows)
+
+
+def days(vehicle: Vehicle, after: date = None, before: date = None) -> List[BatteryDay]:
+    query = BatteryDay.query.filter_by(vehicle_id=vehicle.id)
+    if after is not None:
+        query = query.filter(BatteryDay.day >= after)
+    if before is not None:
+        query = query.filter(BatteryDay.day <= before)
+    return query.order_by(BatteryDay.day).all()
+
+
+def trend(battery_days: List[BatteryDay], field: str) -> Optional[dict]:
+    points = [(day.day, getattr(day, field)) for day in battery_days if getattr(day, field) is not None]
+    if len(points) < 2:
+        return None
+    elapsed = np.array([(day - points[0][0]).days for day, _ in points], dtype=float)
+    values = np.array([value for _, value in points], dtype=float)
+    if elapsed[-1] == 0:
+        return None
+    slope, intercept = np.polyfit(elapsed, values, 1)
+    current = intercept + slope * elapsed[-1]
+    return {
+        "start": float(intercept),
+        "current": float(current),
+        "per_year": float(slope * 365.25),
+        "change_percent": float((current - intercept) / intercept * 100) if intercept else None,
+    }
+
+
+def _median(values: np.ndarray):
+    return float(np.median(values)) if len(values) else None
@@ -0,0 +1,106 @@
+from datetime import timedelta, datetime
+from typing import List, Sequence
+
+import numpy as np
+from sqlalchemy import extract, func
+
+from tesla_analytics import history
+from tesla_analytics.models import db, Vehicle, ChargeState, ChargingSession, DriveState, filter_by_time_range
+
+CHARGING_STATE = "Charging"
+MAX_GAP = timedelta(minutes=15)
+LOCATION_TOLERANCE = timedelta(minutes=10)
+
+
+def record(vehicle: Vehicle, charge_state: ChargeState):
+    open_session = ChargingSession.query.filter_by(vehicle_id=vehicle.id, in_progress=True).first()
+    db.session.add_all(segment(vehicle, [(charge_state.timestamp, charge_state.data)], open_session))
+
+
+def rebuild(vehicle: Vehicle, chunk_size: int = history.CHUNK_SIZE) -> int:
+    ChargingSession.query.filter_by(vehicle_id=vehicle.id).delete()
+
+    open_session = None
+    count = 0
+    for rows in history.chunks(ChargeState, vehicle, ChargeState.data, chunk_size=chunk_size):
+        sessions = segment(vehicle, rows, open_session)
+        db.session.add_all(sessions)
+        count += len(sessions) - (1 if open_session is not None else 0)
+        open_session = sessions[-1] if sessions and sessions[-1].in_progress else None
+    db.session.commit()
+    return count
+
+
+def segment(vehicle: Vehicle, rows: Sequence, open_session: ChargingSession = None) -> List[ChargingSession]:
+    timestamps = [row[0] for row in rows]
+    data = [row[1] for row in rows]
+    charging = np.array([item.get("charging_state") == CHARGING_STATE for item in data], dtype=bool)
+    energies = np.array([item.get("charge_energy_added") for item in data], dtype=float)
+    powers = np.array([item.get("charger_power") for item in data], dtype=float)
+    battery_levels = np.array([item.get("battery_level") for item in data], dtype=float)
+
+    segments = history.runs(
+        history.seconds(timestamps),
+        charging,
+        MAX_GAP,
+        open_session.end_time if open_session is not None else None
+    )
+
+    sessions = [open_session] if open_session is not None else []
+    for index in np.flatnonzero(segments.starts):
+        latitude, longitude = nearest_location(vehicle, timestamps[index])
+        sessions.append(ChargingSession(
+            vehicle=vehicle,
+            start_time=timestamps[index],
+            start_battery_level=history.optional_float(battery_levels[index]),
+            latitude=latitude,
+            longitude=longitude,
+        ))
+
+    member_labels = segments.labels[segments.members]
+    peak_energies = np.array([history.float_or_nan(session.energy_added) for session in sessions], dtype=float)
+    peak_powers = np.array([history.float_or_nan(session.peak_power) for session in sessions], dtype=float)
+    np.fmax.at(peak_energies, member_labels, energies[segments.members])
+    np.fmax.at(peak_powers, member_labels, powers[segments.members])
+
+    for label, session in enumerate(sessions):
+        session.energy_added = history.optional_float(peak_energies[label])
+        session.peak_power = history.optional_float(peak_powers[label])
+        last_index = segments.last_indexes[label]
+        if last_index < 0:
+            session.in_progress = False
+            continue
+        session.end_time = timestamps[last_index]
+        session.end_battery_level = history.optional_float(battery_levels[last_index])
+        session.in_progress = bool(last_index == len(timestamps) - 1 and charging[last_index])
+    return sessions
+
+
+def nearest_location(vehicle: Vehicle, timestamp: datetime):
+    with db.session.no_autoflush:
+        location = db.session.query(DriveState.latitude, DriveState.longitude).filter(
+            DriveState.vehicle_id == vehicle.id,
+            DriveState.timestamp.between(timestamp - LOCATION_TOLERANCE, timestamp + LOCATION_TOLERANCE)
+        ).order_by(
+            func.abs(extract("epoch", DriveState.timestamp - timestamp))
+        ).first()
+    return location if location is not None else (None, None)
+
+
+def summary(vehicle: Vehicle, bucket: str, after: datetime = None, before: datetime = None) -> List[dict]:
+    bucket_column = func.date_trunc(bucket, ChargingSession.start_time).label("bucket")
+    query = db.session.query(
+        bucket_column,
+        func.count(ChargingSession.id),
+        func.coalesce(func.sum(ChargingSession.energy_added), 0.0),
+        func.sum(extract("epoch", ChargingSession.end_time - ChargingSession.start_time)),
+    ).filter(ChargingSession.vehicle_id == vehicle.id)
+    query = filter_by_time_range(query, ChargingSession.start_time, after, before)
+    return [
+        {
+            "timestamp": start.isoformat() + "Z",
+            "sessions": sessions,
+            "energy_added": float(energy_added),
+            "duration": float(duration),
+        } for start, sessions, energy_added, duration in query.group_by(bucket_column).order_by(bucket_column)
+    ]
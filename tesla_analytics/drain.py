@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Interval, cast, extract, func, literal
+
+from tesla_analytics import history
+from tesla_analytics.models import db, Vehicle, ChargeState, DriveState, IdlePeriod, filter_by_time_range
+
+DISCONNECTED = "Disconnected"
+PARKED_SHIFT_STATES = [None, "P"]
+MAX_GAP = timedelta(hours=6)
+SHIFT_STATE_TOLERANCE = timedelta(minutes=10)
+
+
+def record(vehicle: Vehicle, charge_state: ChargeState, drive_state: DriveState = None):
+    if drive_state is None:
+        return
+    open_period = IdlePeriod.query.filter_by(vehicle_id=vehicle.id, in_progress=True).first()
+    rows = [(charge_state.timestamp, charge_state.data)]
+    db.session.add_all(segment(vehicle, rows, np.array([drive_state.shift_state], dtype=object), open_period))
+
+
+def rebuild(vehicle: Vehicle, chunk_size: int = history.CHUNK_SIZE) -> int:
+    IdlePeriod.query.filter_by(vehicle_id=vehicle.id).delete()
+
+    open_period = None
+    count = 0
+    for rows in history.chunks(ChargeState, vehicle, ChargeState.data, chunk_size=chunk_size):
+        states, known = shift_states(vehicle, [row[0] for row in rows])
+        rows = [row for row, found in zip(rows, known) if found]
+        if not rows:
+            continue
+        periods = segment(vehicle, rows, states[known], open_period)
+        db.session.add_all(periods)
+        count += len(periods) - (1 if open_period is not None else 0)
+        open_period = periods[-1] if periods and periods[-1].in_progress else None
+    db.session.commit()
+    return count
+
+
+def segment(vehicle: Vehicle, rows: Sequence, shift_states: np.ndarray,
+            open_period: IdlePeriod = None) -> List[IdlePeriod]:
+    timestamps = [row[0] for row in rows]
+    data = [row[1] for row in rows]
+    disconnected = np.array([item.get("charging_state") == DISCONNECTED for item in data], dtype=bool)
+    idle = disconnected & np.isin(shift_states, PARKED_SHIFT_STATES)
+    battery_levels = np.array([item.get("battery_level") for item in data], dtype=float)
+    ranges = np.array([item.get("battery_range") for item in data], dtype=float)
+
+    segments = history.runs(
+        history.seconds(timestamps),
+        idle,
+        MAX_GAP,
+        open_period.end_time if open_period is not None else None
+    )
+
+    periods = [open_period] if open_period is not None else []
+    for index in np.flatnonzero(segments.starts):
+        periods.append(IdlePeriod(
+            vehicle=vehicle,
+            start_time=timestamps[index],
+            start_battery_level=history.optional_float(battery_levels[index]),
+            start_range=history.optional_float(ranges[index]),
+        ))
+
+    members = segments.members & idle
+    last_indexes = np.full(len(periods), -1)
+    np.maximum.at(last_indexes, segments.labels[members], np.flatnonzero(members))
+
+    for label, period in enumerate(periods):
+        last_index = last_indexes[label]
+        if last_index < 0:
+            period.in_progress = False
+            continue
+        period.end_time = timestamps[last_index]
+        period.end_battery_level = history.optional_float(battery_levels[last_index])
+        period.end_range = history.optional_float(ranges[last_index])
+        period.in_progress = bool(last_index == len(timestamps) - 1)
+    return periods
+
+
+def shift_states(vehicle: Vehicle, timestamps: List[datetime]) -> Tuple[np.ndarray, np.ndarray]:
+    rows = db.session.query(DriveState.timestamp, DriveState.shift_state).filter(
+        DriveState.vehicle_id == vehicle.id,
+        DriveState.timestamp.between(timestamps[0] - SHIFT_STATE_TOLERANCE, timestamps[-1] + SHIFT_STATE_TOLERANCE)
+    ).order_by(DriveState.timestamp).all()
+    states = np.full(len(timestamps), None, dtype=object)
+    if not rows:
+        return states, np.zeros(len(timestamps), dtype=bool)
+
+    drive_seconds = history.seconds([row[0] for row in rows])
+    drive_shift_states = np.array([row[1] for row in rows], dtype=object)
+    seconds = history.seconds(timestamps)
+    after = np.minimum(np.searchsorted(drive_seconds, seconds), len(rows) - 1)
+    before = np.maximum(after - 1, 0)
+    nearest = np.where(
+        np.abs(drive_seconds[before] - seconds) < np.abs(drive_seconds[after] - seconds), before, after
+    )
+    found = np.abs(drive_seconds[nearest] - seconds) <= SHIFT_STATE_TOLERANCE.total_seconds()
+    states[found] = drive_shift_states[nearest[found]]
+    return states, found
+
+
+def summary(vehicle: Vehicle, bucket: str, after: datetime = None, before: datetime = None) -> List[dict]:
+    pieces = db.session.query(
+        IdlePeriod.id.label("period_id"),
+        IdlePeriod.start_time.label("start_time"),
+        IdlePeriod.end_time.label("end_time"),
+        extract("epoch", IdlePeriod.end_time - IdlePeriod.start_time).label("duration"),
+        (IdlePeriod.start_battery_level - IdlePeriod.end_battery_level).label("level_lost"),
+        (IdlePeriod.start_range - IdlePeriod.end_range).label("range_lost"),
+        func.generate_series(
+            func.date_trunc(bucket, IdlePeriod.start_time), IdlePeriod.end_time, cast(literal("1 " + bucket), Interval)
+        ).label("bucket"),
+    ).filter(
+        IdlePeriod.vehicle_id == vehicle.id,
+        IdlePeriod.end_time > IdlePeriod.start_time,
+        IdlePeriod.start_battery_level.isnot(None),
+        IdlePeriod.end_battery_level.isnot(None),
+    )
+    pieces = filter_by_time_range(pieces, IdlePeriod.start_time, after, before).subquery()
+
+    overlap = extract("epoch", func.least(pieces.c.end_time, pieces.c.bucket + cast(literal("1 " + bucket), Interval))
+                      - func.greatest(pieces.c.start_time, pieces.c.bucket))
+    share = overlap / pieces.c.duration
+    query = db.session.query(
+        pieces.c.bucket,
+        func.count(pieces.c.period_id),
+        func.sum(overlap),
+        func.sum(pieces.c.level_lost * share),
+        func.coalesce(func.sum(pieces.c.range_lost * share), 0.0),
+    ).filter(overlap > 0)
+    return [
+        {
+            "timestamp": start.isoformat() + "Z",
+            "periods": periods,
+            "duration": float(total_duration),
+            "level_lost": float(level_lost),
+            "range_lost": float(range_lost),
+            "drain_rate": float(level_lost) / float(total_duration) * 86400,
+        } for start, periods, total_duration, level_lost, range_lost
+        in query.group_by(pieces.c.bucket).order_by(pieces.c.bucket)
+    ]
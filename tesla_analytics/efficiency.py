@@ -0,0 +1,150 @@
+from datetime import date, datetime, timedelta
+from typing import List, Sequence
+
+import numpy as np
+from sqlalchemy import Float, cast, func
+from sqlalchemy.dialects.postgresql import insert
+
+from tesla_analytics import history
+from tesla_analytics.geo import haversine
+from tesla_analytics.models import db, Vehicle, DriveState, ClimateState, EfficiencyBucket
+from tesla_analytics.trips import DRIVING_SHIFT_STATES, MAX_GAP
+
+SPEED_BUCKET = 10
+TEMPERATURE_BUCKET = 5
+UNKNOWN_TEMPERATURE = -1000
+TEMPERATURE_TOLERANCE = timedelta(minutes=10)
+GROUPS = ["day", "speed", "temperature"]
+COLUMNS = [DriveState.latitude, DriveState.longitude, DriveState.power, DriveState.speed, DriveState.shift_state]
+
+
+def record(vehicle: Vehicle, drive_state: DriveState):
+    previous = db.session.query(DriveState.timestamp, *COLUMNS, DriveState.id).filter(
+        DriveState.vehicle_id == vehicle.id,
+        DriveState.timestamp < drive_state.timestamp
+    ).order_by(DriveState.timestamp.desc(), DriveState.id.desc()).first()
+    if previous is None:
+        return
+    row = (drive_state.timestamp, drive_state.latitude, drive_state.longitude, drive_state.power,
+           drive_state.speed, drive_state.shift_state)
+    _increment(vehicle, [row], previous)
+
+
+def rebuild(vehicle: Vehicle, chunk_size: int = history.CHUNK_SIZE) -> int:
+    EfficiencyBucket.query.filter_by(vehicle_id=vehicle.id).delete()
+
+    previous = None
+    count = 0
+    for rows in history.chunks(DriveState, vehicle, *COLUMNS, chunk_size=chunk_size):
+        count += _increment(vehicle, rows, previous)
+        previous = rows[-1]
+    db.session.commit()
+    return count
+
+
+def _increment(vehicle: Vehicle, rows: Sequence, previous=None) -> int:
+    timestamps, latitudes, longitudes, powers, speeds, shift_states = (list(column) for column in list(zip(*rows))[:6])
+    latitudes = np.array(latitudes, dtype=float)
+    longitudes = np.array(longitudes, dtype=float)
+    powers = np.nan_to_num(np.array(powers, dtype=float))
+    speeds = np.nan_to_num(np.array(speeds, dtype=float))
+    driving = np.isin(np.array(shift_states, dtype=object), DRIVING_SHIFT_STATES)
+
+    seconds = history.seconds(timestamps)
+    elapsed = seconds - history.shifted(seconds, history.seconds_of(previous[0]) if previous is not None else np.nan)
+    previous_driving = history.shifted(driving, previous is not None and previous[5] in DRIVING_SHIFT_STATES)
+    connected = previous_driving & (elapsed <= MAX_GAP.total_seconds())
+    if not connected.any():
+        return 0
+
+    previous_latitude, previous_longitude = previous[1:3] if previous is not None else (None, None)
+    previous_latitudes = history.shifted(latitudes, history.float_or_nan(previous_latitude))
+    previous_longitudes = history.shifted(longitudes, history.float_or_nan(previous_longitude))
+    distances = np.nan_to_num(haversine(previous_latitudes, previous_longitudes, latitudes, longitudes))
+    energies = powers * elapsed / 3600.0
+    temperatures = outside_temperatures(vehicle, timestamps)
+
+    days = np.array(timestamps, dtype="datetime64[D]").astype(np.int64)
+    speed_buckets = (speeds // SPEED_BUCKET * SPEED_BUCKET).astype(np.int64)
+    temperature_buckets = np.where(
+        np.isnan(temperatures),
+        UNKNOWN_TEMPERATURE,
+        np.floor(np.nan_to_num(temperatures) / TEMPERATURE_BUCKET) * TEMPERATURE_BUCKET
+    ).astype(np.int64)
+
+    keys = np.stack([days, speed_buckets, temperature_buckets], axis=1)[connected]
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    total_distances = np.bincount(inverse, weights=distances[connected], minlength=len(unique_keys))
+    total_energies = np.bincount(inverse, weights=energies[connected], minlength=len(unique_keys))
+    total_durations = np.bincount(inverse, weights=elapsed[connected], minlength=len(unique_keys))
+
+    statement = insert(EfficiencyBucket.__table__).values([
+        {
+            "vehicle_id": vehicle.id,
+            "day": date.fromordinal(int(day) + date(1970, 1, 1).toordinal()),
+            "speed": int(speed),
+            "temperature": int(temperature),
+            "distance": float(distance),
+            "energy": float(energy),
+            "duration": float(duration),
+        } for (day, speed, temperature), distance, energy, duration
+        in zip(unique_keys.tolist(), total_distances, total_energies, total_durations)
+    ])
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[EfficiencyBucket.vehicle_id, EfficiencyBucket.day, EfficiencyBucket.speed,
+                        EfficiencyBucket.temperature],
+        set_={
+            "distance": EfficiencyBucket.distance + statement.excluded.distance,
+            "energy": EfficiencyBucket.energy + statement.excluded.energy,
+            "duration": EfficiencyBucket.duration + statement.excluded.duration,
+        }
+    ))
+    return int(connected.sum())
+
+
+def outside_temperatures(vehicle: Vehicle, timestamps: List[datetime]) -> np.ndarray:
+    rows = db.session.query(ClimateState.timestamp, cast(ClimateState.data.op("->>")("outside_temp"), Float)).filter(
+        ClimateState.vehicle_id == vehicle.id,
+        ClimateState.timestamp.between(timestamps[0] - TEMPERATURE_TOLERANCE, timestamps[-1])
+    ).order_by(ClimateState.timestamp).all()
+    if not rows:
+        return np.full(len(timestamps), np.nan)
+
+    climate_seconds = history.seconds([row[0] for row in rows])
+    climate_temperatures = np.array([row[1] for row in rows], dtype=float)
+    seconds = history.seconds(timestamps)
+    indexes = np.searchsorted(climate_seconds, seconds, side="right") - 1
+    found = (indexes >= 0) & (seconds - climate_seconds[np.maximum(indexes, 0)] <= TEMPERATURE_TOLERANCE.total_seconds())
+    return np.where(found, climate_temperatures[np.maximum(indexes, 0)], np.nan)
+
+
+def summary(vehicle: Vehicle, group: str, after: date = None, before: date = None) -> List[dict]:
+    column = getattr(EfficiencyBucket, group)
+    query = db.session.query(
+        column,
+        func.sum(EfficiencyBucket.distance),
+        func.sum(EfficiencyBucket.energy),
+        func.sum(EfficiencyBucket.duration),
+    ).filter(EfficiencyBucket.vehicle_id == vehicle.id)
+    if after is not None:
+        query = query.filter(EfficiencyBucket.day >= after)
+    if before is not None:
+        query = query.filter(EfficiencyBucket.day <= before)
+    return [
+        {
+            group: _group_value(group, value),
+            "distance": float(distance),
+            "energy": float(energy),
+            "duration": float(duration),
+            "efficiency": float(energy * 1000 / distance) if distance else None,
+        } for value, distance, energy, duration in query.group_by(column).order_by(column)
+    ]
+
+
+def _group_value(group: str, value):
+    if group == "day":
+        return value.isoformat()
+    if group == "temperature" and value == UNKNOWN_TEMPERATURE:
+        return None
+    return value
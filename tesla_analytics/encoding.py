@@ -0,0 +1,45 @@
+import json
+import math
+from datetime import datetime
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z)
+    return json.dumps(_finite(payload), default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(payload, status: int = 200, headers: dict = None) -> Response:
+    return Response(dumps(payload), status=status, headers=headers, mimetype="application/json")
+
+
+def serialized_columns(model):
+    return [model.data] + [getattr(model, name) for name in model.serialized_columns]
+
+
+def serialize_rows(model, rows) -> list:
+    names = model.serialized_columns
+    return [dict(row[0], **dict(zip(names, row[1:]))) for row in rows]
+
+
+def _finite(value):
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat() + "Z"
+    raise TypeError("{} is not JSON serializable".format(type(value).__name__))
@@ -0,0 +1,179 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, String, cast, func, select
+
+from tesla_analytics.models import db, Vehicle, ChargeState, ClimateState, DriveState, VehicleState
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+try:
+    import pandas
+except ImportError:  # pragma: no cover
+    pandas = None
+
+CHUNK_SIZE = 50000
+MAX_PARTITIONS = 8
+MIMETYPE = "application/vnd.apache.arrow.stream"
+
+FIELDS = {
+    ChargeState: [
+        ("battery_level", Float), ("usable_battery_level", Float), ("battery_range", Float),
+        ("est_battery_range", Float), ("ideal_battery_range", Float), ("charge_limit_soc", Float),
+        ("charging_state", String), ("charge_energy_added", Float), ("charge_rate", Float),
+        ("charger_power", Float), ("charger_voltage", Float), ("charger_actual_current", Float),
+        ("time_to_full_charge", Float), ("fast_charger_present", Boolean),
+    ],
+    ClimateState: [
+        ("inside_temp", Float), ("outside_temp", Float), ("driver_temp_setting", Float),
+        ("passenger_temp_setting", Float), ("is_climate_on", Boolean), ("fan_status", Float),
+    ],
+    DriveState: [
+        ("gps_as_of", None), ("latitude", None), ("longitude", None), ("power", None), ("shift_state", None),
+        ("speed", None), ("heading", Float),
+    ],
+    VehicleState: [
+        ("odometer", Float), ("locked", Boolean), ("car_version", String), ("sentry_mode", Boolean),
+    ],
+}
+
+
+class MissingDependency(Exception):
+    pass
+
+
+def columns(model) -> List[Tuple[str, object]]:
+    selected = [("timestamp", model.timestamp)]
+    for name, type_ in FIELDS[model]:
+        if type_ is None:
+            selected.append((name, getattr(model, name)))
+        else:
+            selected.append((name, cast(model.data.op("->>")(name), type_)))
+    return selected
+
+
+def chunks(model, vehicle_id: int, after: datetime = None, before: datetime = None,
+           chunk_size: int = CHUNK_SIZE, connection=None,
+           partition: Tuple[datetime, datetime] = None) -> Iterator[Dict[str, list]]:
+    selected = columns(model)
+    query = select([expression.label(name) for name, expression in selected]) \
+        .where(model.vehicle_id == vehicle_id) \
+        .order_by(model.timestamp, model.id)
+    if after is not None and before is not None:
+        query = query.where(model.timestamp.between(after, before))
+    elif after is not None:
+        query = query.where(model.timestamp > after)
+    elif before is not None:
+        query = query.where(model.timestamp < before)
+    if partition is not None:
+        lower, upper = partition
+        query = query.where(model.timestamp >= lower)
+        if upper is not None:
+            query = query.where(model.timestamp < upper)
+
+    connection = connection if connection is not None else db.session.connection()
+    result = connection.execution_options(stream_results=True).execute(query)
+    try:
+        while True:
+            rows = result.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield {name: list(values) for (name, _), values in zip(selected, zip(*rows))}
+    finally:
+        result.close()
+
+
+def partitions(model, vehicle_id: int, after: datetime = None, before: datetime = None,
+               count: int = MAX_PARTITIONS) -> List[Tuple[datetime, datetime]]:
+    first, last = db.session.query(func.min(model.timestamp), func.max(model.timestamp)).filter(
+        model.vehicle_id == vehicle_id
+    ).one()
+    if first is None:
+        return []
+    start = max(first, after) if after is not None else first
+    end = min(last, before) if before is not None else last
+    if start > end:
+        return []
+    bounds = [start + (end - start) * index / count for index in range(count)] + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def record_batches(model, vehicle: Vehicle, after: datetime = None, before: datetime = None,
+                   chunk_size: int = CHUNK_SIZE, workers: int = 1) -> Iterator:
+    _require(pyarrow, "pyarrow")
+    schema = arrow_schema(model)
+    if workers <= 1:
+        for chunk in chunks(model, vehicle.id, after, before, chunk_size):
+            yield _record_batch(schema, chunk)
+        return
+
+    engine = db.engine
+    vehicle_id = vehicle.id
+
+    def read(partition):
+        with engine.connect() as connection:
+            return [_record_batch(schema, chunk) for chunk in chunks(
+                model, vehicle_id, after, before, chunk_size=chunk_size, connection=connection, partition=partition
+            )]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batches in executor.map(read, partitions(model, vehicle_id, after, before, workers)):
+            yield from batches
+
+
+def table(model, vehicle: Vehicle, after: datetime = None, before: datetime = None,
+          chunk_size: int = CHUNK_SIZE, workers: int = 1):
+    batches = list(record_batches(model, vehicle, after, before, chunk_size, workers))
+    return pyarrow.Table.from_batches(batches, schema=arrow_schema(model))
+
+
+def dataframe(model, vehicle: Vehicle, after: datetime = None, before: datetime = None,
+              chunk_size: int = CHUNK_SIZE, workers: int = 1):
+    _require(pandas, "pandas")
+    return table(model, vehicle, after, before, chunk_size, workers).to_pandas()
+
+
+def arrow_schema(model):
+    _require(pyarrow, "pyarrow")
+    types = [
+        (DateTime, pyarrow.timestamp("us")),
+        (Float, pyarrow.float64()),
+        (Integer, pyarrow.int64()),
+        (Boolean, pyarrow.bool_()),
+        (String, pyarrow.string()),
+    ]
+    return pyarrow.schema([
+        pyarrow.field(name, next(arrow_type for sql_type, arrow_type in types if isinstance(expression.type, sql_type)))
+        for name, expression in columns(model)
+    ])
+
+
+def ipc_stream(batches: Iterator, schema) -> Iterator[bytes]:
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def _record_batch(schema, chunk: Dict[str, list]):
+    return pyarrow.RecordBatch.from_arrays([pyarrow.array(chunk[field.name], type=field.type) for field in schema],
+                                           schema=schema)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def _require(module, name: str):
+    if module is None:
+        raise MissingDependency("{} is required for columnar exports".format(name))
@@ -0,0 +1,90 @@
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+EARTH_RADIUS_METERS = EARTH_RADIUS_MILES * 1609.344
+METERS_PER_DEGREE = float(np.radians(EARTH_RADIUS_METERS))
+
+
+def haversine(latitudes_1, longitudes_1, latitudes_2, longitudes_2):
+    latitudes_1, longitudes_1, latitudes_2, longitudes_2 = (
+        np.radians(values) for values in (latitudes_1, longitudes_1, latitudes_2, longitudes_2)
+    )
+    a = np.sin((latitudes_2 - latitudes_1) / 2) ** 2 + \
+        np.cos(latitudes_1) * np.cos(latitudes_2) * np.sin((longitudes_2 - longitudes_1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+CELL_LEVEL = 26
+MAX_COVERING_CELLS = 16
+
+
+def cell(latitudes, longitudes, level: int = CELL_LEVEL):
+    y, x = _indexes(latitudes, longitudes, level)
+    return (_spread(x) << 1) | _spread(y)
+
+
+def cell_centers(cells, level: int):
+    cells = np.asarray(cells, dtype=np.int64)
+    size = 1 << level
+    latitudes = (_compact(cells) + 0.5) / size * 180.0 - 90.0
+    longitudes = (_compact(cells >> 1) + 0.5) / size * 360.0 - 180.0
+    return latitudes, longitudes
+
+
+def covering(south: float, west: float, north: float, east: float, max_cells: int = MAX_COVERING_CELLS):
+    for level in range(CELL_LEVEL, 0, -1):
+        south_index, west_index = (int(index) for index in _indexes(south, west, level))
+        north_index, east_index = (int(index) for index in _indexes(north, east, level))
+        if (north_index - south_index + 1) * (east_index - west_index + 1) <= max_cells:
+            break
+
+    y, x = np.meshgrid(np.arange(south_index, north_index + 1), np.arange(west_index, east_index + 1))
+    prefixes = np.sort(((_spread(x) << 1) | _spread(y)).ravel())
+    shift = 2 * (CELL_LEVEL - level)
+
+    ranges = []
+    for prefix in prefixes.tolist():
+        low, high = prefix << shift, (prefix + 1) << shift
+        if ranges and ranges[-1][1] == low:
+            ranges[-1] = (ranges[-1][0], high)
+        else:
+            ranges.append((low, high))
+    return ranges
+
+
+def bounding_box(latitude: float, longitude: float, radius: float):
+    latitude_delta = radius / METERS_PER_DEGREE
+    longitude_delta = radius / (METERS_PER_DEGREE * float(np.cos(np.radians(latitude))))
+    return latitude - latitude_delta, longitude - longitude_delta, latitude + latitude_delta, longitude + longitude_delta
+
+
+def _indexes(latitudes, longitudes, level: int):
+    return (
+        _grid(np.asarray(latitudes, dtype=float), -90.0, 180.0, level),
+        _grid(np.asarray(longitudes, dtype=float), -180.0, 360.0, level),
+    )
+
+
+def _grid(values: np.ndarray, origin: float, extent: float, level: int):
+    cells = 1 << level
+    return np.clip(np.floor((values - origin) / extent * cells), 0, cells - 1).astype(np.int64)
+
+
+def _spread(values):
+    values = values & 0x3ffffff
+    values = (values | (values << 16)) & 0x0000ffff0000ffff
+    values = (values | (values << 8)) & 0x00ff00ff00ff00ff
+    values = (values | (values << 4)) & 0x0f0f0f0f0f0f0f0f
+    values = (values | (values << 2)) & 0x3333333333333333
+    values = (values | (values << 1)) & 0x5555555555555555
+    return values
+
+
+def _compact(values):
+    values = values & 0x5555555555555555
+    values = (values | (values >> 1)) & 0x3333333333333333
+    values = (values | (values >> 2)) & 0x0f0f0f0f0f0f0f0f
+    values = (values | (values >> 4)) & 0x00ff00ff00ff00ff
+    values = (values | (values >> 8)) & 0x0000ffff0000ffff
+    values = (values | (values >> 16)) & 0x3ffffff
+    return values
@@ -0,0 +1,91 @@
+from typing import List, Sequence
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.dialects.postgresql import insert
+
+from tesla_analytics import geo, history
+from tesla_analytics.models import db, Vehicle, DriveState, HeatmapCell
+from tesla_analytics.trips import DRIVING_SHIFT_STATES
+
+LEVELS = [8, 11, 14, 17, 20]
+KINDS = ["all", "driving", "parked"]
+
+
+def record(vehicle: Vehicle, drive_state: DriveState):
+    if drive_state.latitude is None or drive_state.longitude is None:
+        return
+    _increment(vehicle, [(drive_state.timestamp, drive_state.latitude, drive_state.longitude,
+                          drive_state.shift_state)])
+
+
+def rebuild(vehicle: Vehicle, chunk_size: int = history.CHUNK_SIZE) -> int:
+    HeatmapCell.query.filter_by(vehicle_id=vehicle.id).delete()
+
+    count = 0
+    for rows in history.chunks(DriveState, vehicle, DriveState.latitude, DriveState.longitude,
+                               DriveState.shift_state, chunk_size=chunk_size):
+        count += _increment(vehicle, rows)
+    db.session.commit()
+    return count
+
+
+def cells(vehicle: Vehicle, level: int, kind: str, south: float, west: float, north: float, east: float):
+    shift = 2 * (geo.CELL_LEVEL - level)
+    ranges = [(low >> shift, (high - 1) >> shift) for low, high in geo.covering(south, west, north, east)]
+    if kind == "driving":
+        count = HeatmapCell.driving_count
+    elif kind == "parked":
+        count = HeatmapCell.parked_count
+    else:
+        count = HeatmapCell.driving_count + HeatmapCell.parked_count
+
+    rows = db.session.query(HeatmapCell.cell, count).filter(
+        HeatmapCell.vehicle_id == vehicle.id,
+        HeatmapCell.level == level,
+        or_(*[HeatmapCell.cell.between(low, high) for low, high in ranges]),
+        count > 0
+    ).order_by(HeatmapCell.cell).all()
+
+    latitudes, longitudes = geo.cell_centers([row[0] for row in rows], level)
+    return latitudes, longitudes, np.array([row[1] for row in rows], dtype=np.uint32)
+
+
+def _increment(vehicle: Vehicle, rows: Sequence) -> int:
+    latitudes = np.array([row[1] for row in rows], dtype=float)
+    longitudes = np.array([row[2] for row in rows], dtype=float)
+    located = ~(np.isnan(latitudes) | np.isnan(longitudes))
+    if not located.any():
+        return 0
+    driving = np.isin(np.array([row[3] for row in rows], dtype=object), DRIVING_SHIFT_STATES)[located]
+    full_cells = geo.cell(latitudes[located], longitudes[located])
+
+    values = []
+    for level in LEVELS:
+        level_cells = full_cells >> (2 * (geo.CELL_LEVEL - level))
+        unique_cells, inverse = np.unique(level_cells, return_inverse=True)
+        driving_counts = np.bincount(inverse, weights=driving, minlength=len(unique_cells))
+        parked_counts = np.bincount(inverse, weights=~driving, minlength=len(unique_cells))
+        values.extend(_values(vehicle, level, unique_cells, driving_counts, parked_counts))
+
+    statement = insert(HeatmapCell.__table__).values(values)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[HeatmapCell.vehicle_id, HeatmapCell.level, HeatmapCell.cell],
+        set_={
+            "driving_count": HeatmapCell.driving_count + statement.excluded.driving_count,
+            "parked_count": HeatmapCell.parked_count + statement.excluded.parked_count,
+        }
+    ))
+    return int(located.sum())
+
+
+def _values(vehicle: Vehicle, level: int, unique_cells, driving_counts, parked_counts) -> List[dict]:
+    return [
+        {
+            "vehicle_id": vehicle.id,
+            "level": level,
+            "cell": cell,
+            "driving_count": int(driving_count),
+            "parked_count": int(parked_count),
+        } for cell, driving_count, parked_count in zip(unique_cells.tolist(), driving_counts, parked_counts)
+    ]
@@ -0,0 +1,74 @@
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List
+
+import numpy as np
+from sqlalchemy import tuple_
+
+from tesla_analytics.models import db, Vehicle
+
+INCLUSIVE = ["neither", "after", "before", "both"]
+CHUNK_SIZE = 10000
+
+
+def chunks(model, vehicle: Vehicle, *columns, chunk_size: int = CHUNK_SIZE,
+           after: datetime = None, before: datetime = None, inclusive: str = "neither") -> Iterator[List]:
+    if inclusive not in INCLUSIVE:
+        raise ValueError("Invalid inclusive '{}', expected one of {}".format(inclusive, ", ".join(INCLUSIVE)))
+    include_after = inclusive in ("after", "both")
+    include_before = inclusive in ("before", "both")
+    last = None
+    while True:
+        query = db.session.query(model.timestamp, *columns, model.id).filter(model.vehicle_id == vehicle.id)
+        if after is not None:
+            query = query.filter(model.timestamp >= after if include_after else model.timestamp > after)
+        if before is not None:
+            query = query.filter(model.timestamp <= before if include_before else model.timestamp < before)
+        if last is not None:
+            query = query.filter(tuple_(model.timestamp, model.id) > last)
+        rows = query.order_by(model.timestamp, model.id).limit(chunk_size).all()
+        if not rows:
+            return
+        yield rows
+        last = (rows[-1][0], rows[-1][-1])
+
+
+def seconds(timestamps) -> np.ndarray:
+    return np.array(timestamps, dtype="datetime64[us]").astype(np.int64) / 1e6
+
+
+def seconds_of(timestamp: datetime) -> float:
+    return seconds([timestamp])[0]
+
+
+Runs = namedtuple("Runs", ["elapsed", "connected", "starts", "members", "labels", "last_indexes"])
+
+
+def runs(seconds: np.ndarray, active: np.ndarray, max_gap: timedelta, open_run_end: datetime = None) -> Runs:
+    carried = open_run_end is not None
+    previous_seconds = shifted(seconds, seconds_of(open_run_end) if carried else np.nan)
+    elapsed = seconds - previous_seconds
+    connected = shifted(active, carried) & (elapsed <= max_gap.total_seconds())
+    starts = active & ~connected
+    members = connected | starts
+    labels = np.cumsum(starts) - (0 if carried else 1)
+
+    last_indexes = np.full(int(starts.sum()) + (1 if carried else 0), -1)
+    np.maximum.at(last_indexes, labels[members], np.flatnonzero(members))
+    return Runs(elapsed, connected, starts, members, labels, last_indexes)
+
+
+def shifted(values: np.ndarray, first) -> np.ndarray:
+    return np.concatenate((np.array([first], dtype=values.dtype), values[:-1]))
+
+
+def optional_float(value):
+    return None if np.isnan(value) else float(value)
+
+
+def float_or_nan(value):
+    return np.nan if value is None else value
+
+
+def utc_datetime(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,146 @@
+import queue
+import select
+import threading
+import time
+from collections import defaultdict
+from logging import Logger
+from typing import Iterator
+
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import func, select as sql_select
+
+from tesla_analytics import encoding
+from tesla_analytics.models import db, Vehicle, LatestState
+
+LOG = Logger(__name__)
+
+CHANNEL = "vehicle_updates"
+KEEPALIVE = 15
+MAX_DURATION = 300
+RECONNECT_DELAY = 5
+LISTEN_TIMEOUT = 10
+POLL_TIMEOUT = 5
+
+
+class ListenerUnavailable(Exception):
+    pass
+
+
+def publish(vehicle: Vehicle):
+    db.session.execute(sql_select([func.pg_notify(CHANNEL, str(vehicle.id))]))
+
+
+class Listener(object):
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+        self.listening = threading.Event()
+        self.thread = None
+
+    def start(self, timeout: float = None) -> bool:
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, args=(db.engine,), daemon=True)
+                self.thread.start()
+        return self.listening.wait(LISTEN_TIMEOUT if timeout is None else timeout)
+
+    def subscribe(self, vehicle_id: int) -> queue.Queue:
+        if not self.start():
+            raise ListenerUnavailable("Live updates are unavailable")
+        updates = queue.Queue()
+        with self.lock:
+            self.subscribers[vehicle_id].add(updates)
+        return updates
+
+    def unsubscribe(self, vehicle_id: int, updates: queue.Queue):
+        with self.lock:
+            self.subscribers[vehicle_id].discard(updates)
+            if not self.subscribers[vehicle_id]:
+                del self.subscribers[vehicle_id]
+
+    def dispatch(self, vehicle_id: int = None):
+        with self.lock:
+            if vehicle_id is None:
+                targets = [updates for subscribers in self.subscribers.values() for updates in subscribers]
+            else:
+                targets = list(self.subscribers.get(vehicle_id, ()))
+        for updates in targets:
+            updates.put(vehicle_id)
+
+    def _run(self, engine):
+        try:
+            while True:
+                try:
+                    self._listen(engine)
+                except Exception:
+                    LOG.exception("Listening for vehicle updates failed, reconnecting")
+                self.listening.clear()
+                time.sleep(RECONNECT_DELAY)
+                self.dispatch()
+        finally:
+            with self.lock:
+                self.listening.clear()
+                self.thread = None
+
+    def _listen(self, engine):
+        connection = engine.raw_connection()
+        connection.detach()
+        try:
+            connection.connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            cursor = connection.cursor()
+            cursor.execute("LISTEN {}".format(CHANNEL))
+            self.listening.set()
+            while True:
+                if select.select([connection.connection], [], [], POLL_TIMEOUT) == ([], [], []):
+                    continue
+                connection.connection.poll()
+                while connection.connection.notifies:
+                    notification = connection.connection.notifies.pop(0)
+                    try:
+                        self.dispatch(int(notification.payload))
+                    except ValueError:
+                        continue
+        finally:
+            connection.close()
+
+
+listener = Listener()
+
+
+def stream(vehicle: Vehicle, keepalive: float = KEEPALIVE, duration: float = MAX_DURATION) -> Iterator[str]:
+    vehicle_id = vehicle.id
+    deadline = time.monotonic() + duration
+    updates = listener.subscribe(vehicle_id)
+    try:
+        latest_state = _latest_state(vehicle_id)
+        if latest_state is not None:
+            yield event(latest_state)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                updates.get(timeout=min(keepalive, remaining))
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            latest_state = _latest_state(vehicle_id)
+            if latest_state is not None:
+                yield event(latest_state)
+    finally:
+        listener.unsubscribe(vehicle_id, updates)
+
+
+def event(latest_state: dict) -> str:
+    return "id: {}\nevent: snapshot\ndata: {}\n\n".format(
+        latest_state["updated_at"],
+        encoding.dumps(latest_state).decode("utf-8")
+    )
+
+
+def _latest_state(vehicle_id: int):
+    try:
+        latest_state = LatestState.query.get(vehicle_id)
+        return latest_state.serialize() if latest_state is not None else None
+    finally:
+        db.session.close()
@@ -1,6 +1,7 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 
+from tesla_analytics import geo
 from tesla_analytics.application import app
 
 db = SQLAlchemy(app)
@@ -8,10 +9,11 @@ db = SQLAlchemy(app)
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String, index=True)
+    email = db.Column(db.String, index=True, unique=True)
     password_hash = db.Column(db.String)
     tesla_access_token = db.Column(db.String, nullable=True)
     vehicles = db.relationship('Vehicle', backref='user')
+    alerts = db.relationship('Alert', backref='user')
 
 
 class Vehicle(db.Model):
@@ -28,6 +30,11 @@ class Vehicle(db.Model):
     climate_states = db.relation('ClimateState', backref='vehicle')
     drive_states = db.relation('DriveState', backref='vehicle')
     vehicle_states = db.relation('VehicleState', backref='vehicle')
+    latest_state = db.relation('LatestState', backref='vehicle', uselist=False)
+    trips = db.relation('Trip', backref='vehicle')
+    charging_sessions = db.relation('ChargingSession', backref='vehicle')
+    idle_periods = db.relation('IdlePeriod', backref='vehicle')
+    alerts = db.relation('Alert', backref='vehicle')
 
     def serialize(self):
         return {
@@ -39,6 +46,13 @@ class Vehicle(db.Model):
 
 
 class ChargeState(db.Model):
+    __table_args__ = (
+        db.Index('ix_charge_state_vehicle_id_timestamp', 'vehicle_id', 'timestamp'),
+        db.Index('ix_charge_state_vehicle_id_id', 'vehicle_id', 'id'),
+    )
+
+    serialized_columns = ("timestamp",)
+
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime)
     data = db.Column(db.JSON)
@@ -54,6 +68,13 @@ class ChargeState(db.Model):
 
 
 class ClimateState(db.Model):
+    __table_args__ = (
+        db.Index('ix_climate_state_vehicle_id_timestamp', 'vehicle_id', 'timestamp'),
+        db.Index('ix_climate_state_vehicle_id_id', 'vehicle_id', 'id'),
+    )
+
+    serialized_columns = ("timestamp",)
+
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime)
     data = db.Column(db.JSON)
@@ -69,6 +90,14 @@ class ClimateState(db.Model):
 
 
 class DriveState(db.Model):
+    __table_args__ = (
+        db.Index('ix_drive_state_vehicle_id_timestamp', 'vehicle_id', 'timestamp'),
+        db.Index('ix_drive_state_vehicle_id_cell', 'vehicle_id', 'cell'),
+        db.Index('ix_drive_state_vehicle_id_id', 'vehicle_id', 'id'),
+    )
+
+    serialized_columns = ("timestamp", "gps_as_of", "latitude", "longitude", "power", "shift_state", "speed")
+
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime)
     gps_as_of = db.Column(db.DateTime)
@@ -77,6 +106,7 @@ class DriveState(db.Model):
     power = db.Column(db.Float)
     shift_state = db.Column(db.String, nullable=True)
     speed = db.Column(db.Integer, nullable=True)
+    cell = db.Column(db.BigInteger, nullable=True)
     data = db.Column(db.JSON)
     vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False)
 
@@ -89,6 +119,7 @@ class DriveState(db.Model):
         power = data.pop("power")
         shift_state = data.pop("shift_state")
         speed = data.pop("speed")
+        cell = int(geo.cell(latitude, longitude)) if latitude is not None and longitude is not None else None
 
         super(DriveState, self).__init__(
             timestamp=timestamp,
@@ -98,6 +129,7 @@ class DriveState(db.Model):
             power=power,
             shift_state=shift_state,
             speed=speed,
+            cell=cell,
             data=data,
             vehicle=vehicle
         )
@@ -115,6 +147,13 @@ class DriveState(db.Model):
 
 
 class VehicleState(db.Model):
+    __table_args__ = (
+        db.Index('ix_vehicle_state_vehicle_id_timestamp', 'vehicle_id', 'timestamp'),
+        db.Index('ix_vehicle_state_vehicle_id_id', 'vehicle_id', 'id'),
+    )
+
+    serialized_columns = ("timestamp",)
+
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime)
     data = db.Column(db.JSON)
@@ -127,3 +166,183 @@ class VehicleState(db.Model):
 
     def serialize(self):
         return {**self.data, **{"timestamp": self.timestamp.isoformat() + "Z"}}
+
+
+class LatestState(db.Model):
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), primary_key=True)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    charge_state = db.Column(db.JSON, nullable=True)
+    climate_state = db.Column(db.JSON, nullable=True)
+    drive_state = db.Column(db.JSON, nullable=True)
+    vehicle_state = db.Column(db.JSON, nullable=True)
+
+    def serialize(self):
+        return {
+            "updated_at": self.updated_at.isoformat() + "Z",
+            "charge": self.charge_state,
+            "climate": self.climate_state,
+            "drive": self.drive_state,
+            "vehicle": self.vehicle_state,
+        }
+
+
+class Trip(db.Model):
+    __table_args__ = (db.Index('ix_trip_vehicle_id_start_time', 'vehicle_id', 'start_time'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False)
+    in_progress = db.Column(db.Boolean, nullable=False, default=True)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    start_latitude = db.Column(db.Float, nullable=True)
+    start_longitude = db.Column(db.Float, nullable=True)
+    end_latitude = db.Column(db.Float, nullable=True)
+    end_longitude = db.Column(db.Float, nullable=True)
+    distance = db.Column(db.Float, nullable=False, default=0)
+    energy = db.Column(db.Float, nullable=False, default=0)
+
+    def serialize(self):
+        return {
+            "start_time": self.start_time.isoformat() + "Z",
+            "end_time": self.end_time.isoformat() + "Z",
+            "duration": (self.end_time - self.start_time).total_seconds(),
+            "distance": self.distance,
+            "energy": self.energy,
+            "efficiency": self.energy * 1000 / self.distance if self.distance else None,
+            "start": {"latitude": self.start_latitude, "longitude": self.start_longitude},
+            "end": {"latitude": self.end_latitude, "longitude": self.end_longitude},
+            "in_progress": self.in_progress,
+        }
+
+
+class ChargingSession(db.Model):
+    __table_args__ = (db.Index('ix_charging_session_vehicle_id_start_time', 'vehicle_id', 'start_time'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False)
+    in_progress = db.Column(db.Boolean, nullable=False, default=True)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    energy_added = db.Column(db.Float, nullable=True)
+    peak_power = db.Column(db.Float, nullable=True)
+    start_battery_level = db.Column(db.Float, nullable=True)
+    end_battery_level = db.Column(db.Float, nullable=True)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+
+    def serialize(self):
+        return {
+            "start_time": self.start_time.isoformat() + "Z",
+            "end_time": self.end_time.isoformat() + "Z",
+            "duration": (self.end_time - self.start_time).total_seconds(),
+            "energy_added": self.energy_added,
+            "peak_power": self.peak_power,
+            "start_battery_level": self.start_battery_level,
+            "end_battery_level": self.end_battery_level,
+            "location": {"latitude": self.latitude, "longitude": self.longitude},
+            "in_progress": self.in_progress,
+        }
+
+
+class IdlePeriod(db.Model):
+    __table_args__ = (db.Index('ix_idle_period_vehicle_id_start_time', 'vehicle_id', 'start_time'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False)
+    in_progress = db.Column(db.Boolean, nullable=False, default=True)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    start_battery_level = db.Column(db.Float, nullable=True)
+    end_battery_level = db.Column(db.Float, nullable=True)
+    start_range = db.Column(db.Float, nullable=True)
+    end_range = db.Column(db.Float, nullable=True)
+
+    def serialize(self):
+        duration = (self.end_time - self.start_time).total_seconds()
+        level_lost = self.start_battery_level - self.end_battery_level \
+            if self.start_battery_level is not None and self.end_battery_level is not None else None
+        return {
+            "start_time": self.start_time.isoformat() + "Z",
+            "end_time": self.end_time.isoformat() + "Z",
+            "duration": duration,
+            "start_battery_level": self.start_battery_level,
+            "end_battery_level": self.end_battery_level,
+            "level_lost": level_lost,
+            "range_lost": self.start_range - self.end_range
+            if self.start_range is not None and self.end_range is not None else None,
+            "drain_rate": level_lost / duration * 86400 if level_lost is not None and duration > 0 else None,
+            "in_progress": self.in_progress,
+        }
+
+
+class HeatmapCell(db.Model):
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), primary_key=True)
+    level = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    cell = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    driving_count = db.Column(db.Integer, nullable=False, default=0)
+    parked_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class EfficiencyBucket(db.Model):
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    speed = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    temperature = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    distance = db.Column(db.Float, nullable=False, default=0)
+    energy = db.Column(db.Float, nullable=False, default=0)
+    duration = db.Column(db.Float, nullable=False, default=0)
+
+
+class BatteryDay(db.Model):
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    estimated_range = db.Column(db.Float, nullable=True)
+    estimated_ideal_range = db.Column(db.Float, nullable=True)
+    estimated_capacity = db.Column(db.Float, nullable=True)
+
+    def serialize(self):
+        return {
+            "day": self.day.isoformat(),
+            "samples": self.samples,
+            "estimated_range": self.estimated_range,
+            "estimated_ideal_range": self.estimated_ideal_range,
+            "estimated_capacity": self.estimated_capacity,
+        }
+
+
+class Alert(db.Model):
+    __table_args__ = (db.Index('ix_alert_user_id_timestamp', 'user_id', 'timestamp'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=True)
+    kind = db.Column(db.String, nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    details = db.Column(db.JSON, nullable=True)
+
+    def serialize(self):
+        return {
+            "kind": self.kind,
+            "timestamp": self.timestamp.isoformat() + "Z",
+            "vehicle_id": self.vehicle.tesla_id if self.vehicle is not None else None,
+            "details": self.details,
+        }
+
+
+STATE_MODELS = {
+    "charge": ChargeState,
+    "climate": ClimateState,
+    "drive": DriveState,
+    "vehicle": VehicleState,
+}
+
+
+def filter_by_time_range(query, column, after=None, before=None):
+    if after is not None and before is not None:
+        return query.filter(column.between(after, before))
+    elif after is not None:
+        return query.filter(column > after)
+    elif before is not None:
+        return query.filter(column < before)
+    return query
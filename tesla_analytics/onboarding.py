@@ -0,0 +1,119 @@
+import csv
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Union
+
+from sqlalchemy.dialects.postgresql import insert
+
+from tesla_analytics import passwords
+from tesla_analytics.models import db, User, Vehicle
+from tesla_analytics.tesla_service import TeslaService
+
+WORKERS = 8
+BATCH_SIZE = 500
+
+Account = namedtuple("Account", ["email", "password", "tesla_email", "tesla_password"])
+Result = namedtuple("Result", ["email", "vehicles", "error"])
+Authenticated = namedtuple("Authenticated", ["account", "token", "vehicles"])
+
+
+class InvalidAccount(Exception):
+    pass
+
+
+def read_accounts(path: str) -> Iterator[Union[Account, InvalidAccount]]:
+    with open(path, newline="") as source:
+        if path.endswith(".jsonl"):
+            rows = ((line_number, line) for line_number, line in enumerate(source, start=1) if line.strip())
+        else:
+            reader = csv.DictReader(source)
+            rows = ((reader.line_num, row) for row in reader)
+        for line_number, row in rows:
+            try:
+                if isinstance(row, str):
+                    row = json.loads(row)
+                yield Account(*(row[field].strip() for field in Account._fields))
+            except json.JSONDecodeError:
+                yield InvalidAccount("Line {} is not valid JSON".format(line_number))
+            except (KeyError, AttributeError, TypeError):
+                yield InvalidAccount("Line {} must have fields {}".format(line_number, ", ".join(Account._fields)))
+
+
+def onboard(accounts: Iterable[Union[Account, InvalidAccount]], workers: int = WORKERS, batch_size: int = BATCH_SIZE,
+            reset_passwords: bool = False) -> Iterator[Result]:
+    accounts = iter(accounts)
+    seen = set()
+    with ThreadPoolExecutor(max_workers=workers) as tesla_pool, ProcessPoolExecutor() as hash_pool:
+        while True:
+            batch = [account for _, account in zip(range(batch_size), accounts)]
+            if not batch:
+                break
+            unique = []
+            for account in batch:
+                if isinstance(account, InvalidAccount):
+                    yield Result(None, 0, str(account))
+                elif account.email in seen:
+                    yield Result(account.email, 0, "Duplicate account")
+                else:
+                    seen.add(account.email)
+                    unique.append(account)
+
+            authenticated = []
+            for account, outcome in zip(unique, tesla_pool.map(_authenticate, unique)):
+                if isinstance(outcome, Exception):
+                    yield Result(account.email, 0, "{}: {}".format(type(outcome).__name__, outcome))
+                else:
+                    authenticated.append(outcome)
+            if authenticated:
+                hashes = list(hash_pool.map(passwords.hash_password, [item.account.password for item in authenticated]))
+                yield from _store(authenticated, hashes, reset_passwords)
+
+
+def _authenticate(account: Account):
+    try:
+        tesla_service = TeslaService(email=account.tesla_email, password=account.tesla_password)
+        return Authenticated(account, tesla_service.token, list(tesla_service.vehicles()))
+    except Exception as e:
+        return e
+
+
+def _store(authenticated: List[Authenticated], hashes: List[str], reset_passwords: bool = False) -> List[Result]:
+    statement = insert(User.__table__).values([
+        {"email": item.account.email, "password_hash": password_hash, "tesla_access_token": item.token}
+        for item, password_hash in zip(authenticated, hashes)
+    ])
+    updated = ["tesla_access_token", "password_hash"] if reset_passwords else ["tesla_access_token"]
+    upserted = db.session.execute(statement.on_conflict_do_update(
+        index_elements=[User.email],
+        set_={name: statement.excluded[name] for name in updated}
+    ).returning(User.email, User.id))
+    user_ids = dict(upserted.fetchall())
+
+    vehicle_ids = {
+        (user_id, tesla_id): vehicle_id
+        for vehicle_id, user_id, tesla_id in db.session.query(Vehicle.id, Vehicle.user_id, Vehicle.tesla_id)
+        .filter(Vehicle.user_id.in_(list(user_ids.values()))).all()
+    }
+    updated_vehicles, new_vehicles = [], []
+    for item in authenticated:
+        user_id = user_ids[item.account.email]
+        for tesla_vehicle in item.vehicles:
+            values = {
+                "user_id": user_id,
+                "tesla_id": str(tesla_vehicle["id"]),
+                "vin": tesla_vehicle["vin"],
+                "color": tesla_vehicle["color"],
+                "name": tesla_vehicle["display_name"],
+            }
+            vehicle_id = vehicle_ids.get((user_id, values["tesla_id"]))
+            if vehicle_id is None:
+                new_vehicles.append(values)
+            else:
+                updated_vehicles.append(dict(values, id=vehicle_id))
+    db.session.bulk_update_mappings(Vehicle, updated_vehicles)
+    if new_vehicles:
+        db.session.execute(Vehicle.__table__.insert().values(new_vehicles))
+    db.session.commit()
+
+    return [Result(item.account.email, len(item.vehicles), None) for item in authenticated]
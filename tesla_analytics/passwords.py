@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import bcrypt
+from flask import current_app
+
+WORKERS = 2
+MAX_PENDING = 8
+MAX_EMAIL_FAILURES = 5
+MAX_ADDRESS_FAILURES = 20
+FAILURE_WINDOW = 15 * 60
+MAX_TRACKED_KEYS = 10000
+
+
+class Saturated(Exception):
+    pass
+
+
+class Throttled(Exception):
+    def __init__(self, retry_after: int):
+        super(Throttled, self).__init__("Too many failed login attempts")
+        self.retry_after = retry_after
+
+
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def check_password(password: str, password_hash: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+
+
+class Verifier(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pending = None
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        self._start()
+        if not self.pending.acquire(blocking=False):
+            raise Saturated("Too many logins in progress")
+        try:
+            future = self.executor.submit(check_password, password, password_hash)
+        except Exception:
+            self.pending.release()
+            raise
+        future.add_done_callback(lambda _: self.pending.release())
+        return future.result()
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.executor = None
+            self.pending = None
+
+    def _start(self):
+        with self.lock:
+            if self.executor is None:
+                config = current_app.config
+                self.executor = ProcessPoolExecutor(max_workers=config.get("LOGIN_WORKERS", WORKERS))
+                self.pending = threading.BoundedSemaphore(config.get("LOGIN_MAX_PENDING", MAX_PENDING))
+
+
+class Throttle(object):
+    def __init__(self, max_keys: int = MAX_TRACKED_KEYS):
+        self.lock = threading.Lock()
+        self.failures = OrderedDict()
+        self.max_keys = max_keys
+
+    def attempt(self, limits: List[Tuple[str, int]]) -> float:
+        now = time.monotonic()
+        with self.lock:
+            for key, limit in limits:
+                failures = self._prune(key, now)
+                if len(failures) >= limit:
+                    raise Throttled(int(failures[0] + FAILURE_WINDOW - now) + 1)
+            for key, _ in limits:
+                self.failures.setdefault(key, deque()).append(now)
+                self.failures.move_to_end(key)
+            while len(self.failures) > self.max_keys:
+                self.failures.popitem(last=False)
+        return now
+
+    def forgive(self, attempted_at: float, *keys):
+        with self.lock:
+            for key in keys:
+                failures = self.failures.get(key)
+                if failures is None:
+                    continue
+                try:
+                    failures.remove(attempted_at)
+                except ValueError:
+                    pass
+                if not failures:
+                    del self.failures[key]
+
+    def reset(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.failures.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.failures.clear()
+
+    def _prune(self, key, now: float) -> deque:
+        failures = self.failures.get(key, deque())
+        while failures and failures[0] <= now - FAILURE_WINDOW:
+            failures.popleft()
+        if not failures:
+            self.failures.pop(key, None)
+        return failures
+
+
+verifier = Verifier()
+throttle = Throttle()
+
+
+def login_limits(email: str, address: str) -> List[Tuple[str, int]]:
+    config = current_app.config
+    return [
+        ("email:{}".format(email.lower()), config.get("LOGIN_MAX_EMAIL_FAILURES", MAX_EMAIL_FAILURES)),
+        ("address:{}".format(address), config.get("LOGIN_MAX_ADDRESS_FAILURES", MAX_ADDRESS_FAILURES)),
+    ]
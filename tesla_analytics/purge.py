@@ -0,0 +1,39 @@
+from typing import Callable
+
+from sqlalchemy import any_, func, literal_column, select
+
+from tesla_analytics.models import db, Vehicle, ChargeState, ClimateState, DriveState, VehicleState, LatestState, \
+    Trip, ChargingSession, HeatmapCell, BatteryDay, EfficiencyBucket, IdlePeriod, Alert
+
+BATCH_SIZE = 10000
+PURGED_MODELS = [ChargeState, ClimateState, DriveState, VehicleState, Trip, ChargingSession, HeatmapCell, BatteryDay,
+                 EfficiencyBucket, IdlePeriod, Alert, LatestState]
+
+
+def purge(vehicle: Vehicle, batch_size: int = BATCH_SIZE, progress: Callable[[str, int], None] = None) -> int:
+    vehicle_id = vehicle.id
+    total = 0
+    for model in PURGED_MODELS:
+        deleted = 0
+        while True:
+            count = delete_batch(model, vehicle_id, batch_size)
+            db.session.commit()
+            if count == 0:
+                break
+            deleted += count
+            if progress is not None:
+                progress(model.__tablename__, deleted)
+        total += deleted
+
+    for model in PURGED_MODELS:
+        total += model.query.filter(model.vehicle_id == vehicle_id).delete(synchronize_session=False)
+    Vehicle.query.filter(Vehicle.id == vehicle_id).delete(synchronize_session=False)
+    db.session.commit()
+    return total
+
+
+def delete_batch(model, vehicle_id: int, batch_size: int) -> int:
+    table = model.__table__
+    ctid = literal_column("ctid")
+    batch = select([ctid]).select_from(table).where(table.c.vehicle_id == vehicle_id).limit(batch_size)
+    return db.session.execute(table.delete().where(ctid == any_(func.array(batch.as_scalar())))).rowcount
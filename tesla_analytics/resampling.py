@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from tesla_analytics import history, stats
+from tesla_analytics.models import db, Vehicle
+
+FILLS = ["previous", "linear", "none"]
+MAX_POINTS = 10000
+MAX_INTERVAL = 366 * 24 * 60 * 60
+
+
+class InvalidResample(Exception):
+    pass
+
+
+def resample(model, vehicle: Vehicle, fields: List[str], interval: timedelta, fill: str = "previous",
+             max_gap: timedelta = timedelta(minutes=10), after: datetime = None, before: datetime = None,
+             chunk_size: int = history.CHUNK_SIZE) -> Dict[str, list]:
+    if fill not in FILLS:
+        raise InvalidResample("Invalid fill '{}', expected one of {}".format(fill, ", ".join(FILLS)))
+    if interval.total_seconds() <= 0 or max_gap.total_seconds() < 0:
+        raise InvalidResample("Interval and max gap must be positive")
+    expressions = [stats.numeric_field(model, field) for field in fields]
+
+    grid = _grid(model, vehicle, interval, after, before)
+    values = np.full((len(fields), len(grid)), np.nan)
+    if len(grid):
+        _fill_grid(values, grid, model, vehicle, expressions, interval, fill, max_gap, chunk_size)
+
+    result = {"timestamp": [
+        history.utc_datetime(point).isoformat() + "Z" for point in grid.tolist()
+    ]}
+    for field, column in zip(fields, values):
+        result[field] = [None if np.isnan(value) else value for value in column.tolist()]
+    return result
+
+
+def _grid(model, vehicle: Vehicle, interval: timedelta, after: datetime = None, before: datetime = None) -> np.ndarray:
+    if after is None or before is None:
+        first, last = db.session.query(func.min(model.timestamp), func.max(model.timestamp)).filter(
+            model.vehicle_id == vehicle.id
+        ).one()
+        if first is None:
+            return np.empty(0)
+        after = after if after is not None else first
+        before = before if before is not None else last
+
+    step = interval.total_seconds()
+    start = np.ceil(history.seconds_of(after) / step) * step
+    end = history.seconds_of(before)
+    if (end - start) / step + 1 > MAX_POINTS:
+        raise InvalidResample("Too many points, at most {} are allowed".format(MAX_POINTS))
+    return np.arange(start, end + step / 2, step) if end >= start else np.empty(0)
+
+
+def _fill_grid(values: np.ndarray, grid: np.ndarray, model, vehicle: Vehicle, expressions: list,
+               interval: timedelta, fill: str, max_gap: timedelta, chunk_size: int):
+    step = interval.total_seconds()
+    gap = max_gap.total_seconds()
+    filled = np.zeros(len(expressions), dtype=int)
+    last_samples = [(np.empty(0), np.empty(0))] * len(expressions)
+
+    reach = timedelta(seconds=max(gap, step))
+    after = history.utc_datetime(grid[0]) - reach
+    before = history.utc_datetime(grid[-1]) + reach
+    for rows in history.chunks(model, vehicle, *expressions, chunk_size=chunk_size, after=after, before=before):
+        seconds = history.seconds([row[0] for row in rows])
+        samples = np.array([row[1:-1] for row in rows], dtype=float).reshape(len(rows), len(expressions))
+        for column in range(len(expressions)):
+            valid = ~np.isnan(samples[:, column])
+            times = np.concatenate((last_samples[column][0], seconds[valid]))
+            column_samples = np.concatenate((last_samples[column][1], samples[valid, column]))
+            if not len(times):
+                continue
+            stop = int(np.searchsorted(grid, times[-1], side="right"))
+            start = filled[column]
+            values[column, start:stop] = _fill(grid[start:stop], times, column_samples, fill, step, gap)
+            filled[column] = max(start, stop)
+            last_samples[column] = (times[-1:], column_samples[-1:])
+
+    for column, (times, column_samples) in enumerate(last_samples):
+        start = filled[column]
+        values[column, start:] = _fill(grid[start:], times, column_samples, fill, step, gap)
+
+
+def _fill(points: np.ndarray, times: np.ndarray, samples: np.ndarray, fill: str, step: float, gap: float) -> np.ndarray:
+    if not len(points) or not len(times):
+        return np.full(len(points), np.nan)
+
+    previous, since = _previous(points, times)
+    found = previous >= 0
+    if fill == "previous":
+        return np.where(found & (since <= gap), samples[previous], np.nan)
+    if fill == "none":
+        return np.where(found & (since < step), samples[previous], np.nan)
+
+    following = np.minimum(previous + 1, len(times) - 1)
+    span = times[following] - times[previous]
+    bracketed = found & (previous + 1 < len(times)) & (span <= gap)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        interpolated = samples[previous] + (samples[following] - samples[previous]) * since / span
+    return np.where(found & (since == 0), samples[previous], np.where(bracketed, interpolated, np.nan))
+
+
+def _previous(points: np.ndarray, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    indexes = np.searchsorted(times, points, side="right") - 1
+    found = indexes >= 0
+    indexes = np.where(found, indexes, 0)
+    return np.where(found, indexes, -1), np.where(found, points - times[indexes], np.nan)
@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Tuple
+
+import numpy as np
+
+from tesla_analytics import history
+from tesla_analytics.geo import EARTH_RADIUS_METERS
+from tesla_analytics.models import Vehicle, DriveState
+
+
+MAX_POINTS = 200000
+
+
+class RouteTooLarge(Exception):
+    pass
+
+
+def route(vehicle: Vehicle, after: datetime = None, before: datetime = None,
+          max_points: int = MAX_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    latitudes, longitudes = [], []
+    count = 0
+    inclusive = "both" if after is not None and before is not None else "neither"
+    for rows in history.chunks(DriveState, vehicle, DriveState.latitude, DriveState.longitude,
+                               after=after, before=before, inclusive=inclusive):
+        count += len(rows)
+        if count > max_points:
+            raise RouteTooLarge("Route has more than {} points, narrow it with 'after' and 'before'".format(
+                max_points
+            ))
+        latitudes.append(np.array([row[1] for row in rows], dtype=float))
+        longitudes.append(np.array([row[2] for row in rows], dtype=float))
+    if not latitudes:
+        return np.array([]), np.array([])
+
+    latitudes, longitudes = np.concatenate(latitudes), np.concatenate(longitudes)
+    located = ~(np.isnan(latitudes) | np.isnan(longitudes))
+    return latitudes[located], longitudes[located]
+
+
+def simplify(latitudes: np.ndarray, longitudes: np.ndarray, tolerance: float) -> np.ndarray:
+    count = len(latitudes)
+    keep = np.zeros(count, dtype=bool)
+    if count < 3:
+        keep[:] = True
+        return keep
+
+    reference = np.radians(np.mean(latitudes))
+    x = np.radians(longitudes) * np.cos(reference) * EARTH_RADIUS_METERS
+    y = np.radians(latitudes) * EARTH_RADIUS_METERS
+
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        px, py = x[start + 1:end] - x[start], y[start + 1:end] - y[start]
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(dx * py - dy * px) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def encode_polyline(latitudes: np.ndarray, longitudes: np.ndarray, precision: int = 5) -> str:
+    values = np.round(np.column_stack((latitudes, longitudes)) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(values, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    deltas = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    characters = []
+    for value in deltas.tolist():
+        while value >= 0x20:
+            characters.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        characters.append(chr(value + 63))
+    return "".join(characters)
+
+
+def geojson(latitudes: np.ndarray, longitudes: np.ndarray) -> dict:
+    return {
+        "type": "LineString",
+        "coordinates": np.column_stack((longitudes, latitudes)).tolist(),
+    }
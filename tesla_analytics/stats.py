@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Float, cast, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+
+from tesla_analytics.models import db, Vehicle, ChargeState, ClimateState, DriveState, VehicleState, \
+    filter_by_time_range
+
+BUCKETS = ["minute", "hour", "day", "week", "month"]
+AGGREGATES = ["avg", "min", "max", "last", "count"]
+NUMERIC_FIELDS = {
+    ChargeState: [
+        "battery_level", "usable_battery_level", "battery_range", "est_battery_range", "ideal_battery_range",
+        "charge_limit_soc", "charge_energy_added", "charge_rate", "charger_power", "charger_voltage",
+        "charger_actual_current", "time_to_full_charge",
+    ],
+    ClimateState: ["inside_temp", "outside_temp", "driver_temp_setting", "passenger_temp_setting", "fan_status"],
+    DriveState: ["heading"],
+    VehicleState: ["odometer"],
+}
+NUMERIC_COLUMNS = {
+    DriveState: ["latitude", "longitude", "power", "speed"],
+}
+
+
+class InvalidAggregation(Exception):
+    pass
+
+
+def parse_fields(value: str) -> List[Tuple[str, str]]:
+    fields = []
+    for item in value.split(","):
+        field, _, aggregate = item.strip().partition(":")
+        if not field or aggregate not in AGGREGATES:
+            raise InvalidAggregation("Invalid field '{}', expected 'name:{}'".format(item, "|".join(AGGREGATES)))
+        fields.append((field, aggregate))
+    return fields
+
+
+def numeric_field(model, field: str):
+    if field in NUMERIC_COLUMNS.get(model, []):
+        return getattr(model, field)
+    if field not in NUMERIC_FIELDS.get(model, []):
+        raise InvalidAggregation("Field '{}' is not numeric".format(field))
+    return cast(model.data.op("->>")(field), Float)
+
+
+def aggregate(model, field: str, name: str):
+    expression = numeric_field(model, field)
+    if name == "avg":
+        return cast(func.avg(expression), Float)
+    elif name == "min":
+        return func.min(expression)
+    elif name == "max":
+        return func.max(expression)
+    elif name == "last":
+        return array_agg(aggregate_order_by(expression, model.timestamp.desc()))[1]
+    elif name == "count":
+        return func.count(expression)
+    raise InvalidAggregation("Unknown aggregate '{}'".format(name))
+
+
+def bucketed(model, vehicle: Vehicle, bucket: str, fields: List[Tuple[str, str]],
+             after: datetime = None, before: datetime = None) -> Dict[str, list]:
+    if bucket not in BUCKETS:
+        raise InvalidAggregation("Invalid bucket '{}', expected one of {}".format(bucket, ", ".join(BUCKETS)))
+
+    bucket_column = func.date_trunc(bucket, model.timestamp).label("bucket")
+    columns = [aggregate(model, field, name) for field, name in fields]
+
+    query = db.session.query(bucket_column, *columns).filter(model.vehicle_id == vehicle.id)
+    query = filter_by_time_range(query, model.timestamp, after, before)
+    rows = query.group_by(bucket_column).order_by(bucket_column).all()
+
+    result = {"timestamp": [row[0].isoformat() + "Z" for row in rows]}
+    for index, (field, name) in enumerate(fields, start=1):
+        result["{}:{}".format(field, name)] = [row[index] for row in rows]
+    return result
@@ -0,0 +1,55 @@
+from typing import Dict, List
+
+from sqlalchemy import func, select
+
+from tesla_analytics import encoding
+from tesla_analytics.models import db, Vehicle, STATE_MODELS
+
+STATE_TYPES = ["charge", "climate", "drive", "vehicle"]
+LIMIT = 500
+WRITE_LOCK = 0x53594E43
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def parse_token(token: str = None) -> List[int]:
+    if not token:
+        return [0] * len(STATE_TYPES)
+    try:
+        positions = [int(part) for part in token.split("-")]
+    except ValueError:
+        raise InvalidToken("Invalid sync token '{}'".format(token))
+    if len(positions) != len(STATE_TYPES) or any(position < 0 for position in positions):
+        raise InvalidToken("Invalid sync token '{}'".format(token))
+    return positions
+
+
+def encode_token(positions: List[int]) -> str:
+    return "-".join(str(position) for position in positions)
+
+
+def lock_writes(vehicle: Vehicle):
+    db.session.execute(select([func.pg_advisory_xact_lock(WRITE_LOCK, vehicle.id)]))
+
+
+def changes(vehicle: Vehicle, token: str = None, limit: int = LIMIT) -> Dict:
+    positions = parse_token(token)
+    result = {}
+    more = False
+    for index, state_type in enumerate(STATE_TYPES):
+        model = STATE_MODELS[state_type]
+        rows = model.query.with_entities(model.id, *encoding.serialized_columns(model)).filter(
+            model.vehicle_id == vehicle.id,
+            model.id > positions[index]
+        ).order_by(model.id).limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            more = True
+        if rows:
+            positions[index] = rows[-1][0]
+        result[state_type] = encoding.serialize_rows(model, [row[1:] for row in rows])
+    result["token"] = encode_token(positions)
+    result["more"] = more
+    return result
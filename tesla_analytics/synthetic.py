@@ -0,0 +1,326 @@
+import io
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator
+
+import numpy as np
+
+from tesla_analytics import battery, charging, drain, efficiency, geo, heatmap, history, passwords, purge, sync, \
+    trips, workers
+from tesla_analytics.models import db, User, Vehicle, ChargeState, ClimateState, DriveState, VehicleState
+
+START = datetime(2018, 1, 1)
+BATCH_SIZE = 50000
+PARKED_INTERVAL = 600
+DRIVE_INTERVAL = 15
+CHARGE_INTERVAL = 60
+CAPACITY = 75.0
+RATED_RANGE = 310.0
+CONSUMPTION = 0.29
+ROAD_FACTOR = 1.3
+MAX_SPEED = 85
+PARKED_DRAIN = 0.6
+CHARGE_LIMIT = 90
+HOME_CHARGER_POWER = 11.0
+COLORS = ["Black", "White", "Red", "Blue", "Silver"]
+
+FIELDS = ["time", "battery_level", "charging_state", "charge_energy_added", "charger_power", "latitude", "longitude",
+          "power", "speed", "shift_state", "heading", "outside_temp", "inside_temp", "is_climate_on", "odometer",
+          "locked"]
+
+
+class Simulation(object):
+    def __init__(self, rng: np.random.Generator, start: datetime):
+        self.rng = rng
+        self.time = _seconds(start)
+        self.level = float(rng.uniform(60, 90))
+        self.odometer = float(rng.uniform(0, 20000))
+        self.energy_added = 0.0
+        self.plugged = False
+        self.home = (37.3 + float(rng.uniform(0, 0.5)), -122.2 + float(rng.uniform(0, 0.4)))
+        self.work = (self.home[0] + float(rng.uniform(-0.2, 0.2)), self.home[1] + float(rng.uniform(-0.2, 0.2)))
+        self.position = self.home
+        self.columns = {name: [] for name in FIELDS}
+        self.polls = 0
+
+    def run(self, days: int, batch_size: int = BATCH_SIZE) -> Iterator[Dict[str, np.ndarray]]:
+        day_start = self.time
+        for _ in range(days):
+            self.day(day_start)
+            day_start += 86400
+            if self.polls >= batch_size:
+                yield self.flush()
+        self.park(day_start, self.plugged)
+        if self.polls:
+            yield self.flush()
+
+    def day(self, day_start: float):
+        weekday = history.utc_datetime(day_start).weekday()
+        if weekday < 5:
+            self.park(day_start + 3600 * float(self.rng.normal(7.5, 0.5)), self.plugged)
+            self.drive(self.work, 35)
+            self.park(day_start + 3600 * float(self.rng.normal(17.5, 0.5)))
+            self.drive(self.home, 30)
+            if self.rng.random() < 0.3:
+                self.errand(float(self.rng.uniform(0.02, 0.08)), 3600)
+        elif self.rng.random() < 0.6:
+            self.park(day_start + 3600 * float(self.rng.uniform(9, 12)), self.plugged)
+            self.errand(float(self.rng.uniform(0.1, 0.6)), 3600 * float(self.rng.uniform(2, 4)))
+
+        if self.level < 60 or self.rng.random() < 0.3:
+            self.park(self.time + 1800)
+            self.charge()
+
+    def errand(self, radius: float, duration: float):
+        angle = float(self.rng.uniform(0, 2 * np.pi))
+        destination = (self.home[0] + radius * np.sin(angle), self.home[1] + radius * np.cos(angle))
+        self.drive(destination, 40)
+        self.park(self.time + duration)
+        self.drive(self.home, 40)
+
+    def park(self, until: float, plugged: bool = False):
+        times = np.arange(self.time, until, PARKED_INTERVAL)
+        if len(times):
+            if plugged:
+                levels = np.full(len(times), self.level)
+            else:
+                levels = self.level - PARKED_DRAIN * (times - self.time) / 86400
+            self._append(
+                times,
+                battery_level=levels,
+                charging_state="Complete" if plugged else "Disconnected",
+                charge_energy_added=self.energy_added,
+                charger_power=0.0,
+                latitude=self.position[0],
+                longitude=self.position[1],
+                power=0.0,
+                speed=np.nan,
+                shift_state=None,
+                heading=np.nan,
+                is_climate_on=False,
+                odometer=self.odometer,
+                locked=True,
+            )
+            if not plugged:
+                self.level -= PARKED_DRAIN * (until - self.time) / 86400
+        self.time = max(self.time, until)
+        self.plugged = plugged
+
+    def drive(self, destination, average_speed: float):
+        distance = float(geo.haversine(self.position[0], self.position[1], destination[0], destination[1])) * \
+            ROAD_FACTOR
+        duration = max(distance / average_speed * 3600 * float(self.rng.uniform(0.9, 1.2)), 2 * DRIVE_INTERVAL)
+        count = int(duration // DRIVE_INTERVAL) + 1
+        times = self.time + np.arange(count) * DRIVE_INTERVAL
+
+        profile = np.clip(np.sin(np.linspace(0, np.pi, count)) * 3, 0, 1) * \
+            np.clip(1 + 0.15 * self.rng.standard_normal(count), 0.3, None)
+        profile[[0, -1]] = 0
+        steps = np.concatenate(([0.0], (profile[:-1] + profile[1:]) / 2))
+        scale = distance / max(steps.sum(), 1e-9)
+        speeds = np.minimum(profile * scale / DRIVE_INTERVAL * 3600, MAX_SPEED)
+        travelled = np.cumsum(steps * scale)
+
+        fraction = travelled / max(distance, 1e-9)
+        wobble = 0.003 * np.sin(np.pi * fraction * float(self.rng.integers(1, 4)))
+        latitudes = self.position[0] + (destination[0] - self.position[0]) * fraction + wobble
+        longitudes = self.position[1] + (destination[1] - self.position[1]) * fraction - wobble
+        powers = speeds * CONSUMPTION * (1 + 0.2 * self.rng.standard_normal(count))
+        powers = np.where(np.diff(speeds, prepend=0) < -5, -powers / 2, powers)
+        headings = np.degrees(np.arctan2(np.diff(longitudes, append=longitudes[-1]),
+                                         np.diff(latitudes, append=latitudes[-1]))) % 360
+        used = travelled * CONSUMPTION / CAPACITY * 100
+
+        self._append(
+            times,
+            battery_level=self.level - used,
+            charging_state="Disconnected",
+            charge_energy_added=self.energy_added,
+            charger_power=0.0,
+            latitude=latitudes,
+            longitude=longitudes,
+            power=powers,
+            speed=np.round(speeds),
+            shift_state="D",
+            heading=np.round(headings),
+            is_climate_on=True,
+            odometer=self.odometer + travelled,
+            locked=False,
+        )
+        self.level -= float(used[-1])
+        self.odometer += distance
+        self.position = destination
+        self.time = float(times[-1]) + DRIVE_INTERVAL
+        self.plugged = False
+
+    def charge(self):
+        needed = (CHARGE_LIMIT - self.level) / 100 * CAPACITY
+        if needed <= 0.5:
+            self.plugged = True
+            return
+        power = HOME_CHARGER_POWER * float(self.rng.uniform(0.9, 1.0))
+        duration = needed / power * 3600
+        times = np.arange(self.time, self.time + duration, CHARGE_INTERVAL)
+        energies = (times - self.time) / 3600 * power
+        self._append(
+            times,
+            battery_level=self.level + energies / CAPACITY * 100,
+            charging_state="Charging",
+            charge_energy_added=energies,
+            charger_power=np.round(power),
+            latitude=self.position[0],
+            longitude=self.position[1],
+            power=0.0,
+            speed=np.nan,
+            shift_state="P",
+            heading=np.nan,
+            is_climate_on=False,
+            odometer=self.odometer,
+            locked=True,
+        )
+        self.level = float(CHARGE_LIMIT)
+        self.energy_added = needed
+        self.time += duration
+        self.plugged = True
+
+    def flush(self) -> Dict[str, np.ndarray]:
+        columns = {name: np.concatenate(values) for name, values in self.columns.items()}
+        self.columns = {name: [] for name in FIELDS}
+        self.polls = 0
+        return columns
+
+    def _append(self, times: np.ndarray, **values):
+        count = len(times)
+        values["time"] = times
+        values["outside_temp"] = _outside_temperatures(times) + self.rng.normal(0, 1, count)
+        solar = 10 * np.clip(np.sin((_hours(times) - 6) / 12 * np.pi), 0, None)
+        values["inside_temp"] = np.where(values["is_climate_on"], 21.0, values["outside_temp"] + solar)
+        for name in FIELDS:
+            value = values[name]
+            if isinstance(value, np.ndarray) and value.shape == (count,):
+                self.columns[name].append(value)
+            else:
+                self.columns[name].append(np.full(count, value, dtype=object if value is None or
+                                                  isinstance(value, str) else None))
+        self.polls += count
+
+
+def generate(vehicles: int = 1, years: float = 1.0, seed: int = 0, email: str = "seed@example.com",
+             password: str = "seed", start: datetime = START, batch_size: int = BATCH_SIZE,
+             progress: Callable[[Vehicle, int, datetime], None] = None) -> int:
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        user = User(email=email, password_hash=passwords.hash_password(password))
+        db.session.add(user)
+
+    total = 0
+    days = int(round(years * 365))
+    for index in range(vehicles):
+        tesla_id = "seed-{}-{}".format(seed, index)
+        for existing in Vehicle.query.filter_by(tesla_id=tesla_id).all():
+            purge.purge(existing)
+        vehicle = Vehicle(
+            tesla_id=tesla_id,
+            vin="5YJSEED{:05d}{:05d}".format(seed % 100000, index),
+            color=COLORS[index % len(COLORS)],
+            name="Seed {}".format(index + 1),
+            user=user,
+        )
+        db.session.add(vehicle)
+        db.session.flush()
+
+        simulation = Simulation(np.random.default_rng([seed, index]), start)
+        loaded = 0
+        until = start
+        for columns in simulation.run(days, batch_size):
+            loaded += copy_polls(vehicle, columns)
+            until = history.utc_datetime(float(columns["time"][-1]))
+            if progress is not None:
+                progress(vehicle, loaded, until)
+        db.session.commit()
+        rebuild_derived(vehicle, until)
+        total += loaded
+    return total
+
+
+def rebuild_derived(vehicle: Vehicle, until: datetime):
+    trips.rebuild(vehicle)
+    charging.rebuild(vehicle)
+    drain.rebuild(vehicle)
+    heatmap.rebuild(vehicle)
+    efficiency.rebuild(vehicle)
+    battery.rebuild(vehicle, today=until.date() + timedelta(days=1))
+    workers.update_latest_state(vehicle, **{
+        model.__tablename__: model.query.filter_by(vehicle_id=vehicle.id).order_by(model.timestamp.desc()).first()
+        for model in [ChargeState, ClimateState, DriveState, VehicleState]
+    })
+    db.session.commit()
+
+
+def copy_polls(vehicle: Vehicle, columns: Dict[str, np.ndarray]) -> int:
+    timestamps = np.datetime_as_string(np.round(columns["time"] * 1e6).astype(np.int64).astype("datetime64[us]"))
+    gps_as_of = np.datetime_as_string(np.floor(columns["time"]).astype(np.int64).astype("datetime64[s]"))
+    cells = geo.cell(columns["latitude"], columns["longitude"])
+    vehicle_id = str(vehicle.id)
+
+    levels = columns["battery_level"].tolist()
+    charge_lines = [
+        '{}\t{{"charging_state": "{}", "battery_level": {:.0f}, "usable_battery_level": {:.0f}, '
+        '"battery_range": {:.2f}, "ideal_battery_range": {:.2f}, "charge_energy_added": {:.2f}, '
+        '"charger_power": {:.0f}, "charge_limit_soc": {}}}\t{}\n'.format(
+            timestamp, state, level, max(level - 1, 0), level / 100 * RATED_RANGE, level / 100 * RATED_RANGE * 1.05,
+            energy, power, CHARGE_LIMIT, vehicle_id
+        ) for timestamp, state, level, energy, power in zip(
+            timestamps, columns["charging_state"].tolist(), levels, columns["charge_energy_added"].tolist(),
+            columns["charger_power"].tolist()
+        )
+    ]
+    climate_lines = [
+        '{}\t{{"inside_temp": {:.1f}, "outside_temp": {:.1f}, "driver_temp_setting": 21.0, '
+        '"is_climate_on": {}, "fan_status": {}}}\t{}\n'.format(
+            timestamp, inside, outside, "true" if on else "false", 3 if on else 0, vehicle_id
+        ) for timestamp, inside, outside, on in zip(
+            timestamps, columns["inside_temp"].tolist(), columns["outside_temp"].tolist(),
+            columns["is_climate_on"].tolist()
+        )
+    ]
+    drive_lines = [
+        '{}\t{}\t{:.6f}\t{:.6f}\t{:.1f}\t{}\t{}\t{}\t{{"heading": {}}}\t{}\n'.format(
+            timestamp, gps, latitude, longitude, power, shift_state or "\\N",
+            "\\N" if speed != speed else int(speed), cell, "null" if heading != heading else int(heading), vehicle_id
+        ) for timestamp, gps, latitude, longitude, power, shift_state, speed, cell, heading in zip(
+            timestamps, gps_as_of, columns["latitude"].tolist(), columns["longitude"].tolist(),
+            columns["power"].tolist(), columns["shift_state"].tolist(), columns["speed"].tolist(), cells.tolist(),
+            columns["heading"].tolist()
+        )
+    ]
+    vehicle_lines = [
+        '{}\t{{"odometer": {:.1f}, "locked": {}, "car_version": "2018.4.1", "sentry_mode": false}}\t{}\n'.format(
+            timestamp, odometer, "true" if locked else "false", vehicle_id
+        ) for timestamp, odometer, locked in zip(timestamps, columns["odometer"].tolist(), columns["locked"].tolist())
+    ]
+
+    sync.lock_writes(vehicle)
+    cursor = db.session.connection().connection.cursor()
+    _copy(cursor, "charge_state", ["timestamp", "data", "vehicle_id"], charge_lines)
+    _copy(cursor, "climate_state", ["timestamp", "data", "vehicle_id"], climate_lines)
+    _copy(cursor, "drive_state", ["timestamp", "gps_as_of", "latitude", "longitude", "power", "shift_state", "speed",
+                                  "cell", "data", "vehicle_id"], drive_lines)
+    _copy(cursor, "vehicle_state", ["timestamp", "data", "vehicle_id"], vehicle_lines)
+    return 4 * len(timestamps)
+
+
+def _copy(cursor, table: str, columns, lines):
+    cursor.copy_expert("COPY {} ({}) FROM STDIN".format(table, ", ".join(columns)), io.StringIO("".join(lines)))
+
+
+def _outside_temperatures(times: np.ndarray) -> np.ndarray:
+    day_of_year = (times / 86400) % 365.25
+    return 15 + 8 * np.sin(2 * np.pi * (day_of_year - 110) / 365.25) + 6 * np.sin((_hours(times) - 9) / 24 * 2 * np.pi)
+
+
+def _hours(times: np.ndarray) -> np.ndarray:
+    return (times % 86400) / 3600
+
+
+def _seconds(timestamp: datetime) -> float:
+    return (timestamp - datetime(1970, 1, 1)).total_seconds()
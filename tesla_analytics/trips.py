@@ -0,0 +1,84 @@
+from datetime import timedelta
+from typing import List, Sequence
+
+import numpy as np
+
+from tesla_analytics import history
+from tesla_analytics.geo import haversine
+from tesla_analytics.models import db, Vehicle, DriveState, Trip
+
+DRIVING_SHIFT_STATES = ["D", "N", "R"]
+MAX_GAP = timedelta(minutes=10)
+
+
+def record(vehicle: Vehicle, drive_state: DriveState):
+    open_trip = Trip.query.filter_by(vehicle_id=vehicle.id, in_progress=True).first()
+    row = (drive_state.timestamp, drive_state.latitude, drive_state.longitude, drive_state.power,
+           drive_state.shift_state)
+    db.session.add_all(segment(vehicle, [row], open_trip))
+
+
+def rebuild(vehicle: Vehicle, chunk_size: int = history.CHUNK_SIZE) -> int:
+    Trip.query.filter_by(vehicle_id=vehicle.id).delete()
+
+    open_trip = None
+    count = 0
+    for rows in history.chunks(DriveState, vehicle, DriveState.latitude, DriveState.longitude, DriveState.power,
+                               DriveState.shift_state, chunk_size=chunk_size):
+        trips = segment(vehicle, rows, open_trip)
+        db.session.add_all(trips)
+        count += len(trips) - (1 if open_trip is not None else 0)
+        open_trip = trips[-1] if trips and trips[-1].in_progress else None
+    db.session.commit()
+    return count
+
+
+def segment(vehicle: Vehicle, rows: Sequence, open_trip: Trip = None) -> List[Trip]:
+    timestamps, latitudes, longitudes, powers, shift_states = (list(column) for column in list(zip(*rows))[:5])
+    latitudes = np.array(latitudes, dtype=float)
+    longitudes = np.array(longitudes, dtype=float)
+    powers = np.nan_to_num(np.array(powers, dtype=float))
+    driving = np.isin(np.array(shift_states, dtype=object), DRIVING_SHIFT_STATES)
+
+    segments = history.runs(
+        history.seconds(timestamps),
+        driving,
+        MAX_GAP,
+        open_trip.end_time if open_trip is not None else None
+    )
+    previous_latitudes = history.shifted(latitudes, open_trip.end_latitude if open_trip is not None else None)
+    previous_longitudes = history.shifted(longitudes, open_trip.end_longitude if open_trip is not None else None)
+    distances = np.where(
+        segments.connected,
+        np.nan_to_num(haversine(previous_latitudes, previous_longitudes, latitudes, longitudes)),
+        0.0
+    )
+    energies = np.where(segments.connected, powers * segments.elapsed / 3600.0, 0.0)
+
+    trips = [open_trip] if open_trip is not None else []
+    for index in np.flatnonzero(segments.starts):
+        trips.append(Trip(
+            vehicle=vehicle,
+            start_time=timestamps[index],
+            start_latitude=history.optional_float(latitudes[index]),
+            start_longitude=history.optional_float(longitudes[index]),
+            distance=0.0,
+            energy=0.0,
+        ))
+
+    member_labels = segments.labels[segments.members]
+    total_distances = np.bincount(member_labels, weights=distances[segments.members], minlength=len(trips))
+    total_energies = np.bincount(member_labels, weights=energies[segments.members], minlength=len(trips))
+
+    for label, trip in enumerate(trips):
+        trip.distance = float(trip.distance + total_distances[label])
+        trip.energy = float(trip.energy + total_energies[label])
+        last_index = segments.last_indexes[label]
+        if last_index < 0:
+            trip.in_progress = False
+            continue
+        trip.end_time = timestamps[last_index]
+        trip.end_latitude = history.optional_float(latitudes[last_index])
+        trip.end_longitude = history.optional_float(longitudes[last_index])
+        trip.in_progress = bool(last_index == len(timestamps) - 1 and driving[last_index])
+    return trips
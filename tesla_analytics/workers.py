@@ -3,7 +3,10 @@ from logging import Logger
 from typing import Callable
 from urllib import error as urlliberror
 
-from tesla_analytics.models import Vehicle, ChargeState, ClimateState, DriveState, VehicleState, db, User
+from sqlalchemy.dialects.postgresql import insert
+
+from tesla_analytics import anomalies, charging, drain, efficiency, heatmap, live, sync, trips
+from tesla_analytics.models import Vehicle, ChargeState, ClimateState, DriveState, VehicleState, db, User, LatestState
 from tesla_analytics.tesla_service import TeslaService
 
 
@@ -11,7 +14,9 @@ LOG = Logger(__name__)
 
 
 def monitor():
-    for user in User.query.filter(User.tesla_access_token.isnot(None)).all():
+    users = User.query.filter(User.tesla_access_token.isnot(None)).all()
+    anomalies.pipeline.retain({vehicle.id for user in users for vehicle in user.vehicles})
+    for user in users:
         for vehicle in user.vehicles:
             if vehicle.next_update_time is None or vehicle.next_update_time < current_time():
                 try:
@@ -28,7 +33,7 @@ def monitor():
 
 
 def notify_user_of_bad_token(user):
-    pass
+    anomalies.emit(user, None, "bad_token", current_time())
 
 
 def vehicle_poller(vehicle: Vehicle) -> datetime:
@@ -52,10 +57,22 @@ def vehicle_poller(vehicle: Vehicle) -> datetime:
         LOG.exception("Encountered error trying to fetch data, retrying in 2 minutes")
         return current_time() + timedelta(minutes=2)
 
-    add_item_to_db(lambda: ChargeState(charge, vehicle=vehicle))
-    add_item_to_db(lambda: ClimateState(climate, vehicle=vehicle))
-    add_item_to_db(lambda: DriveState(position, vehicle=vehicle))
-    add_item_to_db(lambda: VehicleState(vehicle_state, vehicle=vehicle))
+    sync.lock_writes(vehicle)
+    states = {
+        "charge_state": add_item_to_db(lambda: ChargeState(charge, vehicle=vehicle)),
+        "climate_state": add_item_to_db(lambda: ClimateState(climate, vehicle=vehicle)),
+        "drive_state": add_item_to_db(lambda: DriveState(position, vehicle=vehicle)),
+        "vehicle_state": add_item_to_db(lambda: VehicleState(vehicle_state, vehicle=vehicle)),
+    }
+    update_latest_state(vehicle, **states)
+    if states["drive_state"] is not None:
+        trips.record(vehicle, states["drive_state"])
+        heatmap.record(vehicle, states["drive_state"])
+        efficiency.record(vehicle, states["drive_state"])
+    if states["charge_state"] is not None:
+        charging.record(vehicle, states["charge_state"])
+        drain.record(vehicle, states["charge_state"], states["drive_state"])
+    anomalies.detect(vehicle, current_time(), states["charge_state"], states["climate_state"], states["drive_state"])
     db.session.commit()
 
     LOG.info("Successfully pulled and stored car data")
@@ -69,9 +86,25 @@ def vehicle_poller(vehicle: Vehicle) -> datetime:
 
 def add_item_to_db(fn: Callable):
     try:
-        db.session.add(fn())
+        item = fn()
     except KeyError:
         LOG.exception("Encountered KeyError while trying to store data")
+        return None
+    db.session.add(item)
+    return item
+
+
+def update_latest_state(vehicle: Vehicle, **states):
+    sections = {name: state.serialize() for name, state in states.items() if state is not None}
+    if not sections:
+        return
+
+    statement = insert(LatestState.__table__).values(vehicle_id=vehicle.id, updated_at=current_time(), **sections)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[LatestState.vehicle_id],
+        set_={name: statement.excluded[name] for name in ["updated_at", *sections]}
+    ))
+    live.publish(vehicle)
 
 
 def current_time() -> datetime:
@@ -0,0 +1,574 @@
+import struct
+from datetime import date, datetime, timedelta
+from typing import List, Dict
+
+from flask_jwt_extended import create_access_token
+from shared_context import behaves_like
+from sqlalchemy import event
+
+from tesla_analytics import efficiency, heatmap
+from tesla_analytics.api import analytics_controller
+from tesla_analytics.models import db, Alert, Trip, ChargingSession, DriveState, BatteryDay, EfficiencyBucket, IdlePeriod
+from tests.api import APITestCase
+from tests.api.shared_tests import requires_user_auth, requires_vehicle
+from tests.helpers import drive_data
+from tests.test_worker import create_user, create_vehicle
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class TripsTests(APITestCase):
+    blueprint = analytics_controller.blueprint
+    endpoint = "/trips"
+
+    def setUp(self):
+        super(TripsTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        start = datetime(2018, 2, 14, 8, 0, 0)
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            trips = [
+                Trip(
+                    vehicle=vehicle,
+                    in_progress=False,
+                    start_time=start - timedelta(hours=i),
+                    end_time=start - timedelta(hours=i) + timedelta(minutes=30),
+                    start_latitude=37.548271,
+                    start_longitude=-121.988571,
+                    end_latitude=37.4,
+                    end_longitude=-122.1,
+                    distance=12.5,
+                    energy=3.5,
+                ) for i in range(amount_to_generate)
+            ]
+            db.session.add_all(trips)
+            db.session.commit()
+            return [trip.serialize() for trip in trips]
+
+    def test_returns_trips_newest_first(self):
+        generated = self.generate_items(3)
+
+        result = self.test_app.get(
+            "/trips?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, generated)
+        self.assertEqual(result.json[0], {
+            "start_time": "2018-02-14T08:00:00Z",
+            "end_time": "2018-02-14T08:30:00Z",
+            "duration": 1800.0,
+            "distance": 12.5,
+            "energy": 3.5,
+            "efficiency": 280.0,
+            "start": {"latitude": 37.548271, "longitude": -121.988571},
+            "end": {"latitude": 37.4, "longitude": -122.1},
+            "in_progress": False,
+        })
+
+    def test_filters_by_start_time(self):
+        generated = self.generate_items(3)
+
+        result = self.test_app.get(
+            "/trips?vehicle_id=test_id&before=2018-02-14T07:30:00.000000Z",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, generated[1:])
+
+    def test_pages_results_by_50(self):
+        generated = self.generate_items(51)
+
+        result = self.test_app.get(
+            "/trips?vehicle_id=test_id&page=2",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, generated[50:])
+        self.assertEqual(
+            result.headers["Link"],
+            '<http://localhost/trips?vehicle_id=test_id&page=1>; rel="prev", '
+            '<http://localhost/trips?vehicle_id=test_id&page=1>; rel="first"'
+        )
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class ChargingSessionsTests(APITestCase):
+    blueprint = analytics_controller.blueprint
+    endpoint = "/charging_sessions"
+
+    def setUp(self):
+        super(ChargingSessionsTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        start = datetime(2018, 3, 1, 20, 0, 0)
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            sessions = [
+                ChargingSession(
+                    vehicle=vehicle,
+                    in_progress=False,
+                    start_time=start - timedelta(days=i),
+                    end_time=start - timedelta(days=i) + timedelta(hours=2),
+                    energy_added=20.0,
+                    peak_power=11.0,
+                    start_battery_level=40.0,
+                    end_battery_level=80.0,
+                ) for i in range(amount_to_generate)
+            ]
+            db.session.add_all(sessions)
+            db.session.commit()
+            return [session.serialize() for session in sessions]
+
+    def test_returns_sessions_newest_first(self):
+        generated = self.generate_items(3)
+
+        result = self.test_app.get(
+            "/charging_sessions?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, generated)
+
+    def test_summarizes_energy_per_month(self):
+        self.generate_items(3)
+
+        result = self.test_app.get(
+            "/charging_sessions/summary?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, [
+            {"timestamp": "2018-02-01T00:00:00Z", "sessions": 2, "energy_added": 40.0, "duration": 14400.0},
+            {"timestamp": "2018-03-01T00:00:00Z", "sessions": 1, "energy_added": 20.0, "duration": 7200.0},
+        ])
+
+    def test_summary_returns_400_for_unknown_bucket(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/charging_sessions/summary?vehicle_id=test_id&bucket=fortnight",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class IdlePeriodsTests(APITestCase):
+    blueprint = analytics_controller.blueprint
+    endpoint = "/idle_periods"
+
+    def setUp(self):
+        super(IdlePeriodsTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        start = datetime(2018, 3, 1, 20, 0, 0)
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            periods = [
+                IdlePeriod(
+                    vehicle=vehicle,
+                    in_progress=False,
+                    start_time=start - timedelta(days=i),
+                    end_time=start - timedelta(days=i) + timedelta(hours=12),
+                    start_battery_level=80.0,
+                    end_battery_level=79.0,
+                    start_range=200.0,
+                    end_range=197.5,
+                ) for i in range(amount_to_generate)
+            ]
+            db.session.add_all(periods)
+            db.session.commit()
+            return [period.serialize() for period in periods]
+
+    def test_returns_periods_newest_first(self):
+        generated = self.generate_items(3)
+
+        result = self.test_app.get(
+            "/idle_periods?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, generated)
+        self.assertEqual(result.json[0]["drain_rate"], 2.0)
+
+    def test_summarizes_drain_per_day(self):
+        self.generate_items(2)
+
+        result = self.test_app.get(
+            "/idle_periods/summary?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual([(day["timestamp"], day["periods"], day["duration"]) for day in result.json], [
+            ("2018-02-28T00:00:00Z", 1, 14400.0),
+            ("2018-03-01T00:00:00Z", 2, 43200.0),
+            ("2018-03-02T00:00:00Z", 1, 28800.0),
+        ])
+        self.assertAlmostEqual(sum(day["level_lost"] for day in result.json), 2.0)
+        for day in result.json:
+            self.assertAlmostEqual(day["drain_rate"], 2.0)
+
+    def test_summary_returns_400_for_unknown_bucket(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/idle_periods/summary?vehicle_id=test_id&bucket=fortnight",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+
+
+@behaves_like(*requires_user_auth())
+class AlertsTests(APITestCase):
+    blueprint = analytics_controller.blueprint
+    endpoint = "/alerts"
+
+    def setUp(self):
+        super(AlertsTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def test_returns_users_alerts_newest_first(self):
+        start = datetime(2018, 2, 14, 20, 0, 0)
+        other_user = create_user("other@example.com", "test_2")
+        vehicle = create_vehicle("test_id", self.user)
+        db.session.add_all([
+            Alert(user=self.user, vehicle=vehicle, kind="parked_drain", timestamp=start, details={"minutes": 30.0}),
+            Alert(user=self.user, kind="bad_token", timestamp=start + timedelta(hours=1)),
+            Alert(user=other_user, kind="bad_token", timestamp=start),
+        ])
+        db.session.commit()
+
+        result = self.test_app.get("/alerts", headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())})
+
+        self.assert200(result)
+        self.assertEqual(result.json, [
+            {"kind": "bad_token", "timestamp": "2018-02-14T21:00:00Z", "vehicle_id": None, "details": None},
+            {"kind": "parked_drain", "timestamp": "2018-02-14T20:00:00Z", "vehicle_id": "test_id",
+             "details": {"minutes": 30.0}},
+        ])
+
+
+    def test_loads_alert_vehicles_with_the_alerts(self):
+        start = datetime(2018, 2, 14, 20, 0, 0)
+        vehicles = [create_vehicle("test_id_{}".format(index), self.user) for index in range(3)]
+        db.session.add_all([
+            Alert(user=self.user, vehicle=vehicle, kind="parked_drain", timestamp=start) for vehicle in vehicles
+        ])
+        db.session.commit()
+        db.session.expunge_all()
+        statements = []
+
+        def record(connection, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            result = self.test_app.get("/alerts", headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())})
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assert200(result)
+        self.assertEqual(len(result.json), 3)
+        self.assertFalse([statement for statement in statements if statement.lstrip().startswith("SELECT vehicle.")])
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class RouteTests(APITestCase):
+    blueprint = analytics_controller.blueprint
+    endpoint = "/route"
+
+    def setUp(self):
+        super(RouteTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        start = datetime(2018, 2, 14, 8, 0, 0)
+        states = [
+            drive_data(start + timedelta(seconds=15 * i), "D", 38.5, -120.2 + 0.001 * i)
+            for i in range(amount_to_generate)
+        ]
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            for state in states:
+                db.session.add(DriveState(state, vehicle=vehicle))
+            db.session.commit()
+        return states
+
+    def test_returns_simplified_geojson_line(self):
+        self.generate_items(10)
+
+        result = self.test_app.get(
+            "/route?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, {
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": [[-120.2, 38.5], [-120.191, 38.5]]},
+            "properties": {"points": 2, "original_points": 10},
+        })
+
+    def test_can_return_encoded_polyline(self):
+        self.generate_items(10)
+
+        result = self.test_app.get(
+            "/route?vehicle_id=test_id&format=polyline",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, {"polyline": "_p~iF~ps|U?gw@", "points": 2, "original_points": 10})
+
+    def test_includes_states_on_both_time_range_bounds(self):
+        self.generate_items(10)
+
+        result = self.test_app.get(
+            "/route?vehicle_id=test_id&tolerance=0"
+            "&after=2018-02-14T08:00:30.000000Z&before=2018-02-14T08:01:30.000000Z",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json["properties"], {"points": 2, "original_points": 5})
+
+    def test_returns_400_when_route_has_too_many_points(self):
+        self.generate_items(10)
+        self.app.config["ROUTE_MAX_POINTS"] = 5
+
+        result = self.test_app.get(
+            "/route?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertEqual(result.json, {
+            "error": "Route has more than 5 points, narrow it with 'after' and 'before'"
+        })
+
+    def test_returns_400_for_unknown_format(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/route?vehicle_id=test_id&format=kml",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class HeatmapTests(APITestCase):
+    blueprint = analytics_controller.blueprint
+    endpoint = "/heatmap"
+
+    def setUp(self):
+        super(HeatmapTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        start = datetime(2018, 2, 14, 8, 0, 0)
+        states = [drive_data(start + timedelta(minutes=i), "P", 37.548271, -121.988571)
+                  for i in range(amount_to_generate)]
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            for state in states:
+                drive_state = DriveState(state, vehicle=vehicle)
+                db.session.add(drive_state)
+                heatmap.record(vehicle, drive_state)
+            db.session.commit()
+        return states
+
+    def test_returns_counts_per_cell(self):
+        self.generate_items(3)
+
+        result = self.test_app.get(
+            "/heatmap?vehicle_id=test_id&level=8",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, {
+            "level": 8,
+            "latitude": [37.6171875],
+            "longitude": [-121.640625],
+            "count": [3],
+        })
+
+    def test_can_return_packed_binary_cells(self):
+        self.generate_items(3)
+
+        result = self.test_app.get(
+            "/heatmap?vehicle_id=test_id&level=8&format=binary&south=37&west=-122.5&north=38&east=-121.5",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.headers["X-Heatmap-Level"], "8")
+        self.assertEqual(result.data, struct.pack("<ffI", 37.6171875, -121.640625, 3))
+
+    def test_returns_400_for_unsupported_level(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/heatmap?vehicle_id=test_id&level=9",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class BatteryTests(APITestCase):
+    blueprint = analytics_controller.blueprint
+    endpoint = "/battery"
+
+    def setUp(self):
+        super(BatteryTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            battery_days = [
+                BatteryDay(
+                    vehicle_id=vehicle.id,
+                    day=date(2018, 2, 12) + timedelta(days=i),
+                    samples=10,
+                    estimated_range=300.0 - i,
+                    estimated_ideal_range=330.0 - i,
+                    estimated_capacity=None
+                ) for i in range(amount_to_generate)
+            ]
+            db.session.add_all(battery_days)
+            db.session.commit()
+            return [day.serialize() for day in battery_days]
+
+    def test_returns_daily_estimates_and_trend(self):
+        generated = self.generate_items(3)
+
+        result = self.test_app.get(
+            "/battery?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json["days"], generated)
+        self.assertAlmostEqual(result.json["trend"]["estimated_range"]["per_year"], -365.25)
+        self.assertAlmostEqual(result.json["trend"]["estimated_ideal_range"]["current"], 328.0)
+        self.assertIsNone(result.json["trend"]["estimated_capacity"])
+
+    def test_restricts_to_time_range(self):
+        generated = self.generate_items(3)
+
+        result = self.test_app.get(
+            "/battery?vehicle_id=test_id&after=2018-02-13T00:00:00.000000Z",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json["days"], generated[1:])
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class EfficiencyTests(APITestCase):
+    blueprint = analytics_controller.blueprint
+    endpoint = "/efficiency"
+
+    def setUp(self):
+        super(EfficiencyTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            db.session.add_all([
+                EfficiencyBucket(
+                    vehicle_id=vehicle.id,
+                    day=date(2018, 2, 12) + timedelta(days=i // 2),
+                    speed=30 + 30 * (i % 2),
+                    temperature=efficiency.UNKNOWN_TEMPERATURE if i == 0 else 10,
+                    distance=10.0,
+                    energy=2.5 + i % 2,
+                    duration=900.0
+                ) for i in range(amount_to_generate)
+            ])
+            db.session.commit()
+        return []
+
+    def test_groups_by_day_by_default(self):
+        self.generate_items(4)
+
+        result = self.test_app.get(
+            "/efficiency?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, [
+            {"day": "2018-02-12", "distance": 20.0, "energy": 6.0, "duration": 1800.0, "efficiency": 300.0},
+            {"day": "2018-02-13", "distance": 20.0, "energy": 6.0, "duration": 1800.0, "efficiency": 300.0},
+        ])
+
+    def test_groups_by_speed_and_temperature(self):
+        self.generate_items(4)
+
+        by_speed = self.test_app.get(
+            "/efficiency?vehicle_id=test_id&group=speed&after=2018-02-13T00:00:00.000000Z",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+        by_temperature = self.test_app.get(
+            "/efficiency?vehicle_id=test_id&group=temperature",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assertEqual([(item["speed"], item["efficiency"]) for item in by_speed.json], [(30, 250.0), (60, 350.0)])
+        self.assertEqual([item["temperature"] for item in by_temperature.json], [None, 10])
+
+    def test_returns_400_for_unknown_group(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/efficiency?vehicle_id=test_id&group=weekday",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertEqual(result.json, {"error": "Group must be one of day, speed, temperature"})
@@ -0,0 +1,136 @@
+import gzip
+import json
+import unittest
+from unittest import mock
+
+import flask_testing
+from flask import Flask, Blueprint, jsonify, Response
+
+from tesla_analytics.api import compression
+
+blueprint = Blueprint("CompressionTest", __name__)
+
+ROWS = [{"timestamp": "2018-02-14T20:15:02Z", "charging_state": "Charging", "battery_level": 50}] * 100
+
+
+@blueprint.route("/large")
+def large():
+    return jsonify(ROWS)
+
+
+@blueprint.route("/small")
+def small():
+    return jsonify({"ok": True})
+
+
+@blueprint.route("/streamed")
+def streamed():
+    return Response((json.dumps(row) + "\n" for row in ROWS), mimetype="application/json")
+
+
+@blueprint.route("/text")
+def text():
+    return Response("<html>" * 200, mimetype="text/html")
+
+
+class CompressionTests(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.register_blueprint(blueprint)
+        app.config["COMPRESS_MIN_SIZE"] = 200
+        compression.init_app(app)
+        return app
+
+    def setUp(self):
+        super(CompressionTests, self).setUp()
+        self.test_app = self.app.test_client()
+
+    def test_gzips_large_responses_when_accepted(self):
+        result = self.test_app.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        self.assert200(result)
+        self.assertEqual(result.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", result.headers["Vary"])
+        self.assertEqual(json.loads(gzip.decompress(result.data).decode("utf-8")), ROWS)
+        self.assertEqual(int(result.headers["Content-Length"]), len(result.data))
+
+    def test_falls_back_to_gzip_without_brotli_and_zstandard(self):
+        with mock.patch.object(compression, "brotli", None), mock.patch.object(compression, "zstandard", None):
+            self.assertEqual(list(compression.available_encodings()), ["gzip"])
+
+            result = self.test_app.get("/large", headers={"Accept-Encoding": "br, zstd, gzip"})
+
+        self.assert200(result)
+        self.assertEqual(result.headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(result.data).decode("utf-8")), ROWS)
+
+    def test_does_not_compress_when_only_missing_encodings_are_accepted(self):
+        with mock.patch.object(compression, "brotli", None), mock.patch.object(compression, "zstandard", None):
+            result = self.test_app.get("/large", headers={"Accept-Encoding": "br, zstd"})
+
+        self.assertNotIn("Content-Encoding", result.headers)
+        self.assertEqual(result.json, ROWS)
+
+    @unittest.skipIf(compression.brotli is None, "brotli is not installed")
+    def test_prefers_brotli_when_installed(self):
+        result = self.test_app.get("/large", headers={"Accept-Encoding": "gzip, br"})
+
+        self.assertEqual(result.headers["Content-Encoding"], "br")
+        self.assertEqual(json.loads(compression.brotli.decompress(result.data).decode("utf-8")), ROWS)
+
+    @unittest.skipIf(compression.zstandard is None, "zstandard is not installed")
+    def test_uses_zstd_when_installed_and_accepted(self):
+        result = self.test_app.get("/large", headers={"Accept-Encoding": "zstd"})
+
+        self.assertEqual(result.headers["Content-Encoding"], "zstd")
+        decompressed = compression.zstandard.ZstdDecompressor().decompressobj().decompress(result.data)
+        self.assertEqual(json.loads(decompressed.decode("utf-8")), ROWS)
+
+    def test_does_not_compress_without_accept_encoding(self):
+        result = self.test_app.get("/large")
+
+        self.assertNotIn("Content-Encoding", result.headers)
+        self.assertEqual(result.json, ROWS)
+
+    def test_does_not_compress_responses_below_threshold(self):
+        result = self.test_app.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        self.assertNotIn("Content-Encoding", result.headers)
+        self.assertEqual(result.json, {"ok": True})
+
+    def test_does_not_compress_unlisted_mimetypes(self):
+        result = self.test_app.get("/text", headers={"Accept-Encoding": "gzip"})
+
+        self.assertNotIn("Content-Encoding", result.headers)
+
+    def test_respects_zero_quality(self):
+        result = self.test_app.get("/large", headers={"Accept-Encoding": "gzip;q=0, identity"})
+
+        self.assertNotIn("Content-Encoding", result.headers)
+
+    def test_compresses_streamed_responses_incrementally(self):
+        result = self.test_app.get("/streamed", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(result.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", result.headers)
+        lines = gzip.decompress(result.data).decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line) for line in lines], ROWS)
+
+
+class NegotiateTests(flask_testing.TestCase):
+    def create_app(self):
+        return Flask(__name__)
+
+    def test_prefers_highest_quality(self):
+        self.assertEqual(compression.negotiate("gzip;q=0.5, br;q=0.9", ["br", "gzip"]), "br")
+        self.assertEqual(compression.negotiate("gzip, br;q=0.1", ["br", "gzip"]), "gzip")
+
+    def test_prefers_server_order_on_ties(self):
+        self.assertEqual(compression.negotiate("gzip, br", ["br", "gzip"]), "br")
+
+    def test_supports_wildcard(self):
+        self.assertEqual(compression.negotiate("*", ["gzip"]), "gzip")
+
+    def test_returns_none_when_nothing_acceptable(self):
+        self.assertIsNone(compression.negotiate("identity", ["br", "gzip"]))
+        self.assertIsNone(compression.negotiate("", ["gzip"]))
@@ -1,14 +1,17 @@
+import unittest
 from datetime import datetime, timedelta
 from typing import List, Dict
 
 from flask_jwt_extended import create_access_token
+from mockito import when, unstub
 from shared_context import behaves_like
 
+from tesla_analytics import frames, live, workers
 from tesla_analytics.api import data_controller
-from tesla_analytics.models import db, ChargeState, ClimateState, DriveState, VehicleState
+from tesla_analytics.models import db, ChargeState, ClimateState, DriveState, VehicleState, LatestState, Vehicle
 from tests.api import APITestCase
 from tests.api.shared_tests import requires_user_auth, requires_vehicle, paginates_results
-from tests.helpers import isoformat_timestamp
+from tests.helpers import isoformat_timestamp, drive_data
 from tests.test_worker import create_user, create_vehicle
 
 
@@ -74,6 +77,20 @@ class ChargeTests(APITestCase):
 
         return [{"timestamp": isoformat_timestamp(state["timestamp"])} for state in charge_states]
 
+    def test_only_returns_states_of_requested_vehicle(self):
+        self.generate_items(1)
+        other_vehicle = create_vehicle("other_id", self.user, vin="2")
+        db.session.add(ChargeState({"timestamp": int(datetime.now().timestamp() * 1000)}, vehicle=other_vehicle))
+        db.session.commit()
+
+        result = self.test_app.get(
+            "/charge?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(len(result.json), 1)
+
     def _populate_charging(self, items: List[Dict]):
         vehicle = create_vehicle("test_id", self.user)
         for data in items:
@@ -83,6 +100,176 @@ class ChargeTests(APITestCase):
         db.session.commit()
 
 
+class BatchTests(APITestCase):
+    blueprint = data_controller.blueprint
+
+    def setUp(self):
+        super(BatchTests, self).setUp()
+        self.user = create_user()
+        self.start = datetime(2018, 2, 14, 20, 0, 0)
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def _populate(self, tesla_id: str, amount: int):
+        vehicle = create_vehicle(tesla_id, self.user)
+        for i in range(amount):
+            timestamp = int((self.start - timedelta(minutes=i)).timestamp() * 1000)
+            db.session.add(ChargeState({"timestamp": timestamp, "battery_level": i}, vehicle=vehicle))
+        db.session.commit()
+
+    def test_groups_results_per_vehicle(self):
+        self._populate("test_id", 2)
+        self._populate("test_id_2", 1)
+        create_vehicle("empty_id", self.user, vin="3")
+
+        result = self.test_app.get(
+            "/charge?vehicle_ids=all",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, {
+            "test_id": {
+                "items": [
+                    {"timestamp": "2018-02-14T20:00:00Z", "battery_level": 0},
+                    {"timestamp": "2018-02-14T19:59:00Z", "battery_level": 1},
+                ],
+                "cursor": None,
+            },
+            "test_id_2": {
+                "items": [{"timestamp": "2018-02-14T20:00:00Z", "battery_level": 0}],
+                "cursor": None,
+            },
+            "empty_id": {"items": [], "cursor": None},
+        })
+
+    def test_pages_each_vehicle_with_its_own_cursor(self):
+        self._populate("test_id", 60)
+        self._populate("test_id_2", 3)
+
+        result = self.test_app.get(
+            "/charge?vehicle_ids=test_id,test_id_2",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(len(result.json["test_id"]["items"]), 50)
+        self.assertEqual(result.json["test_id"]["cursor"], "test_id:2018-02-14T19:11:00.000000Z_50")
+        self.assertEqual(len(result.json["test_id_2"]["items"]), 3)
+        self.assertIsNone(result.json["test_id_2"]["cursor"])
+
+        result = self.test_app.get(
+            "/charge?vehicle_ids=test_id&cursor={}".format(result.json["test_id"]["cursor"]),
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual([item["battery_level"] for item in result.json["test_id"]["items"]], list(range(50, 60)))
+        self.assertIsNone(result.json["test_id"]["cursor"])
+
+    def test_applies_each_cursor_only_to_its_own_vehicle(self):
+        self._populate("test_id", 60)
+        self._populate("test_id_2", 60)
+        first = self.test_app.get(
+            "/charge?vehicle_ids=test_id,test_id_2",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        ).json
+
+        result = self.test_app.get(
+            "/charge?vehicle_ids=test_id,test_id_2&cursor={}".format(first["test_id"]["cursor"]),
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual([item["battery_level"] for item in result.json["test_id"]["items"]], list(range(50, 60)))
+        self.assertEqual(result.json["test_id_2"], first["test_id_2"])
+
+        result = self.test_app.get(
+            "/charge?vehicle_ids=test_id,test_id_2&cursor={}&cursor={}".format(
+                first["test_id"]["cursor"], first["test_id_2"]["cursor"]
+            ),
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual([item["battery_level"] for item in result.json["test_id_2"]["items"]], list(range(50, 60)))
+
+    def test_returns_400_for_cursor_of_vehicle_not_requested(self):
+        self._populate("test_id", 60)
+        self._populate("test_id_2", 1)
+        cursor = self.test_app.get(
+            "/charge?vehicle_ids=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        ).json["test_id"]["cursor"]
+
+        result = self.test_app.get(
+            "/charge?vehicle_ids=test_id_2&cursor={}".format(cursor),
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertEqual(result.json, {"error": "Cursor '{}' is not for a requested vehicle".format(cursor)})
+
+    def test_pages_through_states_sharing_a_timestamp(self):
+        vehicle = create_vehicle("test_id", self.user)
+        timestamp = int(self.start.timestamp() * 1000)
+        for i in range(60):
+            db.session.add(ChargeState({"timestamp": timestamp, "battery_level": i}, vehicle=vehicle))
+        db.session.commit()
+
+        levels = self._all_pages("/charge?vehicle_ids=test_id")
+
+        self.assertEqual(sorted(levels), list(range(60)))
+
+    def test_pages_within_time_range_without_duplicates(self):
+        self._populate("test_id", 120)
+
+        levels = self._all_pages(
+            "/charge?vehicle_ids=test_id&after=2018-02-14T18:30:00.000000Z&before=2018-02-14T19:50:00.000000Z"
+        )
+
+        self.assertEqual(levels, list(range(10, 91)))
+
+    def test_returns_400_for_invalid_cursor(self):
+        self._populate("test_id", 1)
+
+        result = self.test_app.get(
+            "/charge?vehicle_ids=test_id&cursor=yesterday",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertEqual(result.json, {"error": "Invalid cursor 'yesterday'"})
+
+    def _all_pages(self, url: str) -> List[int]:
+        levels = []
+        cursor = None
+        while True:
+            result = self.test_app.get(
+                url + ("&cursor={}".format(cursor) if cursor else ""),
+                headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+            )
+            self.assert200(result)
+            levels.extend(item["battery_level"] for item in result.json["test_id"]["items"])
+            cursor = result.json["test_id"]["cursor"]
+            if cursor is None:
+                return levels
+
+    def test_returns_400_if_vehicle_does_not_belong_to_user(self):
+        self._populate("test_id", 1)
+        other_user = create_user("other@example.com", "test_2")
+        create_vehicle("other_id", other_user)
+
+        result = self.test_app.get(
+            "/charge?vehicle_ids=test_id,other_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertEqual(result.json, {"error": "Vehicle 'other_id' not found"})
+
+
 @behaves_like(*requires_user_auth(), *requires_vehicle(), *paginates_results())
 class ClimateTests(APITestCase):
     blueprint = data_controller.blueprint
@@ -189,3 +376,506 @@ class VehicleTests(APITestCase):
             state["timestamp"] = int(state["timestamp"].timestamp() * 1000)
             db.session.add(VehicleState(state, vehicle=vehicle))
         db.session.commit()
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class SyncTests(APITestCase):
+    blueprint = data_controller.blueprint
+    endpoint = "/sync"
+
+    def setUp(self):
+        super(SyncTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            return self._add_states(vehicle, datetime(2018, 2, 14, 10, 0, 0), amount_to_generate)
+
+    def _add_states(self, vehicle, start: datetime, amount: int) -> List[Dict]:
+        charge_states = []
+        for i in range(amount):
+            timestamp = start - timedelta(minutes=i)
+            db.session.add(ChargeState({"timestamp": int(timestamp.timestamp() * 1000), "battery_level": i},
+                                       vehicle=vehicle))
+            db.session.add(DriveState(drive_data(timestamp, "D", speed=i), vehicle=vehicle))
+            charge_states.append({"timestamp": isoformat_timestamp(timestamp), "battery_level": i})
+        db.session.commit()
+        return charge_states
+
+    def _sync(self, token: str = None):
+        return self.test_app.get(
+            "/sync?vehicle_id=test_id{}".format("&token={}".format(token) if token is not None else ""),
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+    def test_returns_all_rows_in_ingest_order_without_token(self):
+        generated = self.generate_items(3)
+
+        result = self._sync()
+
+        self.assert200(result)
+        self.assertEqual(result.json["charge"], generated)
+        self.assertEqual([state["speed"] for state in result.json["drive"]], [0, 1, 2])
+        self.assertEqual(result.json["climate"], [])
+        self.assertEqual(result.json["vehicle"], [])
+        self.assertFalse(result.json["more"])
+
+    def test_token_returns_only_rows_ingested_since(self):
+        self.generate_items(2)
+        token = self._sync().json["token"]
+        vehicle = Vehicle.query.filter_by(tesla_id="test_id").first()
+        other_vehicle = create_vehicle("other_id", self.user)
+        added = self._add_states(vehicle, datetime(2018, 2, 13, 10, 0, 0), 1)
+        self._add_states(other_vehicle, datetime(2018, 2, 15, 10, 0, 0), 1)
+
+        result = self._sync(token)
+
+        self.assert200(result)
+        self.assertEqual(result.json["charge"], added)
+        self.assertEqual(len(result.json["drive"]), 1)
+        self.assertEqual(self._sync(result.json["token"]).json["charge"], [])
+
+    def test_pages_with_more_flag(self):
+        self.generate_items(3)
+        self.app.config["SYNC_LIMIT"] = 2
+
+        first = self._sync()
+        second = self._sync(first.json["token"])
+
+        self.assertTrue(first.json["more"])
+        self.assertEqual(len(first.json["charge"]), 2)
+        self.assertFalse(second.json["more"])
+        self.assertEqual(len(second.json["charge"]), 1)
+
+    def test_returns_400_for_invalid_token(self):
+        self.generate_items(1)
+
+        result = self._sync("1-2-x")
+
+        self.assert400(result)
+        self.assertEqual(result.json, {"error": "Invalid sync token '1-2-x'"})
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class ExportTests(APITestCase):
+    blueprint = data_controller.blueprint
+    endpoint = "/export/drive"
+
+    def setUp(self):
+        super(ExportTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        start = datetime(2018, 2, 14, 10, 0, 0)
+        states = [drive_data(start + timedelta(minutes=i), "D", speed=i) for i in range(amount_to_generate)]
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            for state in states:
+                db.session.add(DriveState(state, vehicle=vehicle))
+            db.session.commit()
+        return states
+
+    def test_returns_404_for_unknown_state_type(self):
+        result = self.test_app.get(
+            "/export/tires?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert404(result)
+
+    @unittest.skipIf(frames.pyarrow is None, "pyarrow is not installed")
+    def test_streams_arrow_ipc_in_time_range(self):
+        self.generate_items(5)
+
+        result = self.test_app.get(
+            "/export/drive?vehicle_id=test_id&after=2018-02-14T10:00:30.000000Z&before=2018-02-14T10:03:30.000000Z",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.mimetype, frames.MIMETYPE)
+        table = frames.pyarrow.ipc.open_stream(result.data).read_all()
+        self.assertEqual(table.schema, frames.arrow_schema(DriveState))
+        self.assertEqual(table.column("speed").to_pylist(), [1, 2, 3])
+
+    @unittest.skipIf(frames.pyarrow is not None, "pyarrow is installed")
+    def test_returns_501_without_pyarrow(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/export/drive?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assertStatus(result, 501)
+
+
+@behaves_like(*requires_user_auth())
+class LatestTests(APITestCase):
+    blueprint = data_controller.blueprint
+    endpoint = "/latest"
+
+    def setUp(self):
+        super(LatestTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def test_returns_latest_snapshot_of_vehicle(self):
+        vehicle = create_vehicle("test_id", self.user)
+        db.session.add(LatestState(
+            vehicle_id=vehicle.id,
+            updated_at=datetime(2018, 2, 14, 20, 15, 2),
+            charge_state={"charging_state": "Charging"},
+            climate_state={"inside_temp": 20.5},
+            drive_state={"shift_state": "P"},
+            vehicle_state=None
+        ))
+        db.session.commit()
+
+        result = self.test_app.get(
+            "/latest?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, {
+            "updated_at": "2018-02-14T20:15:02Z",
+            "charge": {"charging_state": "Charging"},
+            "climate": {"inside_temp": 20.5},
+            "drive": {"shift_state": "P"},
+            "vehicle": None,
+        })
+
+    def test_returns_404_if_vehicle_has_no_data(self):
+        create_vehicle("test_id", self.user)
+
+        result = self.test_app.get(
+            "/latest?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert404(result)
+
+    def test_returns_400_if_vehicle_does_not_belong_to_user(self):
+        other_user = create_user("other@example.com", "test_2")
+        create_vehicle("test_id", other_user)
+
+        result = self.test_app.get(
+            "/latest?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertDictEqual(result.json, {"error": "Vehicle not found"})
+
+
+class LiveTests(APITestCase):
+    blueprint = data_controller.blueprint
+
+    def setUp(self):
+        super(LiveTests, self).setUp()
+        self.user = create_user()
+
+    def tearDown(self):
+        super(LiveTests, self).tearDown()
+        unstub()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def test_streams_snapshot_whenever_latest_state_is_committed(self):
+        vehicle = create_vehicle("test_id", self.user)
+        vehicle_id = vehicle.id
+        workers.update_latest_state(vehicle, charge_state=ChargeState(
+            {"timestamp": 1518639302000, "charging_state": "Charging"},
+            vehicle=vehicle
+        ))
+        db.session.commit()
+
+        result = self.test_app.get(
+            "/live?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())},
+            buffered=False
+        )
+        events = iter(result.response)
+
+        self.assert200(result)
+        self.assertEqual(result.mimetype, "text/event-stream")
+        self.assertIn(b'"charging_state":"Charging"', next(events))
+
+        vehicle = Vehicle.query.get(vehicle_id)
+        workers.update_latest_state(vehicle, charge_state=ChargeState(
+            {"timestamp": 1518639362000, "charging_state": "Complete"},
+            vehicle=vehicle
+        ))
+        db.session.commit()
+
+        self.assertIn(b'"charging_state":"Complete"', next(events))
+        result.close()
+
+    def test_closes_stream_after_max_duration(self):
+        vehicle = create_vehicle("test_id", self.user)
+        workers.update_latest_state(vehicle, charge_state=ChargeState(
+            {"timestamp": 1518639302000, "charging_state": "Charging"},
+            vehicle=vehicle
+        ))
+        db.session.commit()
+        self.app.config["LIVE_MAX_DURATION"] = 0.2
+
+        result = self.test_app.get(
+            "/live?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())},
+            buffered=False
+        )
+        events = list(result.response)
+
+        self.assert200(result)
+        self.assertIn(b'"charging_state":"Charging"', events[0])
+
+    def test_returns_503_if_listener_is_unavailable(self):
+        create_vehicle("test_id", self.user)
+        when(live.listener).start().thenReturn(False)
+
+        result = self.test_app.get(
+            "/live?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assertStatus(result, 503)
+        self.assertDictEqual(result.json, {"error": "Live updates are unavailable"})
+
+    def test_returns_400_if_vehicle_does_not_belong_to_user(self):
+        other_user = create_user("other@example.com", "test_2")
+        create_vehicle("test_id", other_user)
+
+        result = self.test_app.get(
+            "/live?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertDictEqual(result.json, {"error": "Vehicle not found"})
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle(), *paginates_results())
+class CombinedTests(APITestCase):
+    blueprint = data_controller.blueprint
+    endpoint = "/combined"
+
+    def setUp(self):
+        super(CombinedTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        timestamps = [datetime.now() - timedelta(hours=i) for i in range(amount_to_generate)]
+        with self.app.app_context():
+            self._populate_database(timestamps)
+
+        return [
+            {
+                "timestamp": isoformat_timestamp(timestamp),
+                "charge": {"timestamp": isoformat_timestamp(timestamp)},
+                "climate": {"timestamp": isoformat_timestamp(timestamp + timedelta(seconds=1))},
+                "drive": {
+                    "timestamp": isoformat_timestamp(timestamp + timedelta(seconds=2)),
+                    "gps_as_of": datetime.fromtimestamp(int(timestamp.timestamp())).isoformat() + "Z",
+                    "latitude": 37.548271,
+                    "longitude": -121.988571,  # Tesla Factory, Fremont
+                    "power": 0,
+                    "shift_state": "P",
+                    "speed": 0,
+                },
+                "vehicle": {"timestamp": isoformat_timestamp(timestamp + timedelta(seconds=3))},
+            } for timestamp in timestamps
+        ]
+
+    def test_leaves_sections_empty_when_nothing_is_within_tolerance(self):
+        vehicle = create_vehicle("test_id", self.user)
+        timestamp = datetime.now()
+        db.session.add(ChargeState({"timestamp": int(timestamp.timestamp() * 1000)}, vehicle=vehicle))
+        db.session.add(ClimateState(
+            {"timestamp": int((timestamp + timedelta(seconds=30)).timestamp() * 1000)},
+            vehicle=vehicle
+        ))
+        db.session.commit()
+
+        result = self.test_app.get(
+            "/combined?vehicle_id=test_id&tolerance=5",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, [{
+            "timestamp": isoformat_timestamp(timestamp),
+            "charge": {"timestamp": isoformat_timestamp(timestamp)},
+            "climate": None,
+            "drive": None,
+            "vehicle": None,
+        }])
+
+    def test_returns_400_if_tolerance_is_not_a_number(self):
+        create_vehicle("test_id", self.user)
+
+        result = self.test_app.get(
+            "/combined?vehicle_id=test_id&tolerance=soon",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+
+    def test_returns_400_if_tolerance_is_out_of_range(self):
+        create_vehicle("test_id", self.user)
+
+        for tolerance in ["-1", "99999999999999"]:
+            result = self.test_app.get(
+                "/combined?vehicle_id=test_id&tolerance={}".format(tolerance),
+                headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+            )
+
+            self.assert400(result)
+            self.assertEqual(result.json, {"error": "'tolerance' must be between 0 and 3600 seconds"})
+
+    def _populate_database(self, timestamps: List[datetime]):
+        vehicle = create_vehicle("test_id", self.user)
+        for timestamp in timestamps:
+            db.session.add(ChargeState({"timestamp": int(timestamp.timestamp() * 1000)}, vehicle=vehicle))
+            db.session.add(ClimateState(
+                {"timestamp": int((timestamp + timedelta(seconds=1)).timestamp() * 1000)},
+                vehicle=vehicle
+            ))
+            db.session.add(DriveState({
+                "timestamp": int((timestamp + timedelta(seconds=2)).timestamp() * 1000),
+                "gps_as_of": int(timestamp.timestamp()),
+                "latitude": 37.548271,
+                "longitude": -121.988571,
+                "power": 0,
+                "shift_state": "P",
+                "speed": 0,
+            }, vehicle=vehicle))
+            db.session.add(VehicleState(
+                {"timestamp": int((timestamp + timedelta(seconds=3)).timestamp() * 1000)},
+                vehicle=vehicle
+            ))
+        db.session.commit()
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class DriveAreaTests(APITestCase):
+    blueprint = data_controller.blueprint
+    endpoint = "/drive/area"
+
+    def setUp(self):
+        super(DriveAreaTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        start = datetime(2018, 2, 14, 8, 0, 0)
+        places = [
+            (37.548271, -121.988571, "P"),  # Tesla Factory, Fremont
+            (37.7749, -122.4194, "D"),  # San Francisco
+            (37.5485, -121.9880, "D"),  # Just outside the factory
+        ]
+        states = [
+            drive_data(start + timedelta(minutes=i), shift_state, latitude, longitude)
+            for i, (latitude, longitude, shift_state) in
+            enumerate(places[i % len(places)] for i in range(amount_to_generate))
+        ]
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            drive_states = [DriveState(state, vehicle=vehicle) for state in states]
+            db.session.add_all(drive_states)
+            db.session.commit()
+            return [state.serialize() for state in drive_states]
+
+    def test_returns_drive_states_within_bounding_box(self):
+        generated = self.generate_items(3)
+
+        result = self.test_app.get(
+            "/drive/area?vehicle_id=test_id&south=37.5&west=-122.0&north=37.6&east=-121.9",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, [generated[2], generated[0]])
+
+    def test_returns_drive_states_within_radius(self):
+        generated = self.generate_items(3)
+
+        result = self.test_app.get(
+            "/drive/area?vehicle_id=test_id&latitude=37.548271&longitude=-121.988571&radius=20",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, [generated[0]])
+
+    def test_can_restrict_to_parked_states(self):
+        generated = self.generate_items(3)
+
+        result = self.test_app.get(
+            "/drive/area?vehicle_id=test_id&south=37.5&west=-122.0&north=37.6&east=-121.9&parked=true",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, [generated[0]])
+
+    def test_returns_400_without_area(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/drive/area?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+
+    def test_returns_400_for_non_positive_radius(self):
+        self.generate_items(1)
+
+        for radius in ["0", "-20"]:
+            result = self.test_app.get(
+                "/drive/area?vehicle_id=test_id&latitude=37.548271&longitude=-121.988571&radius={}".format(radius),
+                headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+            )
+
+            self.assert400(result)
+            self.assertEqual(result.json, {"error": "Radius must be positive"})
+
+    def test_returns_400_for_non_finite_coordinates(self):
+        self.generate_items(1)
+
+        for query in ["latitude=nan&longitude=-121.988571&radius=20", "latitude=37.5&longitude=inf&radius=20",
+                      "south=nan&west=-122.0&north=37.6&east=-121.9"]:
+            result = self.test_app.get(
+                "/drive/area?vehicle_id=test_id&{}".format(query),
+                headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+            )
+
+            self.assert400(result)
+            self.assertEqual(result.json, {"error": "Area parameters must be finite numbers"})
+
+    def test_returns_400_for_inverted_box(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/drive/area?vehicle_id=test_id&south=37.6&west=-122.0&north=37.5&east=-121.9",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
@@ -1,6 +1,10 @@
 import json
 
+from mockito import when, unstub
+
+from tesla_analytics import passwords
 from tesla_analytics.api import login_controller
+from tesla_analytics.application import trust_proxies
 from tests.api import APITestCase
 from tests.test_worker import create_user
 
@@ -8,6 +12,27 @@ from tests.test_worker import create_user
 class LoginTests(APITestCase):
     blueprint = login_controller.blueprint
 
+    def setUp(self):
+        super(LoginTests, self).setUp()
+        passwords.throttle.clear()
+
+    def tearDown(self):
+        super(LoginTests, self).tearDown()
+        passwords.throttle.clear()
+        unstub()
+
+    def login(self, password: str, email: str = "me@example.com", address: str = "127.0.0.1",
+              forwarded_for: str = None):
+        headers = {"Content-Type": "application/json"}
+        if forwarded_for is not None:
+            headers["X-Forwarded-For"] = forwarded_for
+        return self.test_app.post(
+            "/login",
+            headers=headers,
+            data=json.dumps({"email": email, "password": password}),
+            environ_base={"REMOTE_ADDR": address}
+        )
+
     def test_when_user_exists_and_password_matches_returns_access_token(self):
         create_user()
 
@@ -107,6 +132,60 @@ class LoginTests(APITestCase):
             {"error": "Missing required parameter 'password'"}
         )
 
+    def test_throttles_email_after_repeated_failures(self):
+        create_user()
+        for _ in range(passwords.MAX_EMAIL_FAILURES):
+            self.assert401(self.login("not_test"))
+
+        result = self.login("test")
+
+        self.assertStatus(result, 429)
+        self.assertDictEqual(result.json, {"error": "Too many failed login attempts"})
+        self.assertGreater(int(result.headers["Retry-After"]), 0)
+
+    def test_throttles_address_across_emails(self):
+        for index in range(passwords.MAX_ADDRESS_FAILURES):
+            self.assert401(self.login("test", email="user_{}@example.com".format(index)))
+
+        self.assertStatus(self.login("test", email="someone@example.com"), 429)
+        self.assert401(self.login("test", email="someone@example.com", address="10.0.0.2"))
+
+    def test_throttles_forwarded_client_address_behind_trusted_proxy(self):
+        self.app.config["TRUSTED_PROXIES"] = 1
+        trust_proxies(self.app)
+        for index in range(passwords.MAX_ADDRESS_FAILURES):
+            self.assert401(self.login(
+                "test", email="user_{}@example.com".format(index), address="172.17.0.2",
+                forwarded_for="1.2.3.4, 203.0.113.7"
+            ))
+
+        self.assertStatus(self.login(
+            "test", email="someone@example.com", address="172.17.0.2", forwarded_for="203.0.113.7"
+        ), 429)
+        self.assert401(self.login(
+            "test", email="someone@example.com", address="172.17.0.2", forwarded_for="198.51.100.1"
+        ))
+
+    def test_successful_login_resets_email_failures(self):
+        create_user()
+        for _ in range(passwords.MAX_EMAIL_FAILURES - 1):
+            self.assert401(self.login("not_test"))
+
+        self.assert200(self.login("test"))
+        self.assert401(self.login("not_test"))
+        self.assert200(self.login("test"))
+
+    def test_returns_429_when_verification_pool_is_saturated(self):
+        create_user()
+        when(passwords.verifier).verify(...).thenRaise(passwords.Saturated("Too many logins in progress"))
+
+        result = self.login("test")
+
+        self.assertStatus(result, 429)
+        self.assertDictEqual(result.json, {"error": "Too many logins in progress"})
+        self.assertEqual(result.headers["Retry-After"], "1")
+        self.assertEqual(passwords.throttle.failures, {})
+
 
 class RefreshTests(APITestCase):
     blueprint = login_controller.blueprint
@@ -137,4 +216,4 @@ class RefreshTests(APITestCase):
         self.assert200(refresh_result)
 
         self.assertIsNotNone(refresh_result.json["access_token"])
-        self.assertNotEqual(refresh_result.json["access_token"], self.login_result.json["access_token"])
\ No newline at end of file
+        self.assertNotEqual(refresh_result.json["access_token"], self.login_result.json["access_token"])
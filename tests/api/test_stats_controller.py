@@ -0,0 +1,296 @@
+from datetime import datetime, timedelta
+from typing import List, Dict
+
+from flask_jwt_extended import create_access_token
+from shared_context import behaves_like
+
+from tesla_analytics.api import stats_controller
+from tesla_analytics.models import db, ChargeState, DriveState
+from tests.api import APITestCase
+from tests.api.shared_tests import requires_user_auth, requires_vehicle
+from tests.test_worker import create_user, create_vehicle
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class DriveStatsTests(APITestCase):
+    blueprint = stats_controller.blueprint
+    endpoint = "/stats/drive"
+
+    def setUp(self):
+        super(DriveStatsTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        start = datetime(2018, 2, 14, 10, 0, 0)
+        states = [
+            {
+                "timestamp": int((start + timedelta(minutes=20 * i)).timestamp() * 1000),
+                "gps_as_of": int((start + timedelta(minutes=20 * i)).timestamp()),
+                "latitude": 37.548271,
+                "longitude": -121.988571,
+                "power": float(i * 10),
+                "shift_state": "D",
+                "speed": i,
+                "heading": 90 + i,
+            } for i in range(amount_to_generate)
+        ]
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            for state in states:
+                db.session.add(DriveState(state, vehicle=vehicle))
+            db.session.commit()
+        return states
+
+    def test_aggregates_columns_and_json_fields_per_bucket(self):
+        self.generate_items(6)
+
+        result = self.test_app.get(
+            "/stats/drive?vehicle_id=test_id&bucket=hour&fields=power:avg,speed:max,heading:last,speed:count",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, {
+            "timestamp": ["2018-02-14T10:00:00Z", "2018-02-14T11:00:00Z"],
+            "power:avg": [10.0, 40.0],
+            "speed:max": [2, 5],
+            "heading:last": [92.0, 95.0],
+            "speed:count": [3, 3],
+        })
+
+    def test_restricts_to_time_range(self):
+        self.generate_items(6)
+
+        result = self.test_app.get(
+            "/stats/drive?vehicle_id=test_id&bucket=hour&fields=speed:min&after=2018-02-14T11:00:00.000000Z",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, {
+            "timestamp": ["2018-02-14T11:00:00Z"],
+            "speed:min": [4],
+        })
+
+    def test_returns_400_if_fields_missing(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/stats/drive?vehicle_id=test_id",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertEqual(result.json, {"error": "Missing required parameter 'fields'"})
+
+    def test_returns_400_for_unknown_aggregate(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/stats/drive?vehicle_id=test_id&fields=power:median",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+
+    def test_returns_400_for_non_numeric_column(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/stats/drive?vehicle_id=test_id&fields=shift_state:max",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertEqual(result.json, {"error": "Field 'shift_state' is not numeric"})
+
+    def test_returns_400_for_identifier_columns(self):
+        self.generate_items(1)
+
+        for field in ["cell", "id", "vehicle_id"]:
+            result = self.test_app.get(
+                "/stats/drive?vehicle_id=test_id&fields={}:avg".format(field),
+                headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+            )
+
+            self.assert400(result)
+            self.assertEqual(result.json, {"error": "Field '{}' is not numeric".format(field)})
+
+    def test_returns_400_for_unknown_bucket(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/stats/drive?vehicle_id=test_id&bucket=fortnight&fields=power:avg",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+
+    def test_returns_404_for_unknown_state_type(self):
+        result = self.test_app.get(
+            "/stats/tires?vehicle_id=test_id&fields=power:avg",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert404(result)
+
+
+class ChargeStatsTests(APITestCase):
+    blueprint = stats_controller.blueprint
+
+    def setUp(self):
+        super(ChargeStatsTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def test_only_aggregates_requested_vehicle(self):
+        start = datetime(2018, 2, 14, 10, 0, 0)
+        vehicle = create_vehicle("test_id", self.user)
+        other_vehicle = create_vehicle("other_id", self.user)
+        for index, battery_level in enumerate([50, 60]):
+            timestamp = int((start + timedelta(minutes=index)).timestamp() * 1000)
+            db.session.add(ChargeState({"timestamp": timestamp, "battery_level": battery_level}, vehicle=vehicle))
+            db.session.add(ChargeState({"timestamp": timestamp, "battery_level": 10}, vehicle=other_vehicle))
+        db.session.commit()
+
+        result = self.test_app.get(
+            "/stats/charge?vehicle_id=test_id&bucket=day&fields=battery_level:avg",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert200(result)
+        self.assertEqual(result.json, {
+            "timestamp": ["2018-02-14T00:00:00Z"],
+            "battery_level:avg": [55.0],
+        })
+
+    def test_returns_400_for_non_numeric_data_field(self):
+        vehicle = create_vehicle("test_id", self.user)
+        db.session.add(ChargeState({"timestamp": 1518602400000, "charging_state": "Charging"}, vehicle=vehicle))
+        db.session.commit()
+
+        result = self.test_app.get(
+            "/stats/charge?vehicle_id=test_id&fields=charging_state:avg",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertEqual(result.json, {"error": "Field 'charging_state' is not numeric"})
+
+
+@behaves_like(*requires_user_auth(), *requires_vehicle())
+class ResampleTests(APITestCase):
+    blueprint = stats_controller.blueprint
+    endpoint = "/resample/charge"
+
+    def setUp(self):
+        super(ResampleTests, self).setUp()
+        self.user = create_user()
+
+    def access_token(self):
+        return create_access_token(identity="me@example.com")
+
+    def generate_items(self, amount_to_generate: int) -> List[Dict]:
+        start = datetime(2018, 2, 14, 10, 0, 0)
+        samples = [(0, 50), (40, 52), (120, 56), (1800, 60)][:amount_to_generate]
+        states = [
+            {"timestamp": int((start + timedelta(seconds=seconds)).timestamp() * 1000), "battery_level": level}
+            for seconds, level in samples
+        ]
+        with self.app.app_context():
+            vehicle = create_vehicle("test_id", self.user)
+            for state in states:
+                db.session.add(ChargeState(state, vehicle=vehicle))
+            db.session.commit()
+        return states
+
+    def _resample(self, fill: str):
+        return self.test_app.get(
+            "/resample/charge?vehicle_id=test_id&fields=battery_level&interval=60&fill={}"
+            "&after=2018-02-14T10:00:00.000000Z&before=2018-02-14T10:04:00.000000Z".format(fill),
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+    def test_forward_fills_onto_grid(self):
+        self.generate_items(4)
+
+        result = self._resample("previous")
+
+        self.assert200(result)
+        self.assertEqual(result.json, {
+            "timestamp": ["2018-02-14T10:00:00Z", "2018-02-14T10:01:00Z", "2018-02-14T10:02:00Z",
+                          "2018-02-14T10:03:00Z", "2018-02-14T10:04:00Z"],
+            "battery_level": [50.0, 52.0, 56.0, 56.0, 56.0],
+        })
+
+    def test_interpolates_linearly_within_max_gap(self):
+        self.generate_items(4)
+
+        result = self._resample("linear")
+
+        self.assert200(result)
+        self.assertEqual(result.json["battery_level"], [50.0, 53.0, 56.0, None, None])
+
+    def test_leaves_points_without_a_sample_empty(self):
+        self.generate_items(4)
+
+        result = self._resample("none")
+
+        self.assert200(result)
+        self.assertEqual(result.json["battery_level"], [50.0, 52.0, 56.0, None, None])
+
+    def test_returns_400_for_unknown_fill(self):
+        self.generate_items(1)
+
+        result = self._resample("spline")
+
+        self.assert400(result)
+
+    def test_returns_400_for_too_many_points(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/resample/charge?vehicle_id=test_id&fields=battery_level&interval=1"
+            "&after=2018-02-14T10:00:00.000000Z&before=2018-02-15T10:00:00.000000Z",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+
+    def test_returns_400_for_non_numeric_field(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/resample/drive?vehicle_id=test_id&fields=shift_state",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertEqual(result.json, {"error": "Field 'shift_state' is not numeric"})
+
+    def test_returns_400_for_non_numeric_data_field(self):
+        self.generate_items(1)
+
+        result = self.test_app.get(
+            "/resample/charge?vehicle_id=test_id&fields=charging_state",
+            headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+        )
+
+        self.assert400(result)
+        self.assertEqual(result.json, {"error": "Field 'charging_state' is not numeric"})
+
+    def test_returns_400_for_out_of_range_interval_or_max_gap(self):
+        self.generate_items(1)
+
+        for query in ["interval=99999999999999999999", "interval=0", "max_gap=-1", "max_gap=99999999999999999999"]:
+            result = self.test_app.get(
+                "/resample/charge?vehicle_id=test_id&fields=battery_level&{}".format(query),
+                headers={"AUTHORIZATION": "Bearer {}".format(self.access_token())}
+            )
+
+            self.assert400(result)
@@ -3,3 +3,15 @@ from datetime import datetime
 
 def isoformat_timestamp(timestamp: datetime) -> str:
     return datetime.fromtimestamp(int(timestamp.timestamp() * 1000) / 1000.0).isoformat() + "Z"
+
+
+def drive_data(timestamp: datetime, shift_state=None, latitude=37.548271, longitude=-121.988571, power=0, speed=0):
+    return {
+        "timestamp": int(timestamp.timestamp() * 1000),
+        "gps_as_of": int(timestamp.timestamp()),
+        "latitude": latitude,
+        "longitude": longitude,
+        "power": power,
+        "shift_state": shift_state,
+        "speed": speed,
+    }
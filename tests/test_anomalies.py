@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import flask_testing
+from flask import Flask
+
+from tesla_analytics import anomalies, workers
+from tesla_analytics.anomalies import Snapshot, ParkedDrain, ChargingStall, CabinTemperature
+from tesla_analytics.models import db, Alert, ChargeState, ClimateState, DriveState
+from tests.helpers import drive_data
+from tests.test_worker import create_user, create_vehicle
+
+START = datetime(2018, 2, 14, 20, 0, 0)
+
+
+def snapshot(minutes: int, battery_level=50, charging_state="Disconnected", charge_energy_added=None,
+             shift_state="P", inside_temp=20.0) -> Snapshot:
+    return Snapshot(START + timedelta(minutes=minutes), battery_level, charging_state, None, charge_energy_added,
+                    shift_state, inside_temp)
+
+
+class TestDetectors(TestCase):
+    def test_parked_drain_alerts_on_sudden_drop_while_parked(self):
+        detector = ParkedDrain()
+
+        self.assertIsNone(detector.observe(snapshot(0, battery_level=60)))
+        self.assertIsNone(detector.observe(snapshot(20, battery_level=58)))
+        self.assertEqual(detector.observe(snapshot(40, battery_level=55)), {
+            "from_battery_level": 60,
+            "to_battery_level": 55,
+            "minutes": 40.0,
+        })
+        self.assertIsNone(detector.observe(snapshot(50, battery_level=54)))
+
+    def test_parked_drain_ignores_driving_and_slow_drain(self):
+        detector = ParkedDrain()
+
+        self.assertIsNone(detector.observe(snapshot(0, battery_level=60)))
+        self.assertIsNone(detector.observe(snapshot(10, battery_level=50, shift_state="D")))
+        self.assertIsNone(detector.observe(snapshot(20, battery_level=50)))
+        self.assertIsNone(detector.observe(snapshot(90, battery_level=44)))
+
+    def test_charging_stall_alerts_once_when_energy_stops_increasing(self):
+        detector = ChargingStall()
+
+        self.assertIsNone(detector.observe(snapshot(0, charging_state="Charging", charge_energy_added=1.0)))
+        self.assertIsNone(detector.observe(snapshot(10, charging_state="Charging", charge_energy_added=1.0)))
+        self.assertEqual(detector.observe(snapshot(15, charging_state="Charging", charge_energy_added=1.0)), {
+            "battery_level": 50,
+            "charge_energy_added": 1.0,
+            "charger_power": None,
+            "minutes": 15.0,
+        })
+        self.assertIsNone(detector.observe(snapshot(30, charging_state="Charging", charge_energy_added=1.0)))
+        self.assertIsNone(detector.observe(snapshot(31, charging_state="Charging", charge_energy_added=1.5)))
+
+    def test_cabin_temperature_alerts_once_per_excursion(self):
+        detector = CabinTemperature()
+
+        self.assertEqual(detector.observe(snapshot(0, inside_temp=56.0)), {"inside_temp": 56.0})
+        self.assertIsNone(detector.observe(snapshot(1, inside_temp=57.0)))
+        self.assertIsNone(detector.observe(snapshot(2, inside_temp=52.0)))
+        self.assertIsNone(detector.observe(snapshot(3, inside_temp=55.0)))
+        self.assertIsNone(detector.observe(snapshot(4, inside_temp=30.0)))
+        self.assertEqual(detector.observe(snapshot(5, inside_temp=-25.0)), {"inside_temp": -25.0})
+
+
+class TestPipeline(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestPipeline, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        anomalies.pipeline.clear()
+        self.user = create_user()
+        self.vehicle = create_vehicle("vehicle_id", self.user)
+
+    def tearDown(self):
+        super(TestPipeline, self).tearDown()
+        anomalies.pipeline.clear()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def test_detect_keeps_state_per_vehicle_and_stores_alerts(self):
+        other_vehicle = create_vehicle("other_id", self.user)
+        for minutes, level in [(0, 80), (30, 74)]:
+            timestamp = START + timedelta(minutes=minutes)
+            for vehicle in [self.vehicle, other_vehicle]:
+                charge_state = ChargeState({"timestamp": int(timestamp.timestamp() * 1000),
+                                            "charging_state": "Disconnected",
+                                            "battery_level": level if vehicle is self.vehicle else 80}, vehicle=vehicle)
+                climate_state = ClimateState({"timestamp": int(timestamp.timestamp() * 1000), "inside_temp": 21.0},
+                                             vehicle=vehicle)
+                drive_state = DriveState(drive_data(timestamp, "P"), vehicle=vehicle)
+                anomalies.detect(vehicle, datetime.now(), charge_state, climate_state, drive_state)
+            db.session.commit()
+
+        stored = Alert.query.all()
+
+        self.assertEqual([alert.serialize() for alert in stored], [{
+            "kind": "parked_drain",
+            "timestamp": "2018-02-14T20:30:00Z",
+            "vehicle_id": "vehicle_id",
+            "details": {"from_battery_level": 80, "to_battery_level": 74, "minutes": 30.0},
+        }])
+        self.assertEqual(stored[0].user, self.user)
+
+    def test_monitor_drops_state_of_vehicles_it_no_longer_polls(self):
+        anomalies.pipeline.vehicles[self.vehicle.id] = []
+        anomalies.pipeline.vehicles[self.vehicle.id + 1] = []
+        self.vehicle.next_update_time = datetime.now() + timedelta(minutes=10)
+        db.session.commit()
+
+        workers.monitor()
+
+        self.assertEqual(list(anomalies.pipeline.vehicles), [self.vehicle.id])
+
+    def test_bad_token_notification_is_stored_as_alert(self):
+        workers.notify_user_of_bad_token(self.user)
+        db.session.commit()
+
+        stored = Alert.query.one()
+
+        self.assertEqual(stored.kind, "bad_token")
+        self.assertIsNone(stored.vehicle)
+        self.assertEqual(stored.user, self.user)
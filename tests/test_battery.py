@@ -0,0 +1,119 @@
+from datetime import date, datetime, timedelta
+
+import flask_testing
+from flask import Flask
+
+from tesla_analytics import battery
+from tesla_analytics.models import db, BatteryDay, ChargeState
+from tests.test_worker import create_user, create_vehicle
+
+
+def charge_data(timestamp: datetime, battery_level: float, battery_range: float, charging: bool = False,
+                energy_added: float = 0.0):
+    return {
+        "timestamp": int(timestamp.timestamp() * 1000),
+        "charging_state": "Charging" if charging else "Disconnected",
+        "battery_level": battery_level,
+        "battery_range": battery_range,
+        "ideal_battery_range": battery_range * 1.1,
+        "charge_energy_added": energy_added,
+    }
+
+
+class TestBattery(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestBattery, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        self.vehicle = create_vehicle("vehicle_id", create_user())
+        self.start = datetime(2018, 2, 12, 8, 0, 0)
+
+    def tearDown(self):
+        super(TestBattery, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def add_day(self, day: int, full_range: float, charge: bool):
+        start = self.start + timedelta(days=day)
+        states = [charge_data(start + timedelta(minutes=i), 80, full_range * 0.8) for i in range(3)]
+        states.append(charge_data(start + timedelta(minutes=3), 10, full_range * 0.1))
+        if charge:
+            states += [
+                charge_data(start + timedelta(hours=10, minutes=i), 40 + i, full_range * (40 + i) / 100,
+                            charging=True, energy_added=0.75 * i)
+                for i in range(21)
+            ]
+        for state in states:
+            db.session.add(ChargeState(state, vehicle=self.vehicle))
+        db.session.commit()
+
+    def stored(self):
+        return [day.serialize() for day in BatteryDay.query.order_by(BatteryDay.day).all()]
+
+    def test_update_estimates_complete_days(self):
+        self.add_day(0, 300, charge=True)
+        self.add_day(1, 295, charge=False)
+        self.add_day(2, 290, charge=True)
+
+        count = battery.update(self.vehicle, today=date(2018, 2, 14))
+
+        self.assertEqual(count, 2)
+        stored = self.stored()
+        self.assertEqual([day["day"] for day in stored], ["2018-02-12", "2018-02-13"])
+        self.assertEqual(stored[0]["samples"], 3 + 21)
+        self.assertAlmostEqual(stored[0]["estimated_range"], 300.0)
+        self.assertAlmostEqual(stored[0]["estimated_ideal_range"], 330.0)
+        self.assertAlmostEqual(stored[0]["estimated_capacity"], 75.0)
+        self.assertAlmostEqual(stored[1]["estimated_range"], 295.0)
+        self.assertIsNone(stored[1]["estimated_capacity"])
+
+    def test_update_only_computes_new_days(self):
+        self.add_day(0, 300, charge=True)
+        battery.update(self.vehicle, today=date(2018, 2, 13))
+        BatteryDay.query.update({"estimated_range": 1.0})
+        db.session.commit()
+        self.add_day(1, 295, charge=True)
+
+        self.assertEqual(battery.update(self.vehicle, today=date(2018, 2, 13)), 0)
+        self.assertEqual(battery.update(self.vehicle, today=date(2018, 2, 14)), 1)
+
+        stored = self.stored()
+        self.assertEqual(stored[0]["estimated_range"], 1.0)
+        self.assertAlmostEqual(stored[1]["estimated_range"], 295.0)
+        self.assertAlmostEqual(stored[1]["estimated_capacity"], 75.0)
+
+    def test_rebuild_in_chunks_matches_single_pass(self):
+        for day in range(3):
+            self.add_day(day, 300 - day * 5, charge=True)
+        battery.update(self.vehicle, today=date(2018, 2, 15))
+        expected = self.stored()
+
+        battery.rebuild(self.vehicle, chunk_size=7, today=date(2018, 2, 15))
+
+        self.assertEqual(self.stored(), expected)
+
+    def test_trend_fits_linear_change_per_year(self):
+        for day in range(3):
+            self.add_day(day, 300 - day * 5, charge=False)
+        battery.update(self.vehicle, today=date(2018, 2, 15))
+
+        trend = battery.trend(battery.days(self.vehicle), "estimated_range")
+
+        self.assertAlmostEqual(trend["start"], 300.0)
+        self.assertAlmostEqual(trend["current"], 290.0)
+        self.assertAlmostEqual(trend["per_year"], -5 * 365.25)
+        self.assertAlmostEqual(trend["change_percent"], -10 / 3)
+        self.assertIsNone(battery.trend(battery.days(self.vehicle), "estimated_capacity"))
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import flask_testing
+from flask import Flask
+
+from tesla_analytics import charging
+from tesla_analytics.models import db, ChargeState, ChargingSession, DriveState
+from tests.helpers import drive_data
+from tests.test_worker import create_user, create_vehicle
+
+
+class TestCharging(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestCharging, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        self.vehicle = create_vehicle("vehicle_id", create_user())
+        self.start = datetime(2018, 2, 14, 20, 0, 0)
+
+    def tearDown(self):
+        super(TestCharging, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def test_record_builds_sessions_from_charge_states(self):
+        db.session.add(DriveState(drive_data(self.start, "P", 37.4, -122.1), vehicle=self.vehicle))
+        self._record_all()
+
+        stored = ChargingSession.query.order_by(ChargingSession.start_time).all()
+
+        self.assertEqual(len(stored), 2)
+        self.assertEqual(stored[0].serialize(), {
+            "start_time": "2018-02-14T20:01:00Z",
+            "end_time": "2018-02-14T20:04:00Z",
+            "duration": 180.0,
+            "energy_added": 1.5,
+            "peak_power": 11.0,
+            "start_battery_level": 50.0,
+            "end_battery_level": 53.0,
+            "location": {"latitude": 37.4, "longitude": -122.1},
+            "in_progress": False,
+        })
+        self.assertTrue(stored[1].in_progress)
+        self.assertEqual(stored[1].start_time, self.start + timedelta(hours=2))
+        self.assertIsNone(stored[1].latitude)
+
+    def test_rebuild_in_chunks_matches_incremental_detection(self):
+        self._record_all()
+        incremental = [session.serialize() for session in
+                       ChargingSession.query.order_by(ChargingSession.start_time).all()]
+
+        count = charging.rebuild(self.vehicle, chunk_size=2)
+        rebuilt = [session.serialize() for session in
+                   ChargingSession.query.order_by(ChargingSession.start_time).all()]
+
+        self.assertEqual(count, 2)
+        self.assertEqual(rebuilt, incremental)
+
+    def test_rebuild_with_several_sessions_in_one_chunk(self):
+        db.session.add(DriveState(drive_data(self.start, "P", 37.4, -122.1), vehicle=self.vehicle))
+        self._record_all()
+        incremental = [session.serialize() for session in
+                       ChargingSession.query.order_by(ChargingSession.start_time).all()]
+
+        count = charging.rebuild(self.vehicle)
+        rebuilt = [session.serialize() for session in
+                   ChargingSession.query.order_by(ChargingSession.start_time).all()]
+
+        self.assertEqual(count, 2)
+        self.assertEqual(rebuilt, incremental)
+
+    def test_summary_totals_energy_per_bucket(self):
+        self._record_all()
+
+        self.assertEqual(charging.summary(self.vehicle, "day"), [{
+            "timestamp": "2018-02-14T00:00:00Z",
+            "sessions": 2,
+            "energy_added": 1.5,
+            "duration": 180.0,
+        }])
+
+    def _record_all(self):
+        for minutes, data in self._charges():
+            data["timestamp"] = int((self.start + timedelta(minutes=minutes)).timestamp() * 1000)
+            charge_state = ChargeState(data, vehicle=self.vehicle)
+            db.session.add(charge_state)
+            charging.record(self.vehicle, charge_state)
+            db.session.commit()
+
+    @staticmethod
+    def _charges():
+        return [
+            (0, {"charging_state": "Disconnected", "battery_level": 50}),
+            (1, {"charging_state": "Charging", "battery_level": 50, "charge_energy_added": 0.0, "charger_power": 7}),
+            (2, {"charging_state": "Charging", "battery_level": 51, "charge_energy_added": 0.5, "charger_power": 11}),
+            (3, {"charging_state": "Charging", "battery_level": 52, "charge_energy_added": 1.0, "charger_power": 11}),
+            (4, {"charging_state": "Complete", "battery_level": 53, "charge_energy_added": 1.5, "charger_power": 0}),
+            (120, {"charging_state": "Charging", "battery_level": 53, "charge_energy_added": None}),
+        ]
@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+
+import flask_testing
+from flask import Flask
+
+from tesla_analytics import drain
+from tesla_analytics.models import db, ChargeState, DriveState, IdlePeriod
+from tests.helpers import drive_data
+from tests.test_worker import create_user, create_vehicle
+
+
+class TestDrain(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestDrain, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        self.vehicle = create_vehicle("vehicle_id", create_user())
+        self.start = datetime(2018, 2, 14, 20, 0, 0)
+
+    def tearDown(self):
+        super(TestDrain, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def test_record_builds_idle_periods_while_parked_and_disconnected(self):
+        self._record_all()
+
+        stored = IdlePeriod.query.order_by(IdlePeriod.start_time).all()
+
+        self.assertEqual(len(stored), 2)
+        self.assertEqual(stored[0].serialize(), {
+            "start_time": "2018-02-14T20:00:00Z",
+            "end_time": "2018-02-14T23:00:00Z",
+            "duration": 10800.0,
+            "start_battery_level": 80.0,
+            "end_battery_level": 78.0,
+            "level_lost": 2.0,
+            "range_lost": 5.0,
+            "drain_rate": 16.0,
+            "in_progress": False,
+        })
+        self.assertTrue(stored[1].in_progress)
+        self.assertEqual(stored[1].start_time, self.start + timedelta(minutes=300))
+        self.assertIsNone(stored[1].serialize()["drain_rate"])
+
+    def test_rebuild_in_chunks_matches_incremental_detection(self):
+        self._record_all()
+        incremental = [period.serialize() for period in IdlePeriod.query.order_by(IdlePeriod.start_time).all()]
+
+        count = drain.rebuild(self.vehicle, chunk_size=2)
+        rebuilt = [period.serialize() for period in IdlePeriod.query.order_by(IdlePeriod.start_time).all()]
+
+        self.assertEqual(count, 2)
+        self.assertEqual(rebuilt, incremental)
+
+    def test_long_gaps_split_idle_periods(self):
+        for minutes in [0, 60, 60 + 7 * 60]:
+            timestamp = self.start + timedelta(minutes=minutes)
+            charge_state = ChargeState(self._charge(timestamp, "Disconnected", 80), vehicle=self.vehicle)
+            drive_state = DriveState(drive_data(timestamp, "P"), vehicle=self.vehicle)
+            db.session.add_all([charge_state, drive_state])
+            drain.record(self.vehicle, charge_state, drive_state)
+            db.session.commit()
+
+        self.assertEqual(IdlePeriod.query.count(), 2)
+
+    def test_polls_without_a_drive_state_neither_open_nor_extend_periods(self):
+        for minutes, with_drive_state in [(0, False), (60, True), (120, False)]:
+            timestamp = self.start + timedelta(minutes=minutes)
+            charge_state = ChargeState(self._charge(timestamp, "Disconnected", 80), vehicle=self.vehicle)
+            drive_state = DriveState(drive_data(timestamp, "P"), vehicle=self.vehicle) if with_drive_state else None
+            db.session.add_all([state for state in [charge_state, drive_state] if state is not None])
+            drain.record(self.vehicle, charge_state, drive_state)
+            db.session.commit()
+
+        incremental = [period.serialize() for period in IdlePeriod.query.all()]
+        drain.rebuild(self.vehicle)
+        rebuilt = [period.serialize() for period in IdlePeriod.query.all()]
+
+        self.assertEqual(len(incremental), 1)
+        self.assertEqual(incremental[0]["start_time"], "2018-02-14T21:00:00Z")
+        self.assertEqual(incremental[0]["end_time"], "2018-02-14T21:00:00Z")
+        self.assertEqual(rebuilt, incremental)
+
+    def test_summary_reports_drain_rate_per_bucket(self):
+        self._record_all()
+
+        self.assertEqual(drain.summary(self.vehicle, "day"), [{
+            "timestamp": "2018-02-14T00:00:00Z",
+            "periods": 1,
+            "duration": 10800.0,
+            "level_lost": 2.0,
+            "range_lost": 5.0,
+            "drain_rate": 16.0,
+        }])
+
+    def test_summary_splits_periods_across_buckets_and_skips_missing_levels(self):
+        db.session.add_all([
+            IdlePeriod(vehicle=self.vehicle, start_time=self.start, end_time=self.start + timedelta(hours=16),
+                       start_battery_level=80.0, end_battery_level=76.0, start_range=200.0, end_range=190.0),
+            IdlePeriod(vehicle=self.vehicle, start_time=self.start + timedelta(hours=18),
+                       end_time=self.start + timedelta(hours=30), start_battery_level=None, end_battery_level=None),
+        ])
+        db.session.commit()
+
+        self.assertEqual(drain.summary(self.vehicle, "day"), [
+            {"timestamp": "2018-02-14T00:00:00Z", "periods": 1, "duration": 14400.0, "level_lost": 1.0,
+             "range_lost": 2.5, "drain_rate": 6.0},
+            {"timestamp": "2018-02-15T00:00:00Z", "periods": 1, "duration": 43200.0, "level_lost": 3.0,
+             "range_lost": 7.5, "drain_rate": 6.0},
+        ])
+
+    def _record_all(self):
+        for minutes, charging_state, battery_level, shift_state in self._states():
+            timestamp = self.start + timedelta(minutes=minutes)
+            charge_state = ChargeState(self._charge(timestamp, charging_state, battery_level), vehicle=self.vehicle)
+            drive_state = DriveState(drive_data(timestamp, shift_state), vehicle=self.vehicle)
+            db.session.add_all([charge_state, drive_state])
+            drain.record(self.vehicle, charge_state, drive_state)
+            db.session.commit()
+
+    @staticmethod
+    def _charge(timestamp: datetime, charging_state: str, battery_level: float) -> dict:
+        return {
+            "timestamp": int(timestamp.timestamp() * 1000),
+            "charging_state": charging_state,
+            "battery_level": battery_level,
+            "battery_range": battery_level * 2.5,
+        }
+
+    @staticmethod
+    def _states():
+        return [
+            (0, "Disconnected", 80, "P"),
+            (60, "Disconnected", 79, None),
+            (180, "Disconnected", 78, "P"),
+            (190, "Disconnected", 77, "D"),
+            (200, "Charging", 77, "P"),
+            (300, "Disconnected", 80, "P"),
+        ]
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import flask_testing
+from flask import Flask
+
+from tesla_analytics import efficiency, trips
+from tesla_analytics.models import db, ClimateState, DriveState, EfficiencyBucket, Trip
+from tests.helpers import drive_data
+from tests.test_worker import create_user, create_vehicle
+
+
+class TestEfficiency(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestEfficiency, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        self.vehicle = create_vehicle("vehicle_id", create_user())
+        self.start = datetime(2018, 2, 14, 8, 0, 0)
+
+    def tearDown(self):
+        super(TestEfficiency, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def _climate(self, timestamp: datetime, outside_temp: float):
+        db.session.add(ClimateState({
+            "timestamp": int(timestamp.timestamp() * 1000),
+            "outside_temp": outside_temp,
+        }, vehicle=self.vehicle))
+
+    def _drive(self):
+        states = [drive_data(self.start, "P")]
+        for i in range(1, 6):
+            states.append(drive_data(self.start + timedelta(seconds=15 * i), "D", 37.5 + 0.001 * i, -122.0,
+                                     power=20, speed=35))
+        states.append(drive_data(self.start + timedelta(seconds=90), "P", 37.505, -122.0))
+        later = self.start + timedelta(minutes=30)
+        for i in range(4):
+            states.append(drive_data(later + timedelta(seconds=15 * i), "D", 37.505 + 0.002 * i, -122.0,
+                                     power=40, speed=65))
+        return states
+
+    def _record_all(self):
+        self._climate(self.start, 12.0)
+        self._climate(self.start + timedelta(minutes=29), 3.5)
+        db.session.commit()
+        for data in self._drive():
+            drive_state = DriveState(data, vehicle=self.vehicle)
+            db.session.add(drive_state)
+            trips.record(self.vehicle, drive_state)
+            efficiency.record(self.vehicle, drive_state)
+            db.session.commit()
+
+    def _buckets(self):
+        return [
+            (bucket.day.isoformat(), bucket.speed, bucket.temperature, round(bucket.distance, 6),
+             round(bucket.energy, 6), bucket.duration)
+            for bucket in EfficiencyBucket.query.order_by(EfficiencyBucket.speed, EfficiencyBucket.temperature).all()
+        ]
+
+    def test_record_buckets_driving_intervals_by_speed_and_temperature(self):
+        self._record_all()
+
+        buckets = self._buckets()
+
+        self.assertEqual([bucket[:3] for bucket in buckets], [
+            ("2018-02-14", 0, 10),
+            ("2018-02-14", 30, 10),
+            ("2018-02-14", 60, 0),
+        ])
+        self.assertAlmostEqual(buckets[1][4], 4 * 20 * 15 / 3600.0, places=5)
+        self.assertEqual(buckets[1][5], 60.0)
+        self.assertAlmostEqual(buckets[2][4], 3 * 40 * 15 / 3600.0, places=5)
+        total_distance = sum(bucket[3] for bucket in buckets)
+        trip_distance = sum(trip.distance for trip in Trip.query.all())
+        self.assertAlmostEqual(total_distance, trip_distance, places=5)
+
+    def test_rebuild_in_chunks_matches_incremental_recording(self):
+        self._record_all()
+        incremental = self._buckets()
+
+        count = efficiency.rebuild(self.vehicle, chunk_size=2)
+
+        self.assertEqual(count, 8)
+        self.assertEqual(self._buckets(), incremental)
+
+    def test_summary_reports_wh_per_mile_per_group(self):
+        self._record_all()
+
+        by_temperature = efficiency.summary(self.vehicle, "temperature")
+        by_day = efficiency.summary(self.vehicle, "day")
+
+        self.assertEqual([group["temperature"] for group in by_temperature], [0, 10])
+        self.assertEqual(len(by_day), 1)
+        self.assertEqual(by_day[0]["day"], "2018-02-14")
+        self.assertAlmostEqual(by_day[0]["efficiency"], by_day[0]["energy"] * 1000 / by_day[0]["distance"])
+        self.assertEqual(by_day[0]["duration"], 8 * 15.0)
+
+    def test_unknown_temperature_without_nearby_climate_state(self):
+        for data in self._drive()[:3]:
+            db.session.add(DriveState(data, vehicle=self.vehicle))
+        db.session.commit()
+
+        efficiency.rebuild(self.vehicle)
+
+        self.assertEqual(efficiency.summary(self.vehicle, "temperature")[0]["temperature"], None)
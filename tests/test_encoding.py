@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+from unittest import TestCase, mock
+
+from tesla_analytics import encoding
+from tesla_analytics.models import ChargeState, DriveState
+
+
+class TestEncoding(TestCase):
+    payload = {
+        "timestamp": datetime(2018, 2, 14, 10, 17, 30, 123000),
+        "values": [1, 2.5, None, float("nan"), float("inf")],
+        "nested": {"speed": float("-inf"), "state": "Charging", "flag": True},
+        "pair": (datetime(2018, 2, 14), 3),
+    }
+    expected = {
+        "timestamp": "2018-02-14T10:17:30.123000Z",
+        "values": [1, 2.5, None, None, None],
+        "nested": {"speed": None, "state": "Charging", "flag": True},
+        "pair": ["2018-02-14T00:00:00Z", 3],
+    }
+
+    def test_encodes_with_orjson(self):
+        self.assertIsNotNone(encoding.orjson)
+
+        self.assertEqual(json.loads(encoding.dumps(self.payload)), self.expected)
+
+    def test_fallback_matches_orjson(self):
+        with mock.patch.object(encoding, "orjson", None):
+            fallback = encoding.dumps(self.payload)
+
+        self.assertEqual(json.loads(fallback), self.expected)
+        self.assertEqual(fallback, encoding.dumps(self.payload))
+
+    def test_fallback_rejects_unknown_types(self):
+        with mock.patch.object(encoding, "orjson", None):
+            with self.assertRaises(TypeError):
+                encoding.dumps({"value": object()})
+
+    def test_serialize_rows_matches_model_serialize(self):
+        timestamp = datetime(2018, 2, 14, 10, 17, 30)
+        state = DriveState({
+            "timestamp": int(timestamp.timestamp() * 1000),
+            "gps_as_of": int(timestamp.timestamp()),
+            "latitude": 37.5,
+            "longitude": -122.1,
+            "power": None,
+            "shift_state": "D",
+            "speed": 45,
+            "heading": 182,
+        }, vehicle=None)
+        row = [state.data] + [getattr(state, name) for name in DriveState.serialized_columns]
+
+        self.assertEqual(
+            json.loads(encoding.dumps(encoding.serialize_rows(DriveState, [row]))),
+            json.loads(encoding.dumps([state.serialize()]))
+        )
+        self.assertEqual(encoding.serialized_columns(ChargeState), [ChargeState.data, ChargeState.timestamp])
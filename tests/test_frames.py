@@ -0,0 +1,143 @@
+import unittest
+from datetime import datetime, timedelta
+
+import flask_testing
+from flask import Flask
+
+from tesla_analytics import frames
+from tesla_analytics.models import db, ChargeState, ClimateState, DriveState, VehicleState
+from tests.helpers import drive_data
+from tests.test_worker import create_user, create_vehicle
+
+
+class TestFrames(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestFrames, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        self.vehicle = create_vehicle("vehicle_id", create_user())
+        self.start = datetime(2018, 2, 14, 20, 0, 0)
+
+    def tearDown(self):
+        super(TestFrames, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def test_chunks_flatten_json_fields_into_typed_columns(self):
+        for minutes in range(5):
+            db.session.add(ChargeState({
+                "timestamp": int((self.start + timedelta(minutes=minutes)).timestamp() * 1000),
+                "charging_state": "Charging",
+                "battery_level": 50 + minutes,
+                "charger_power": None,
+                "fast_charger_present": False,
+            }, vehicle=self.vehicle))
+        db.session.commit()
+
+        chunks = list(frames.chunks(ChargeState, self.vehicle.id, chunk_size=2))
+
+        self.assertEqual([len(chunk["timestamp"]) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(chunks[0]["timestamp"], [self.start, self.start + timedelta(minutes=1)])
+        self.assertEqual(chunks[0]["battery_level"], [50.0, 51.0])
+        self.assertEqual(chunks[0]["charging_state"], ["Charging", "Charging"])
+        self.assertEqual(chunks[0]["charger_power"], [None, None])
+        self.assertEqual(chunks[0]["fast_charger_present"], [False, False])
+        self.assertEqual(chunks[0]["ideal_battery_range"], [None, None])
+
+    def test_chunks_read_drive_columns_and_respect_time_range(self):
+        for minutes in range(5):
+            db.session.add(DriveState(drive_data(self.start + timedelta(minutes=minutes), "D", speed=minutes),
+                                      vehicle=self.vehicle))
+        db.session.commit()
+
+        chunks = list(frames.chunks(DriveState, self.vehicle.id, after=self.start + timedelta(minutes=1),
+                                    before=self.start + timedelta(minutes=3)))
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0]["speed"], [1, 2, 3])
+        self.assertEqual(chunks[0]["shift_state"], ["D", "D", "D"])
+
+    def test_chunks_exclude_the_after_bound_like_the_endpoints(self):
+        for minutes in range(3):
+            db.session.add(DriveState(drive_data(self.start + timedelta(minutes=minutes), "D", speed=minutes),
+                                      vehicle=self.vehicle))
+        db.session.commit()
+
+        chunks = list(frames.chunks(DriveState, self.vehicle.id, after=self.start + timedelta(minutes=1)))
+
+        self.assertEqual(chunks[0]["speed"], [2])
+
+    def test_chunks_read_fractional_headings_and_fan_speeds(self):
+        drive_state = drive_data(self.start, "D", speed=30)
+        drive_state["heading"] = 181.5
+        db.session.add_all([
+            DriveState(drive_state, vehicle=self.vehicle),
+            ClimateState({"timestamp": int(self.start.timestamp() * 1000), "fan_status": 2.5}, vehicle=self.vehicle),
+        ])
+        db.session.commit()
+
+        self.assertEqual(list(frames.chunks(DriveState, self.vehicle.id))[0]["heading"], [181.5])
+        self.assertEqual(list(frames.chunks(ClimateState, self.vehicle.id))[0]["fan_status"], [2.5])
+
+    def test_partitions_cover_the_stored_range_without_overlap(self):
+        for hours in range(9):
+            db.session.add(VehicleState({
+                "timestamp": int((self.start + timedelta(hours=hours)).timestamp() * 1000),
+                "odometer": 100.0 + hours,
+            }, vehicle=self.vehicle))
+        db.session.commit()
+
+        partitions = frames.partitions(VehicleState, self.vehicle.id, count=4)
+        odometers = [
+            value for bounds in partitions
+            for chunk in frames.chunks(VehicleState, self.vehicle.id, partition=bounds) for value in chunk["odometer"]
+        ]
+
+        self.assertEqual(len(partitions), 4)
+        self.assertEqual(partitions[1][0], self.start + timedelta(hours=2))
+        self.assertIsNone(partitions[-1][1])
+        self.assertEqual(odometers, [100.0 + hours for hours in range(9)])
+
+    def test_partitions_are_empty_without_data(self):
+        self.assertEqual(frames.partitions(VehicleState, self.vehicle.id), [])
+
+    @unittest.skipIf(frames.pyarrow is None, "pyarrow is not installed")
+    def test_table_matches_serial_read_when_read_in_parallel(self):
+        for minutes in range(20):
+            db.session.add(VehicleState({
+                "timestamp": int((self.start + timedelta(minutes=minutes)).timestamp() * 1000),
+                "odometer": 100.0 + minutes,
+                "locked": minutes % 2 == 0,
+            }, vehicle=self.vehicle))
+        db.session.commit()
+
+        serial = frames.table(VehicleState, self.vehicle, chunk_size=3)
+        parallel = frames.table(VehicleState, self.vehicle, chunk_size=3, workers=4)
+
+        self.assertEqual(serial.num_rows, 20)
+        self.assertEqual(serial.schema, frames.arrow_schema(VehicleState))
+        self.assertTrue(serial.equals(parallel))
+
+    @unittest.skipIf(frames.pandas is None, "pandas is not installed")
+    def test_dataframe_has_typed_columns(self):
+        db.session.add(DriveState(drive_data(self.start, "D", speed=30), vehicle=self.vehicle))
+        db.session.commit()
+
+        dataframe = frames.dataframe(DriveState, self.vehicle)
+
+        self.assertEqual(list(dataframe.columns), [name for name, _ in frames.columns(DriveState)])
+        self.assertEqual(dataframe["speed"].tolist(), [30])
+        self.assertEqual(dataframe["timestamp"].tolist()[0].to_pydatetime(), self.start)
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from tesla_analytics.geo import haversine, cell, covering, bounding_box
+
+
+class TestHaversine(unittest.TestCase):
+    def test_measures_distance_in_miles(self):
+        self.assertAlmostEqual(float(haversine(0.0, 0.0, 0.0, 1.0)), 69.094, places=3)
+        self.assertAlmostEqual(float(haversine(0.0, 0.0, 1.0, 0.0)), 69.094, places=3)
+
+    def test_is_vectorized(self):
+        distances = haversine(np.zeros(3), np.zeros(3), np.zeros(3), np.array([0.0, 1.0, 2.0]))
+        self.assertEqual(distances.shape, (3,))
+        self.assertEqual(distances[0], 0)
+
+
+class TestCell(unittest.TestCase):
+    def test_nearby_points_share_cell_prefixes(self):
+        first = int(cell(37.548271, -121.988571))
+        second = int(cell(37.548272, -121.988572))
+        far = int(cell(-33.8688, 151.2093))
+
+        self.assertEqual(first >> 20, second >> 20)
+        self.assertNotEqual(first >> 20, far >> 20)
+
+    def test_is_vectorized(self):
+        cells = cell([37.548271, -33.8688], [-121.988571, 151.2093])
+        self.assertEqual(cells.tolist(), [int(cell(37.548271, -121.988571)), int(cell(-33.8688, 151.2093))])
+
+
+class TestCovering(unittest.TestCase):
+    def test_ranges_contain_points_inside_box(self):
+        ranges = covering(37.5, -122.0, 37.6, -121.9)
+        inside = int(cell(37.548271, -121.988571))
+        outside = int(cell(37.7749, -122.4194))
+
+        self.assertLessEqual(len(ranges), 16)
+        self.assertTrue(any(low <= inside < high for low, high in ranges))
+        self.assertFalse(any(low <= outside < high for low, high in ranges))
+
+    def test_merges_adjacent_cells(self):
+        self.assertEqual(covering(-90, -180, 90, 180), [(0, 1 << 52)])
+
+
+class TestBoundingBox(unittest.TestCase):
+    def test_surrounds_radius(self):
+        south, west, north, east = bounding_box(0.0, 0.0, 1000)
+        self.assertAlmostEqual(north, 0.008993, places=5)
+        self.assertAlmostEqual(south, -north)
+        self.assertAlmostEqual(east, north)
+        self.assertAlmostEqual(west, -east)
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import flask_testing
+from flask import Flask
+
+from tesla_analytics import heatmap
+from tesla_analytics.models import db, DriveState, HeatmapCell
+from tests.helpers import drive_data
+from tests.test_worker import create_user, create_vehicle
+
+
+class TestHeatmap(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestHeatmap, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        self.vehicle = create_vehicle("vehicle_id", create_user())
+        self.start = datetime(2018, 2, 14, 8, 0, 0)
+
+    def tearDown(self):
+        super(TestHeatmap, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def test_record_counts_driving_and_parked_samples_per_level(self):
+        self._record_all()
+
+        cells = HeatmapCell.query.filter_by(level=8).all()
+        self.assertEqual(len(cells), 2)
+        self.assertEqual(sorted((cell.driving_count, cell.parked_count) for cell in cells), [(0, 1), (2, 1)])
+        self.assertEqual(HeatmapCell.query.filter_by(level=20).count(), 4)
+
+    def test_rebuild_in_chunks_matches_incremental_counts(self):
+        self._record_all()
+        incremental = self._snapshot()
+
+        count = heatmap.rebuild(self.vehicle, chunk_size=2)
+
+        self.assertEqual(count, 4)
+        self.assertEqual(self._snapshot(), incremental)
+
+    def test_cells_returns_counts_inside_bounds(self):
+        self._record_all()
+
+        latitudes, longitudes, counts = heatmap.cells(self.vehicle, 14, "all", 37.5, -122.0, 37.6, -121.9)
+
+        self.assertEqual(counts.tolist(), [3])
+        self.assertAlmostEqual(float(latitudes[0]), 37.5458, places=3)
+        self.assertAlmostEqual(float(longitudes[0]), -121.9812, places=3)
+
+        _, _, parked_counts = heatmap.cells(self.vehicle, 14, "parked", 37.5, -122.0, 37.6, -121.9)
+        self.assertEqual(parked_counts.tolist(), [1])
+
+    def _record_all(self):
+        samples = [
+            ("P", 37.548271, -121.988571),  # Tesla Factory, Fremont
+            ("D", 37.548471, -121.988571),
+            ("D", 37.548671, -121.988571),
+            ("P", 40.7128, -74.0060),  # New York
+            (None, None, None),
+        ]
+        for i, (shift_state, latitude, longitude) in enumerate(samples):
+            drive_state = DriveState(
+                drive_data(self.start + timedelta(minutes=i), shift_state, latitude, longitude),
+                vehicle=self.vehicle
+            )
+            db.session.add(drive_state)
+            heatmap.record(self.vehicle, drive_state)
+            db.session.commit()
+
+    def _snapshot(self):
+        return sorted(
+            (cell.level, cell.cell, cell.driving_count, cell.parked_count) for cell in HeatmapCell.query.all()
+        )
@@ -0,0 +1,45 @@
+import threading
+from unittest import TestCase, mock
+
+from psycopg2 import InterfaceError
+
+from tesla_analytics import live
+
+
+class TestListener(TestCase):
+    def setUp(self):
+        self.listener = live.Listener()
+        self.attempts = 0
+        self.thread = None
+        patcher = mock.patch.object(threading, "excepthook", lambda arguments: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reconnects_after_any_error_and_clears_thread_on_exit(self):
+        def listen(engine):
+            self.attempts += 1
+            self.thread = threading.current_thread()
+            if self.attempts == 1:
+                raise InterfaceError("connection already closed")
+            self.listener.listening.set()
+            raise SystemExit()
+
+        self.listener._listen = listen
+        with mock.patch.object(live, "RECONNECT_DELAY", 0), mock.patch.object(live, "db"):
+            self.assertTrue(self.listener.start(timeout=5))
+            self.thread.join(5)
+
+        self.assertEqual(self.attempts, 2)
+        self.assertIsNone(self.listener.thread)
+        self.assertFalse(self.listener.listening.is_set())
+
+    def test_subscribe_raises_if_listener_does_not_come_up(self):
+        def listen(engine):
+            raise SystemExit()
+
+        self.listener._listen = listen
+        with mock.patch.object(live, "db"), mock.patch.object(live, "LISTEN_TIMEOUT", 0.1):
+            with self.assertRaises(live.ListenerUnavailable):
+                self.listener.subscribe(1)
+
+        self.assertEqual(self.listener.subscribers, {})
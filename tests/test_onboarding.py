@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+from urllib import error as urlliberror
+
+import bcrypt
+import flask_testing
+from flask import Flask
+from mockito import mock, when, unstub
+
+from tesla_analytics import onboarding
+from tesla_analytics.models import db, User, Vehicle
+from tests.test_worker import create_user, create_vehicle
+
+
+def tesla_vehicle(vehicle_id, vin, name=None, color=None):
+    return {"id": vehicle_id, "vin": vin, "display_name": name, "color": color}
+
+
+class TestOnboarding(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestOnboarding, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+    def tearDown(self):
+        super(TestOnboarding, self).tearDown()
+        unstub()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def stub_tesla(self, tesla_email, token, vehicles):
+        service = mock({"token": token})
+        when(service).vehicles().thenReturn(vehicles)
+        when(onboarding).TeslaService(email=tesla_email, password="tesla_password").thenReturn(service)
+
+    def test_creates_users_and_vehicles_in_batches(self):
+        self.stub_tesla("one@tesla.com", "token_1", [tesla_vehicle(1, "vin_1", "Car")])
+        self.stub_tesla("two@tesla.com", "token_2", [tesla_vehicle(2, "vin_2"), tesla_vehicle(3, "vin_3")])
+        self.stub_tesla("three@tesla.com", "token_3", [])
+
+        results = list(onboarding.onboard([
+            onboarding.Account("one@example.com", "one", "one@tesla.com", "tesla_password"),
+            onboarding.Account("two@example.com", "two", "two@tesla.com", "tesla_password"),
+            onboarding.Account("three@example.com", "three", "three@tesla.com", "tesla_password"),
+        ], workers=2, batch_size=2))
+
+        self.assertEqual(sorted(results), [
+            onboarding.Result("one@example.com", 1, None),
+            onboarding.Result("three@example.com", 0, None),
+            onboarding.Result("two@example.com", 2, None),
+        ])
+        user = User.query.filter_by(email="two@example.com").one()
+        self.assertEqual(user.tesla_access_token, "token_2")
+        self.assertTrue(bcrypt.checkpw(b"two", user.password_hash.encode("utf-8")))
+        self.assertEqual(sorted((v.tesla_id, v.vin) for v in user.vehicles), [("2", "vin_2"), ("3", "vin_3")])
+        self.assertEqual(Vehicle.query.filter_by(tesla_id="1").one().name, "Car")
+
+    def test_updates_existing_users_and_vehicles(self):
+        user = create_user("one@example.com")
+        create_vehicle("1", user, vin="old_vin")
+        self.stub_tesla("one@tesla.com", "new_token", [tesla_vehicle(1, "new_vin", "Car"), tesla_vehicle(2, "vin_2")])
+
+        results = list(onboarding.onboard([
+            onboarding.Account("one@example.com", "new_password", "one@tesla.com", "tesla_password"),
+        ]))
+
+        self.assertEqual(results, [onboarding.Result("one@example.com", 2, None)])
+        db.session.expire_all()
+        self.assertEqual(User.query.count(), 1)
+        user = User.query.one()
+        self.assertEqual(user.tesla_access_token, "new_token")
+        self.assertTrue(bcrypt.checkpw(b"test", user.password_hash.encode("utf-8")))
+        self.assertEqual(sorted((v.tesla_id, v.vin, v.name) for v in user.vehicles),
+                         [("1", "new_vin", "Car"), ("2", "vin_2", None)])
+
+    def test_resets_passwords_of_existing_users_only_when_asked(self):
+        create_user("one@example.com")
+        self.stub_tesla("one@tesla.com", "new_token", [])
+
+        results = list(onboarding.onboard([
+            onboarding.Account("one@example.com", "new_password", "one@tesla.com", "tesla_password"),
+        ], reset_passwords=True))
+
+        self.assertEqual(results, [onboarding.Result("one@example.com", 0, None)])
+        db.session.expire_all()
+        self.assertEqual(User.query.count(), 1)
+        self.assertTrue(bcrypt.checkpw(b"new_password", User.query.one().password_hash.encode("utf-8")))
+
+    def test_reports_failed_and_duplicate_accounts(self):
+        self.stub_tesla("one@tesla.com", "token_1", [])
+        when(onboarding).TeslaService(email="bad@tesla.com", password="tesla_password") \
+            .thenRaise(urlliberror.URLError("Unauthorized"))
+
+        results = list(onboarding.onboard([
+            onboarding.Account("one@example.com", "one", "one@tesla.com", "tesla_password"),
+            onboarding.Account("bad@example.com", "bad", "bad@tesla.com", "tesla_password"),
+            onboarding.Account("one@example.com", "one", "one@tesla.com", "tesla_password"),
+        ]))
+
+        self.assertEqual(results, [
+            onboarding.Result("one@example.com", 0, "Duplicate account"),
+            onboarding.Result("bad@example.com", 0, "URLError: <urlopen error Unauthorized>"),
+            onboarding.Result("one@example.com", 0, None),
+        ])
+        self.assertEqual([user.email for user in User.query.all()], ["one@example.com"])
+
+    def test_reports_invalid_accounts_without_stopping(self):
+        self.stub_tesla("one@tesla.com", "token_1", [])
+
+        results = list(onboarding.onboard([
+            onboarding.InvalidAccount("Line 1 is not valid JSON"),
+            onboarding.Account("one@example.com", "one", "one@tesla.com", "tesla_password"),
+        ]))
+
+        self.assertEqual(results, [
+            onboarding.Result(None, 0, "Line 1 is not valid JSON"),
+            onboarding.Result("one@example.com", 0, None),
+        ])
+
+
+class TestReadAccounts(flask_testing.TestCase):
+    def create_app(self):
+        return Flask(__name__)
+
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w") as destination:
+            destination.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_reads_csv(self):
+        path = self.write(".csv", "email,password,tesla_email,tesla_password\n"
+                                  "me@example.com,secret,me@tesla.com,tesla_secret\n")
+
+        self.assertEqual(list(onboarding.read_accounts(path)), [
+            onboarding.Account("me@example.com", "secret", "me@tesla.com", "tesla_secret"),
+        ])
+
+    def test_reads_jsonl(self):
+        path = self.write(".jsonl", json.dumps({
+            "email": "me@example.com", "password": "secret", "tesla_email": "me@tesla.com", "tesla_password": "t"
+        }) + "\n\n")
+
+        self.assertEqual(list(onboarding.read_accounts(path)), [
+            onboarding.Account("me@example.com", "secret", "me@tesla.com", "t"),
+        ])
+
+    def test_reports_malformed_lines_and_continues(self):
+        path = self.write(".jsonl", "\n".join([
+            "{not json",
+            json.dumps({"email": "me@example.com", "password": "secret"}),
+            json.dumps(["me@example.com"]),
+            json.dumps({"email": "me@example.com", "password": "secret", "tesla_email": "me@tesla.com",
+                        "tesla_password": "t"}),
+        ]) + "\n")
+
+        self.assertEqual([str(item) for item in onboarding.read_accounts(path)], [
+            "Line 1 is not valid JSON",
+            "Line 2 must have fields email, password, tesla_email, tesla_password",
+            "Line 3 must have fields email, password, tesla_email, tesla_password",
+            str(onboarding.Account("me@example.com", "secret", "me@tesla.com", "t")),
+        ])
+
+    def test_reports_csv_rows_with_missing_fields(self):
+        path = self.write(".csv", "email,password,tesla_email,tesla_password\n"
+                                  "me@example.com,secret\n"
+                                  "you@example.com,secret,you@tesla.com,t\n")
+
+        accounts = list(onboarding.read_accounts(path))
+
+        self.assertIsInstance(accounts[0], onboarding.InvalidAccount)
+        self.assertEqual(str(accounts[0]), "Line 2 must have fields email, password, tesla_email, tesla_password")
+        self.assertEqual(accounts[1], onboarding.Account("you@example.com", "secret", "you@tesla.com", "t"))
@@ -0,0 +1,109 @@
+import threading
+from unittest import TestCase
+
+import bcrypt
+import flask_testing
+from flask import Flask
+from mockito import when, unstub
+
+from tesla_analytics import passwords
+
+
+class TestVerifier(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["LOGIN_WORKERS"] = 1
+        app.config["LOGIN_MAX_PENDING"] = 1
+        return app
+
+    def setUp(self):
+        self.verifier = passwords.Verifier()
+        self.password_hash = bcrypt.hashpw(b"test", bcrypt.gensalt(4)).decode("utf-8")
+
+    def tearDown(self):
+        self.verifier.shutdown()
+
+    def test_verifies_passwords_in_worker_process(self):
+        self.assertTrue(self.verifier.verify("test", self.password_hash))
+        self.assertFalse(self.verifier.verify("not_test", self.password_hash))
+
+    def test_fails_fast_when_pending_limit_reached(self):
+        self.verifier.verify("test", self.password_hash)
+        self.verifier.pending.acquire()
+
+        with self.assertRaises(passwords.Saturated):
+            self.verifier.verify("test", self.password_hash)
+
+        self.verifier.pending.release()
+        self.assertTrue(self.verifier.verify("test", self.password_hash))
+
+
+class TestThrottle(TestCase):
+    def setUp(self):
+        self.throttle = passwords.Throttle()
+        self.now = 1000.0
+        when(passwords.time).monotonic().thenAnswer(lambda: self.now)
+
+    def tearDown(self):
+        unstub()
+
+    def test_raises_once_limit_of_failures_reached(self):
+        self.throttle.attempt([("email:me@example.com", 2)])
+        self.throttle.attempt([("email:me@example.com", 2)])
+
+        with self.assertRaises(passwords.Throttled) as context:
+            self.throttle.attempt([("email:me@example.com", 2), ("address:127.0.0.1", 10)])
+        self.assertEqual(context.exception.retry_after, passwords.FAILURE_WINDOW + 1)
+        self.assertNotIn("address:127.0.0.1", self.throttle.failures)
+
+    def test_failures_expire_after_window(self):
+        self.throttle.attempt([("email:me@example.com", 1)])
+        self.now += passwords.FAILURE_WINDOW
+
+        self.throttle.attempt([("email:me@example.com", 1)])
+        self.assertEqual(list(self.throttle.failures["email:me@example.com"]), [self.now])
+
+    def test_reset_forgets_failures(self):
+        self.throttle.attempt([("email:me@example.com", 1), ("address:127.0.0.1", 1)])
+        self.throttle.reset("email:me@example.com")
+
+        self.throttle.attempt([("email:me@example.com", 2)])
+        with self.assertRaises(passwords.Throttled):
+            self.throttle.attempt([("address:127.0.0.1", 1)])
+
+    def test_forgive_removes_only_that_attempt(self):
+        self.throttle.attempt([("address:127.0.0.1", 5)])
+        self.now += 1
+        attempted_at = self.throttle.attempt([("address:127.0.0.1", 5)])
+
+        self.throttle.forgive(attempted_at, "address:127.0.0.1", "email:me@example.com")
+
+        self.assertEqual(list(self.throttle.failures["address:127.0.0.1"]), [self.now - 1])
+
+    def test_concurrent_attempts_cannot_exceed_limit(self):
+        unstub()
+        allowed = []
+        barrier = threading.Barrier(20)
+
+        def attempt():
+            barrier.wait()
+            try:
+                self.throttle.attempt([("email:me@example.com", 5)])
+                allowed.append(True)
+            except passwords.Throttled:
+                pass
+
+        threads = [threading.Thread(target=attempt) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(allowed), 5)
+
+    def test_evicts_least_recently_failed_keys_beyond_limit(self):
+        throttle = passwords.Throttle(max_keys=2)
+        for address in ["10.0.0.1", "10.0.0.2", "10.0.0.1", "10.0.0.3"]:
+            throttle.attempt([("address:{}".format(address), 10)])
+
+        self.assertEqual(list(throttle.failures), ["address:10.0.0.1", "address:10.0.0.3"])
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import flask_testing
+from flask import Flask
+
+from tesla_analytics import heatmap, purge, trips
+from tesla_analytics.models import db, Vehicle, ChargeState, ClimateState, DriveState, VehicleState, LatestState, \
+    Trip, HeatmapCell
+from tests.helpers import drive_data
+from tests.test_worker import create_user, create_vehicle
+
+
+class TestPurge(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestPurge, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        user = create_user()
+        self.vehicle = create_vehicle("vehicle_id", user)
+        self.other_vehicle = create_vehicle("other_id", user)
+        self.start = datetime(2018, 2, 14, 8, 0, 0)
+
+    def tearDown(self):
+        super(TestPurge, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def populate(self, vehicle: Vehicle, amount: int):
+        for i in range(amount):
+            timestamp = self.start + timedelta(seconds=15 * i)
+            milliseconds = int(timestamp.timestamp() * 1000)
+            db.session.add(ChargeState({"timestamp": milliseconds}, vehicle=vehicle))
+            db.session.add(ClimateState({"timestamp": milliseconds}, vehicle=vehicle))
+            db.session.add(VehicleState({"timestamp": milliseconds}, vehicle=vehicle))
+            drive_state = DriveState(drive_data(timestamp, shift_state="D"), vehicle=vehicle)
+            db.session.add(drive_state)
+            db.session.flush()
+            trips.record(vehicle, drive_state)
+            heatmap.record(vehicle, drive_state)
+        db.session.add(LatestState(vehicle_id=vehicle.id, updated_at=self.start))
+        db.session.commit()
+
+    def test_deletes_history_in_batches_and_then_the_vehicle(self):
+        self.populate(self.vehicle, 5)
+        self.populate(self.other_vehicle, 2)
+        vehicle_id = self.vehicle.id
+        heatmap_cells = HeatmapCell.query.filter_by(vehicle_id=vehicle_id).count()
+        progress = []
+
+        count = purge.purge(self.vehicle, batch_size=2, progress=lambda table, deleted: progress.append((table, deleted)))
+
+        self.assertEqual(progress[:3], [("charge_state", 2), ("charge_state", 4), ("charge_state", 5)])
+        self.assertIn(("trip", 1), progress)
+        self.assertIn(("latest_state", 1), progress)
+        self.assertEqual(count, 4 * 5 + 1 + heatmap_cells + 1)
+        self.assertIsNone(Vehicle.query.get(vehicle_id))
+        for model in purge.PURGED_MODELS:
+            self.assertEqual(model.query.filter_by(vehicle_id=vehicle_id).count(), 0)
+        self.assertEqual(ChargeState.query.filter_by(vehicle_id=self.other_vehicle.id).count(), 2)
+        self.assertEqual(Trip.query.filter_by(vehicle_id=self.other_vehicle.id).count(), 1)
+
+    def test_can_resume_after_partial_purge(self):
+        self.populate(self.vehicle, 3)
+        vehicle_id = self.vehicle.id
+        purge.delete_batch(ChargeState, vehicle_id, 2)
+        db.session.commit()
+
+        self.assertEqual(ChargeState.query.filter_by(vehicle_id=vehicle_id).count(), 1)
+
+        purge.purge(Vehicle.query.get(vehicle_id))
+
+        self.assertIsNone(Vehicle.query.get(vehicle_id))
+        self.assertEqual(ChargeState.query.filter_by(vehicle_id=vehicle_id).count(), 0)
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import flask_testing
+from flask import Flask
+
+from tesla_analytics import resampling
+from tesla_analytics.models import db, DriveState
+from tests.helpers import drive_data
+from tests.test_worker import create_user, create_vehicle
+
+
+class TestResampling(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestResampling, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        self.vehicle = create_vehicle("vehicle_id", create_user())
+        self.start = datetime(2018, 2, 14, 20, 0, 0)
+
+    def tearDown(self):
+        super(TestResampling, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def test_chunked_reads_match_a_single_read(self):
+        offsets = [0, 15, 50, 65, 140, 900, 915, 990, 1400, 1410]
+        for index, seconds in enumerate(offsets):
+            state = drive_data(self.start + timedelta(seconds=seconds), "D", power=index * 2.0, speed=index)
+            state["power"] = None if index == 3 else state["power"]
+            db.session.add(DriveState(state, vehicle=self.vehicle))
+        db.session.commit()
+
+        for fill in resampling.FILLS:
+            arguments = (DriveState, self.vehicle, ["power", "speed", "heading"], timedelta(seconds=30))
+            keywords = {"fill": fill, "max_gap": timedelta(minutes=5)}
+            whole = resampling.resample(*arguments, **keywords)
+            chunked = resampling.resample(*arguments, chunk_size=3, **keywords)
+
+            self.assertEqual(chunked, whole)
+            self.assertEqual(len(whole["timestamp"]), 48)
+            self.assertEqual(whole["heading"], [None] * 48)
+
+    def test_ignores_missing_values_per_field(self):
+        for index, seconds in enumerate([0, 60, 120]):
+            state = drive_data(self.start + timedelta(seconds=seconds), "D", power=10.0 * index, speed=index)
+            state["power"] = None if index == 1 else state["power"]
+            db.session.add(DriveState(state, vehicle=self.vehicle))
+        db.session.commit()
+
+        result = resampling.resample(DriveState, self.vehicle, ["power", "speed"], timedelta(seconds=60), fill="linear")
+
+        self.assertEqual(result["power"], [0.0, 10.0, 20.0])
+        self.assertEqual(result["speed"], [0, 1, 2])
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from tesla_analytics.routes import simplify, encode_polyline, geojson
+
+
+class TestSimplify(unittest.TestCase):
+    def test_keeps_endpoints_of_short_routes(self):
+        self.assertEqual(simplify(np.array([1.0, 2.0]), np.array([3.0, 4.0]), 5).tolist(), [True, True])
+
+    def test_drops_points_within_tolerance_of_straight_line(self):
+        latitudes = np.zeros(100)
+        longitudes = np.linspace(0, 0.01, 100)
+        latitudes[50] = 0.00001  # about a meter off the line
+
+        self.assertEqual(np.flatnonzero(simplify(latitudes, longitudes, 5)).tolist(), [0, 99])
+
+    def test_keeps_points_that_deviate_more_than_tolerance(self):
+        latitudes = np.zeros(100)
+        longitudes = np.linspace(0, 0.01, 100)
+        latitudes[50] = 0.0001  # about 11 meters off the line
+
+        self.assertEqual(np.flatnonzero(simplify(latitudes, longitudes, 5)).tolist(), [0, 49, 50, 51, 99])
+        self.assertEqual(np.flatnonzero(simplify(latitudes, longitudes, 20)).tolist(), [0, 99])
+
+    def test_handles_loops_that_return_to_start(self):
+        latitudes = np.array([0.0, 0.001, 0.001, 0.0])
+        longitudes = np.array([0.0, 0.0, 0.001, 0.0])
+
+        self.assertEqual(simplify(latitudes, longitudes, 5).tolist(), [True, True, True, True])
+
+
+class TestEncodePolyline(unittest.TestCase):
+    def test_matches_reference_encoding(self):
+        self.assertEqual(
+            encode_polyline(np.array([38.5, 40.7, 43.252]), np.array([-120.2, -120.95, -126.453])),
+            "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+        )
+
+    def test_encodes_empty_route(self):
+        self.assertEqual(encode_polyline(np.array([]), np.array([])), "")
+
+
+class TestGeoJSON(unittest.TestCase):
+    def test_uses_longitude_latitude_order(self):
+        self.assertEqual(geojson(np.array([37.5, 37.6]), np.array([-122.0, -122.1])), {
+            "type": "LineString",
+            "coordinates": [[-122.0, 37.5], [-122.1, 37.6]],
+        })
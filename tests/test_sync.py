@@ -0,0 +1,49 @@
+import flask_testing
+from flask import Flask
+from sqlalchemy import func, select
+
+from tesla_analytics import sync
+from tesla_analytics.models import db
+from tests.test_worker import create_user, create_vehicle
+
+
+class TestSync(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestSync, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        self.vehicle = create_vehicle("vehicle_id", create_user())
+
+    def tearDown(self):
+        super(TestSync, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def test_lock_writes_excludes_other_writers_until_commit(self):
+        sync.lock_writes(self.vehicle)
+
+        self.assertFalse(self._try_lock(self.vehicle.id))
+        self.assertTrue(self._try_lock(self.vehicle.id + 1))
+
+        db.session.commit()
+
+        self.assertTrue(self._try_lock(self.vehicle.id))
+
+    @staticmethod
+    def _try_lock(vehicle_id: int) -> bool:
+        with db.engine.connect() as connection:
+            with connection.begin():
+                return connection.execute(select([func.pg_try_advisory_xact_lock(sync.WRITE_LOCK, vehicle_id)])).scalar()
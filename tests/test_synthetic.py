@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import flask_testing
+import numpy as np
+from flask import Flask
+
+from tesla_analytics import synthetic
+from tesla_analytics.models import db, User, Vehicle, ChargeState, ClimateState, DriveState, VehicleState, Trip, \
+    ChargingSession, IdlePeriod, HeatmapCell, EfficiencyBucket, BatteryDay, LatestState
+
+
+class TestSynthetic(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestSynthetic, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+    def tearDown(self):
+        super(TestSynthetic, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def test_simulation_is_deterministic_for_a_seed(self):
+        first = self._simulate(7)
+        second = self._simulate(7)
+        other = self._simulate(8)
+
+        self.assertEqual(first.keys(), second.keys())
+        for name in synthetic.FIELDS:
+            np.testing.assert_array_equal(first[name], second[name], name)
+        self.assertNotEqual(first["time"].tolist(), other["time"].tolist())
+
+    def test_simulation_covers_driving_charging_and_parking(self):
+        polls = self._simulate(1)
+
+        self.assertTrue(np.all(np.diff(polls["time"]) > 0))
+        self.assertEqual(set(polls["shift_state"].tolist()), {None, "D", "P"})
+        self.assertEqual(set(polls["charging_state"].tolist()), {"Disconnected", "Charging", "Complete"})
+        self.assertTrue(np.all((polls["battery_level"] > 0) & (polls["battery_level"] <= synthetic.CHARGE_LIMIT)))
+        self.assertTrue(np.all(np.diff(polls["odometer"]) >= 0))
+        self.assertLessEqual(np.nanmax(polls["speed"].astype(float)), synthetic.MAX_SPEED)
+
+    def test_generate_copies_every_state_table(self):
+        count = synthetic.generate(vehicles=2, years=7 / 365, seed=3, start=datetime(2018, 2, 12), batch_size=1000)
+
+        vehicles = Vehicle.query.order_by(Vehicle.tesla_id).all()
+        self.assertEqual([vehicle.tesla_id for vehicle in vehicles], ["seed-3-0", "seed-3-1"])
+        self.assertEqual(User.query.one().email, "seed@example.com")
+        for model in [ChargeState, ClimateState, DriveState, VehicleState]:
+            self.assertEqual(model.query.count(), count / 4)
+
+        drive_state = DriveState.query.filter(DriveState.shift_state == "D").first()
+        self.assertIsNotNone(drive_state.cell)
+        self.assertIn("heading", drive_state.serialize())
+        self.assertEqual(ChargeState.query.first().serialize()["charge_limit_soc"], synthetic.CHARGE_LIMIT)
+
+    def test_generate_builds_the_derived_tables(self):
+        synthetic.generate(vehicles=1, years=7 / 365, seed=3, start=datetime(2018, 2, 12))
+
+        for model in [Trip, ChargingSession, IdlePeriod, HeatmapCell, EfficiencyBucket]:
+            self.assertGreater(model.query.count(), 0, model.__tablename__)
+        self.assertEqual(BatteryDay.query.count(), 7)
+        latest_state = LatestState.query.one()
+        self.assertEqual(latest_state.charge_state["timestamp"], ChargeState.query.order_by(
+            ChargeState.timestamp.desc()).first().serialize()["timestamp"])
+
+    def test_generate_replaces_previously_seeded_vehicles(self):
+        first = synthetic.generate(vehicles=1, years=2 / 365, seed=3)
+        second = synthetic.generate(vehicles=1, years=2 / 365, seed=3)
+
+        self.assertEqual(first, second)
+        self.assertEqual(Vehicle.query.count(), 1)
+        self.assertEqual(User.query.count(), 1)
+        self.assertEqual(ChargeState.query.count(), second / 4)
+
+    @staticmethod
+    def _simulate(seed):
+        simulation = synthetic.Simulation(np.random.default_rng([seed, 0]), synthetic.START)
+        return list(simulation.run(21, batch_size=10 ** 9))[0]
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import flask_testing
+from flask import Flask
+
+from tesla_analytics import trips
+from tesla_analytics.models import db, DriveState, Trip
+from tests.helpers import drive_data
+from tests.test_worker import create_user, create_vehicle
+
+
+class TestTrips(flask_testing.TestCase):
+    def create_app(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgres://localhost"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        return app
+
+    def setUp(self):
+        super(TestTrips, self).setUp()
+
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+            db.create_all()
+
+        self.vehicle = create_vehicle("vehicle_id", create_user())
+        self.start = datetime(2018, 2, 14, 8, 0, 0)
+
+    def tearDown(self):
+        super(TestTrips, self).tearDown()
+
+        with self.app.app_context():
+            db.session.commit()
+            db.drop_all()
+
+    def test_record_splits_drives_on_park_and_on_gaps(self):
+        for data in self._drive():
+            drive_state = DriveState(data, vehicle=self.vehicle)
+            db.session.add(drive_state)
+            trips.record(self.vehicle, drive_state)
+            db.session.commit()
+
+        stored = Trip.query.order_by(Trip.start_time).all()
+
+        self.assertEqual(len(stored), 3)
+
+        self.assertFalse(stored[0].in_progress)
+        self.assertEqual(stored[0].start_time, self.start + timedelta(seconds=15))
+        self.assertEqual(stored[0].end_time, self.start + timedelta(seconds=60))
+        self.assertAlmostEqual(stored[0].distance, 1.382, places=3)
+        self.assertAlmostEqual(stored[0].energy, (20 + 30) * 15 / 3600.0)
+        self.assertEqual((stored[0].end_latitude, stored[0].end_longitude), (0.0, 0.02))
+
+        self.assertFalse(stored[1].in_progress)
+        self.assertEqual(stored[1].end_time, self.start + timedelta(minutes=14, seconds=15))
+        self.assertAlmostEqual(stored[1].distance, 0.691, places=3)
+
+        self.assertTrue(stored[2].in_progress)
+        self.assertEqual(stored[2].start_time, self.start + timedelta(minutes=30))
+        self.assertEqual(stored[2].distance, 0)
+
+    def test_rebuild_in_chunks_matches_incremental_detection(self):
+        for data in self._drive():
+            drive_state = DriveState(data, vehicle=self.vehicle)
+            db.session.add(drive_state)
+            trips.record(self.vehicle, drive_state)
+            db.session.commit()
+        incremental = [trip.serialize() for trip in Trip.query.order_by(Trip.start_time).all()]
+
+        count = trips.rebuild(self.vehicle, chunk_size=2)
+        rebuilt = [trip.serialize() for trip in Trip.query.order_by(Trip.start_time).all()]
+
+        self.assertEqual(count, 3)
+        self.assertEqual(len(rebuilt), len(incremental))
+        for expected, actual in zip(incremental, rebuilt):
+            self.assertEqual(expected.keys(), actual.keys())
+            self.assertAlmostEqual(expected.pop("distance"), actual.pop("distance"))
+            self.assertAlmostEqual(expected.pop("energy"), actual.pop("energy"))
+            self.assertAlmostEqual(expected.pop("efficiency"), actual.pop("efficiency"))
+            self.assertEqual(expected, actual)
+
+    def test_rebuild_replaces_existing_trips(self):
+        for data in self._drive()[:5]:
+            db.session.add(DriveState(data, vehicle=self.vehicle))
+        db.session.commit()
+
+        trips.rebuild(self.vehicle)
+        trips.rebuild(self.vehicle)
+
+        self.assertEqual(Trip.query.count(), 1)
+
+    def _drive(self):
+        return [
+            drive_data(self.start, "P", 0.0, 0.0, 0),
+            drive_data(self.start + timedelta(seconds=15), "D", 0.0, 0.0, 10),
+            drive_data(self.start + timedelta(seconds=30), "D", 0.0, 0.01, 20),
+            drive_data(self.start + timedelta(seconds=45), "D", 0.0, 0.02, 30),
+            drive_data(self.start + timedelta(seconds=60), "P", 0.0, 0.02, 0),
+            drive_data(self.start + timedelta(minutes=14), "D", 0.0, 0.03, 5),
+            drive_data(self.start + timedelta(minutes=14, seconds=15), "D", 0.0, 0.04, 10),
+            drive_data(self.start + timedelta(minutes=30), "R", 0.0, 0.04, 2),
+        ]
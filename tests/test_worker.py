@@ -8,7 +8,7 @@ from flask import Flask
 from mockito import mock, verifyStubbedInvocationsAreUsed, unstub, when, verifyNoUnwantedInteractions, expect
 
 from tesla_analytics import workers
-from tesla_analytics.models import User, db, Vehicle
+from tesla_analytics.models import User, db, Vehicle, LatestState
 from tesla_analytics.workers import vehicle_poller, InvalidToken, monitor
 
 
@@ -68,7 +68,7 @@ class TestMonitor(flask_testing.TestCase):
 
     def test_if_invalid_token_raised_notifies_user_that_and_skips_users_other_vehicles(self):
         user = create_user()
-        user_2 = create_user()
+        user_2 = create_user("other@example.com")
 
         vehicle_1 = create_vehicle("vehicle_1", user)
         vehicle_2 = create_vehicle("vehicle_2", user)
@@ -239,6 +239,68 @@ class TestVehiclePoller(flask_testing.TestCase):
             {"timestamp": now.isoformat() + "Z", "vehicle": "yes"}
         )
 
+    def test_keeps_latest_state_up_to_date(self):
+        now = datetime.now()
+
+        user = create_user()
+        vehicle = create_vehicle("vehicle_id", user)
+
+        when(self.service).wake_up("vehicle_id")
+        when(self.service).charge_state("vehicle_id").thenReturn(self._generate_charge(now.timestamp() * 1000, "None"))
+        when(self.service).climate("vehicle_id").thenReturn(self._generate_climate(now.timestamp() * 1000))
+        when(self.service).position("vehicle_id").thenReturn(self._generate_drive(now.timestamp() * 1000, int(now.timestamp())))
+        when(self.service).vehicle_state("vehicle_id").thenReturn(self._generate_vehicle_state(now.timestamp() * 1000))
+
+        vehicle_poller(vehicle)
+
+        later = now + timedelta(minutes=1)
+        when(self.service).charge_state("vehicle_id").thenReturn(self._generate_charge(later.timestamp() * 1000, "Charging"))
+        when(self.service).climate("vehicle_id").thenReturn({"climate": "missing timestamp"})
+
+        with patch("tesla_analytics.workers.current_time", return_value=later):
+            vehicle_poller(vehicle)
+
+        latest_state = LatestState.query.get(vehicle.id)
+        self.assertEqual(latest_state.updated_at, later)
+        self.assertEqual(latest_state.charge_state["charging_state"], "Charging")
+        self.assertEqual(latest_state.climate_state, vehicle.climate_states[0].serialize())
+        self.assertEqual(latest_state.drive_state["shift_state"], "P")
+        self.assertEqual(LatestState.query.count(), 1)
+
+    def test_records_trip_while_driving(self):
+        now = datetime.now()
+
+        user = create_user()
+        vehicle = create_vehicle("vehicle_id", user)
+
+        when(self.service).wake_up("vehicle_id")
+        when(self.service).charge_state("vehicle_id").thenReturn(self._generate_charge(now.timestamp() * 1000, "Disconnected"))
+        when(self.service).climate("vehicle_id").thenReturn(self._generate_climate(now.timestamp() * 1000))
+        when(self.service).position("vehicle_id").thenReturn(self._generate_drive(now.timestamp() * 1000, now.timestamp(), "D"))
+        when(self.service).vehicle_state("vehicle_id").thenReturn(self._generate_vehicle_state(now.timestamp() * 1000))
+
+        vehicle_poller(vehicle)
+
+        self.assertEqual(len(vehicle.trips), 1)
+        self.assertTrue(vehicle.trips[0].in_progress)
+
+    def test_records_charging_session_while_charging(self):
+        now = datetime.now()
+
+        user = create_user()
+        vehicle = create_vehicle("vehicle_id", user)
+
+        when(self.service).wake_up("vehicle_id")
+        when(self.service).charge_state("vehicle_id").thenReturn(self._generate_charge(now.timestamp() * 1000, "Charging"))
+        when(self.service).climate("vehicle_id").thenReturn(self._generate_climate(now.timestamp() * 1000))
+        when(self.service).position("vehicle_id").thenReturn(self._generate_drive(now.timestamp() * 1000, now.timestamp()))
+        when(self.service).vehicle_state("vehicle_id").thenReturn(self._generate_vehicle_state(now.timestamp() * 1000))
+
+        vehicle_poller(vehicle)
+
+        self.assertEqual(len(vehicle.charging_sessions), 1)
+        self.assertEqual(vehicle.charging_sessions[0].latitude, 37.548271)
+
     def test_returns_15_seconds_later_as_next_time_to_poll_if_driving(self):
         now = datetime.now()
 